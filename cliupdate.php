@@ -10,14 +10,41 @@ require __DIR__ . '/src/common.php';
 
 /** @var ContainerInterface $container */
 $loader = $container->get(Selfoss\helpers\ContentLoader::class);
-$updateVisitor = new class implements UpdateVisitor {
-    public function started(int $count): void {
-    }
 
-    public function sourceUpdated(): void {
+$command = $argv[1] ?? 'update';
+if ($command === 'images') {
+    // Process thumbnails and icons queued by updates when `image_queue` option is enabled.
+    $loader->processImageQueue();
+} elseif ($command === 'cleanup') {
+    // Remove old items and orphaned files without updating sources.
+    $loader->cleanup();
+} elseif ($command === 'counters') {
+    // Recount unread and starred items of sources, or only report wrong counters with `verify`.
+    $itemsDao = $container->get(Selfoss\daos\Items::class);
+    if (($argv[2] ?? null) === 'verify') {
+        $mismatches = $itemsDao->verifyCounters();
+        foreach ($mismatches as $mismatch) {
+            echo "Source {$mismatch['source']}: {$mismatch['counter']} is {$mismatch['stored']}, expected {$mismatch['actual']}" . PHP_EOL;
+        }
+        exit(count($mismatches) > 0 ? 1 : 0);
     }
+    $itemsDao->rebuildCounters();
+} elseif ($command === 'search-index') {
+    // Create or drop the full-text index according to `search_index` option.
+    $container->get(Selfoss\daos\DatabaseInterface::class)->updateSearchIndex();
+} elseif ($command === 'update') {
+    $updateVisitor = new class implements UpdateVisitor {
+        public function started(int $count): void {
+        }
 
-    public function finished(): void {
-    }
-};
-$loader->update($updateVisitor);
+        public function sourceUpdated(): void {
+        }
+
+        public function finished(): void {
+        }
+    };
+    $loader->update($updateVisitor);
+} else {
+    fwrite(STDERR, "Unknown command: $command" . PHP_EOL . 'Usage: php cliupdate.php [update|images|cleanup|counters [verify]|search-index]' . PHP_EOL);
+    exit(1);
+}
@@ -67,6 +67,9 @@
           # For integration tests.
           bcrypt
           requests
+
+          # For precompressing assets in zip archive.
+          brotli
         ]);
 
         # Database servers for testing.
@@ -150,7 +153,7 @@
 
               {
                 nativeBuildInputs = [
-                  pkgs.python3
+                  python
                 ];
               }
             ]
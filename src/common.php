@@ -96,6 +96,16 @@ $container
     ->setShared(true)
 ;
 
+$container
+    ->register(helpers\RequestMetrics::class)
+    ->setShared(true)
+;
+
+$container
+    ->register(helpers\FeedPrefetcher::class)
+    ->setShared(true)
+;
+
 // Database bridges
 $container
     ->register(daos\Items::class)
@@ -109,6 +119,10 @@ $container
     ->register(daos\Tags::class)
     ->setShared(true)
 ;
+$container
+    ->register(daos\ImageQueue::class)
+    ->setShared(true)
+;
 
 // Choose database implementation based on config
 $container
@@ -127,6 +141,10 @@ $container
     ->register(daos\TagsInterface::class, 'Selfoss\daos\\' . $configuration->dbType . '\\Tags')
     ->setShared(true)
 ;
+$container
+    ->register(daos\ImageQueueInterface::class, 'Selfoss\daos\\' . $configuration->dbType . '\\ImageQueue')
+    ->setShared(true)
+;
 
 if ($configuration->isChanged('dbSocket') && $configuration->isChanged('dbHost')) {
     boot_error('You cannot set both `db_socket` and `db_host` options.' . PHP_EOL);
@@ -300,6 +318,27 @@ $container
     ->setShared(true)
 ;
 
+if ($configuration->metricsDestination !== null) {
+    if (!str_starts_with($configuration->metricsDestination, 'file:')) {
+        boot_error('The `metrics_destination` option needs to be a file path prefixed by `file:`.' . PHP_EOL);
+    }
+    $metricsFile = substr($configuration->metricsDestination, 5);
+
+    // Headers are sent right before the controller produces the first output,
+    // the timing covers the work done until then without holding back the response.
+    header_register_callback(function() use ($container): void {
+        header('Server-Timing: ' . $container->get(helpers\RequestMetrics::class)->getServerTimingHeader());
+    });
+    register_shutdown_function(function() use ($container, $metricsFile): void {
+        $metrics = $container->get(helpers\RequestMetrics::class);
+        file_put_contents(
+            $metricsFile,
+            json_encode($metrics->toArray(helpers\RequestMetrics::getCurrentRoute()), JSON_THROW_ON_ERROR) . PHP_EOL,
+            FILE_APPEND | LOCK_EX
+        );
+    });
+}
+
 // Try to log errors encountered by error handler.
 Debugger::setLogger($container->get(Tracy\Bridges\Psr\PsrToTracyLoggerAdapter::class));
 if ($configuration->debug !== 0) {
@@ -20,11 +20,15 @@ use SimpleXMLElement;
  */
 // TODO: Make readonly.
 final class Import {
-    /** @var array<string, array{id: int, tags: string[]}> Sources that have been imported from the OPML file */
-    private array $imported = [];
+    /** @var array<string, array{title: string, tags: string[], spout: string, params: array<string, mixed>}> Valid sources found in the OPML file, keyed by their identity */
+    private array $sources = [];
+
+    /** @var array<string, ?string> Tags found in the OPML file with their color, when specified */
+    private array $tags = [];
 
     public function __construct(
         private readonly Authentication $authentication,
+        private readonly daos\DatabaseInterface $database,
         private readonly Logger $logger,
         private readonly daos\Sources $sourcesDao,
         private readonly daos\Tags $tagsDao,
@@ -78,6 +82,7 @@ final class Import {
                 libxml_use_internal_errors($previousUseErrors);
             }
             $errors = $this->processGroup($subs->body);
+            $this->save();
 
             // cleanup tags
             $this->tagsDao->cleanup($this->sourcesDao->getAllTags());
@@ -90,7 +95,7 @@ final class Import {
                 $messages = array_merge($messages, $errors);
             } else { // On success bring them back to their subscription list
                 http_response_code(200);
-                $amount = count($this->imported);
+                $amount = count($this->sources);
                 $messages[] = 'Success! ' . $amount . ' feed' . ($amount !== 1 ? 's have' : ' has') . ' been imported.';
             }
         } catch (\Throwable $e) {
@@ -130,16 +135,12 @@ final class Import {
         $title = $title ?: (string) $attrs->text;
         if ($title !== '' && $title !== '/') {
             $tags[] = $title;
-            // for new tags, try to import tag color, otherwise use random color
-            if (!$this->tagsDao->hasTag($title)) {
+            // remember tag color to use for new tags, they will get a random color otherwise
+            if (!isset($this->tags[$title])) {
                 /** @var SimpleXMLElement attributes in selfoss namespace */
                 $selfossAttrs = $xml->attributes('selfoss', true);
                 $tagColor = (string) $selfossAttrs->color;
-                if ($tagColor !== '') {
-                    $this->tagsDao->saveTagColor($title, $tagColor);
-                } else {
-                    $this->tagsDao->autocolorTag($title);
-                }
+                $this->tags[$title] = $tagColor !== '' ? $tagColor : null;
             }
         }
 
@@ -161,7 +162,7 @@ final class Import {
     }
 
     /**
-     * Add new feed subscription
+     * Collect feed subscription to be stored by `save()`
      *
      * @param SimpleXMLElement $xml An <outline> XML element corresponding to a feed
      * @param string[] $tags of the entry
@@ -220,25 +221,85 @@ final class Import {
             return $title;
         }
 
-        // insert item or update tags for already imported item
-        $hash = md5($title . $spout . json_encode($data));
-        if (array_key_exists($hash, $this->imported)) {
-            $this->imported[$hash]['tags'] = array_unique(array_merge($this->imported[$hash]['tags'], $tags));
-            $tags = $this->imported[$hash]['tags'];
-            $this->sourcesDao->edit($this->imported[$hash]['id'], $title, $tags, '', $spout, $data);
-            $this->logger->debug("OPML import: updated tags for '$title'");
-        } elseif ($id = $this->sourcesDao->checkIfExists($title, $spout, $data)) {
-            $tags = array_unique(array_merge($this->sourcesDao->getTags($id), $tags));
-            $this->sourcesDao->edit($id, $title, $tags, '', $spout, $data);
-            $this->imported[$hash] = ['id' => $id, 'tags' => $tags];
-            $this->logger->debug("OPML import: updated tags for '$title'");
+        // merge tags of feeds listed multiple times
+        $key = self::identify($title, $spout, $data);
+        if (array_key_exists($key, $this->sources)) {
+            $this->sources[$key]['tags'] = array_values(array_unique(array_merge($this->sources[$key]['tags'], $tags)));
         } else {
-            $id = $this->sourcesDao->add($title, $tags, '', $spout, $data);
-            $this->imported[$hash] = ['id' => $id, 'tags' => $tags];
-            $this->logger->debug("OPML import: successfully imported '$title'");
+            $this->sources[$key] = ['title' => $title, 'tags' => $tags, 'spout' => $spout, 'params' => $data];
         }
 
         // success
         return true;
     }
+
+    /**
+     * Store collected tags and sources in a single transaction
+     *
+     * Sources that already exist only get the new tags added.
+     * New sources are not fetched here, the next update will pick them up first.
+     */
+    private function save(): void {
+        $existingTags = array_flip(array_column($this->tagsDao->get(), 'tag'));
+
+        $existingSources = [];
+        foreach ($this->sourcesDao->getAll() as $source) {
+            $params = json_decode(html_entity_decode($source['params']), true);
+            $existingSources[self::identify($source['title'], $source['spout'], is_array($params) ? $params : [])] = $source;
+        }
+
+        $this->database->beginTransaction();
+        try {
+            foreach ($this->tags as $tag => $color) {
+                if (isset($existingTags[$tag])) {
+                    continue;
+                }
+
+                if ($color !== null) {
+                    $this->tagsDao->saveTagColor($tag, $color);
+                } else {
+                    $this->tagsDao->autocolorTag($tag);
+                }
+            }
+
+            $newSources = [];
+            foreach ($this->sources as $key => $source) {
+                if (!isset($existingSources[$key])) {
+                    $newSources[] = [
+                        'title' => $source['title'],
+                        'tags' => $source['tags'],
+                        'filter' => '',
+                        'spout' => $source['spout'],
+                        'params' => $source['params'],
+                    ];
+                    continue;
+                }
+
+                $existing = $existingSources[$key];
+                $tags = array_values(array_unique(array_merge($existing['tags'], $source['tags'])));
+                if (count($tags) !== count($existing['tags'])) {
+                    $this->sourcesDao->edit($existing['id'], $source['title'], $tags, $existing['filter'], $source['spout'], $source['params']);
+                    $this->logger->debug("OPML import: updated tags for '{$source['title']}'");
+                }
+            }
+
+            $this->sourcesDao->addAll($newSources);
+            $this->logger->debug('OPML import: ' . count($newSources) . ' new sources imported');
+
+            $this->database->commit();
+        } catch (\Throwable $e) {
+            $this->database->rollBack();
+
+            throw $e;
+        }
+    }
+
+    /**
+     * Key identifying a source in the same way as `Sources::checkIfExists()`
+     *
+     * @param array<string, mixed> $params
+     */
+    private static function identify(string $title, string $spout, array $params): string {
+        return md5(trim($title) . "\0" . $spout . "\0" . json_encode($params));
+    }
 }
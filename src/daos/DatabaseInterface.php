@@ -69,4 +69,14 @@ interface DatabaseInterface {
      * Get the current version database schema.
      */
     public function getSchemaVersion(): int;
+
+    /**
+     * Create or drop the full-text index according to `search_index` option.
+     */
+    public function updateSearchIndex(): void;
+
+    /**
+     * Check whether the full-text index exists so that it can be used for searching.
+     */
+    public function hasSearchIndex(): bool;
 }
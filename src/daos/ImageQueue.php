@@ -0,0 +1,32 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\daos;
+
+/**
+ * Proxy for accessing the queue of images waiting to be downloaded.
+ */
+final readonly class ImageQueue implements ImageQueueInterface {
+    public function __construct(
+        /** Instance of backend-specific ImageQueue class */
+        private ImageQueueInterface $backend
+    ) {
+    }
+
+    public function enqueue(array $images): void {
+        $this->backend->enqueue($images);
+    }
+
+    public function claim(int $limit): array {
+        return $this->backend->claim($limit);
+    }
+
+    public function complete(array $ids, string $type, string $file): void {
+        $this->backend->complete($ids, $type, $file);
+    }
+
+    public function cleanup(): void {
+        $this->backend->cleanup();
+    }
+}
@@ -0,0 +1,46 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\daos;
+
+/**
+ * Interface describing concrete DAO for working with the queue of images waiting to be downloaded.
+ */
+interface ImageQueueInterface {
+    /** Image is a thumbnail of the item */
+    public const THUMBNAIL = 'thumbnail';
+
+    /** Image is an icon of the item */
+    public const ICON = 'icon';
+
+    /**
+     * add images to be processed for given items
+     *
+     * @param list<array{item: int, type: self::THUMBNAIL|self::ICON, url: string}> $images
+     */
+    public function enqueue(array $images): void;
+
+    /**
+     * claims the oldest entries in the queue not claimed by another process and returns them
+     *
+     * Entries not completed for a long time can be claimed again.
+     *
+     * @return list<array{id: int, item: int, type: self::THUMBNAIL|self::ICON, url: string}>
+     */
+    public function claim(int $limit): array;
+
+    /**
+     * set the processed image to items of given queue entries and remove the entries from the queue
+     *
+     * @param non-empty-array<int> $ids ids of queue entries
+     * @param self::THUMBNAIL|self::ICON $type
+     * @param string $file path in the thumbnails or favicons directory, empty when the image could not be processed
+     */
+    public function complete(array $ids, string $type, string $file): void;
+
+    /**
+     * remove entries of items that no longer exist
+     */
+    public function cleanup(): void;
+}
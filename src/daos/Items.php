@@ -39,8 +39,8 @@ final readonly class Items implements ItemsInterface {
         $this->backend->unstarr($id);
     }
 
-    public function add(array $values): void {
-        $this->backend->add($values);
+    public function addAll(array $items): void {
+        $this->backend->addAll($items);
     }
 
     public function exists(string $uid): bool {
@@ -55,6 +55,10 @@ final readonly class Items implements ItemsInterface {
         $this->backend->updateLastSeen($itemIds);
     }
 
+    public function updateLastSeenOfSource(int $sourceId): void {
+        $this->backend->updateLastSeenOfSource($sourceId);
+    }
+
     public function cleanup(?DateTime $minDate): void {
         $this->backend->cleanup($minDate);
     }
@@ -114,12 +118,12 @@ final readonly class Items implements ItemsInterface {
         return $this->backend->lastId();
     }
 
-    public function hasThumbnail(string $thumbnail): bool {
-        return $this->backend->hasThumbnail($thumbnail);
+    public function getThumbnails(): array {
+        return $this->backend->getThumbnails();
     }
 
-    public function hasIcon(string $icon): bool {
-        return $this->backend->hasIcon($icon);
+    public function getIcons(): array {
+        return $this->backend->getIcons();
     }
 
     public function numberOfUnread(): int {
@@ -141,4 +145,12 @@ final readonly class Items implements ItemsInterface {
     public function bulkStatusUpdate(array $statuses): void {
         $this->backend->bulkStatusUpdate($statuses);
     }
+
+    public function rebuildCounters(): void {
+        $this->backend->rebuildCounters();
+    }
+
+    public function verifyCounters(): array {
+        return $this->backend->verifyCounters();
+    }
 }
@@ -41,11 +41,11 @@ interface ItemsInterface {
     public function unstarr(int $id): void;
 
     /**
-     * add new item
+     * add multiple new items at once
      *
-     * @param array{datetime: \DateTimeInterface, title: HtmlString, content: HtmlString, thumbnail: ?string, icon: ?string, source: int, uid: string, link: string, author: ?string} $values
+     * @param list<array{datetime: \DateTimeInterface, title: HtmlString, content: HtmlString, thumbnail: ?string, icon: ?string, source: int, uid: string, link: string, author: ?string}> $items
      */
-    public function add(array $values): void;
+    public function addAll(array $items): void;
 
     /**
      * checks whether an item with given
@@ -70,6 +70,14 @@ interface ItemsInterface {
      */
     public function updateLastSeen(array $itemIds): void;
 
+    /**
+     * Update the time items were last seen in the feed for items
+     * that were present in the feed the last time it was fetched.
+     *
+     * @param int $sourceId the id of the source whose items to update
+     */
+    public function updateLastSeenOfSource(int $sourceId): void;
+
     /**
      * cleanup orphaned and old items
      *
@@ -118,22 +126,18 @@ interface ItemsInterface {
     public function lastId(): int;
 
     /**
-     * return all thumbnails
+     * return all thumbnails in use
      *
-     * @param string $thumbnail name
-     *
-     * @return bool true if thumbnail is still in use
+     * @return string[] file names in the thumbnails directory
      */
-    public function hasThumbnail(string $thumbnail): bool;
+    public function getThumbnails(): array;
 
     /**
-     * return all icons
-     *
-     * @param string $icon file
+     * return all icons in use
      *
-     * @return bool true if icon is still in use
+     * @return string[] file names in the favicons directory
      */
-    public function hasIcon(string $icon): bool;
+    public function getIcons(): array;
 
     /**
      * returns the amount of entries in database which are unread
@@ -169,4 +173,16 @@ interface ItemsInterface {
      * @param array<array{id: int, unread?: mixed, starred?: mixed, datetime?: string}> $statuses array of statuses updates
      */
     public function bulkStatusUpdate(array $statuses): void;
+
+    /**
+     * recount the number of items, unread and starred items stored with each source
+     */
+    public function rebuildCounters(): void;
+
+    /**
+     * compare the counters stored with each source with the actual number of items
+     *
+     * @return array<array{source: int, counter: string, stored: int, actual: int}> counters that do not match
+     */
+    public function verifyCounters(): array;
 }
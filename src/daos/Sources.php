@@ -5,6 +5,7 @@ declare(strict_types=1);
 namespace Selfoss\daos;
 
 use Selfoss\helpers\Authentication;
+use Selfoss\helpers\CacheValidators;
 use Selfoss\helpers\SpoutLoader;
 use spouts\Parameter;
 
@@ -29,6 +30,10 @@ final readonly class Sources implements SourcesInterface {
         return $this->backend->add($title, $tags, $filter, $spout, $params);
     }
 
+    public function addAll(array $sources): void {
+        $this->backend->addAll($sources);
+    }
+
     public function edit(int $id, string $title, array $tags, ?string $filter, string $spout, array $params): void {
         $this->backend->edit($id, $title, $tags, $filter, $spout, $params);
     }
@@ -45,6 +50,10 @@ final readonly class Sources implements SourcesInterface {
         $this->backend->saveLastUpdate($id, $lastEntry);
     }
 
+    public function saveCacheValidators(int $id, ?CacheValidators $validators): void {
+        $this->backend->saveCacheValidators($id, $validators);
+    }
+
     public function count(): int {
         return $this->backend->count();
     }
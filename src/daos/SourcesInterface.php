@@ -4,6 +4,8 @@ declare(strict_types=1);
 
 namespace Selfoss\daos;
 
+use Selfoss\helpers\CacheValidators;
+
 /**
  * Interface describing concrete DAO for working with sources.
  */
@@ -19,6 +21,13 @@ interface SourcesInterface {
      */
     public function add(string $title, array $tags, ?string $filter, string $spout, array $params): int;
 
+    /**
+     * add multiple new sources at once
+     *
+     * @param list<array{title: string, tags: string[], filter: ?string, spout: string, params: array<string, mixed>}> $sources
+     */
+    public function addAll(array $sources): void;
+
     /**
      * edit source
      *
@@ -51,22 +60,29 @@ interface SourcesInterface {
      */
     public function saveLastUpdate(int $id, ?int $lastEntry): void;
 
+    /**
+     * Remember validators of the fetched content for conditional requests.
+     *
+     * @param int $id the source id
+     */
+    public function saveCacheValidators(int $id, ?CacheValidators $validators): void;
+
     /**
      * Gets the number of sources.
      */
     public function count(): int;
 
     /**
-     * returns all sources
+     * returns all sources, the ones that were never updated first
      *
-     * @return array<array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int}> all sources
+     * @return array<array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int, etag: ?string, lastmodified: ?string}> all sources
      */
     public function getByLastUpdate(): array;
 
     /**
      * Returns source with given id (or null if it doesnt exist).
      *
-     * @return ?array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int}
+     * @return ?array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int, etag: ?string, lastmodified: ?string}
      */
     public function get(int $id): ?array;
 
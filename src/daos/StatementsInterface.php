@@ -127,4 +127,31 @@ interface StatementsInterface {
      * @return string expression for matching
      */
     public static function matchesRegex(string $value, string $regex): string;
+
+    /**
+     * Match items against a full-text query using the index
+     * maintained when `search_index` option is enabled.
+     *
+     * @param string $query query created by `fullTextQuery`
+     *
+     * @return string expression for matching
+     */
+    public static function matchesFullText(string $query): string;
+
+    /**
+     * Build a full-text query matching items containing
+     * words starting with each of the given words.
+     *
+     * @param string[] $words words consisting only of letters, digits and underscores
+     *
+     * @return string query to bind to the parameter passed to `matchesFullText`
+     */
+    public static function fullTextQuery(array $words): string;
+
+    /**
+     * Clause locking the rows selected by a query until the end of the transaction.
+     *
+     * @return string clause to append to a SELECT statement
+     */
+    public static function forUpdate(): string;
 }
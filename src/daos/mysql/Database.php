@@ -6,6 +6,7 @@ namespace Selfoss\daos\mysql;
 
 use Monolog\Logger;
 use Selfoss\daos\CommonSqlDatabase;
+use Selfoss\helpers\Configuration;
 use Selfoss\helpers\DatabaseConnection;
 use Selfoss\helpers\StringKeyedArray;
 
@@ -19,13 +20,17 @@ use Selfoss\helpers\StringKeyedArray;
 final class Database implements \Selfoss\daos\DatabaseInterface {
     use CommonSqlDatabase;
 
+    /** Whether the full-text index exists, checked when first needed */
+    private ?bool $hasSearchIndex = null;
+
     /**
      * establish connection and
      * create undefined tables
      */
     public function __construct(
         private DatabaseConnection $connection,
-        private Logger $logger
+        private Logger $logger,
+        private Configuration $configuration
     ) {
         $this->logger->debug('Establishing MySQL database connection');
 
@@ -367,6 +372,90 @@ final class Database implements \Selfoss\daos\DatabaseInterface {
             $this->exec('INSERT INTO ' . $this->connection->getTableNamePrefix() . 'version (version) VALUES (15)');
             $this->commit();
         }
+        if ($version < 16) {
+            $this->logger->debug('Upgrading database schema to version 16');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE ' . $this->connection->getTableNamePrefix() . 'sources ADD etag TEXT, ADD lastmodified TEXT');
+            $this->exec('INSERT INTO ' . $this->connection->getTableNamePrefix() . 'version (version) VALUES (16)');
+            $this->commit();
+        }
+        if ($version < 17) {
+            $this->logger->debug('Upgrading database schema to version 17');
+
+            $this->beginTransaction();
+            $this->exec('
+                CREATE TABLE ' . $this->connection->getTableNamePrefix() . 'imagequeue (
+                    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                    item INT NOT NULL,
+                    type VARCHAR(16) NOT NULL,
+                    url TEXT NOT NULL
+                ) ENGINE = InnoDB DEFAULT CHARSET=utf8mb4
+            ');
+            $this->exec('INSERT INTO ' . $this->connection->getTableNamePrefix() . 'version (version) VALUES (17)');
+            $this->commit();
+        }
+        if ($version < 18) {
+            $this->logger->debug('Upgrading database schema to version 18');
+
+            $this->beginTransaction();
+            $this->exec('
+                ALTER TABLE ' . $this->connection->getTableNamePrefix() . 'sources
+                    ADD itemcount INT NOT NULL DEFAULT 0,
+                    ADD unreadcount INT NOT NULL DEFAULT 0,
+                    ADD starredcount INT NOT NULL DEFAULT 0
+            ');
+            $this->exec('
+                UPDATE ' . $this->connection->getTableNamePrefix() . 'sources AS sources SET
+                    itemcount = (SELECT COUNT(*) FROM ' . $this->connection->getTableNamePrefix() . 'items AS items WHERE items.source = sources.id),
+                    unreadcount = (SELECT COUNT(*) FROM ' . $this->connection->getTableNamePrefix() . 'items AS items WHERE items.source = sources.id AND items.unread = 1),
+                    starredcount = (SELECT COUNT(*) FROM ' . $this->connection->getTableNamePrefix() . 'items AS items WHERE items.source = sources.id AND items.starred = 1)
+            ');
+            $this->exec('INSERT INTO ' . $this->connection->getTableNamePrefix() . 'version (version) VALUES (18)');
+            $this->commit();
+        }
+        if ($version < 19) {
+            $this->logger->debug('Upgrading database schema to version 19');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE ' . $this->connection->getTableNamePrefix() . 'imagequeue ADD claim VARCHAR(32), ADD claimed DATETIME');
+            $this->exec('INSERT INTO ' . $this->connection->getTableNamePrefix() . 'version (version) VALUES (19)');
+            $this->commit();
+        }
+    }
+
+    /**
+     * Create or drop the full-text index according to `search_index` option
+     */
+    public function updateSearchIndex(): void {
+        $exists = $this->searchIndexExists();
+
+        if ($this->configuration->searchIndex && !$exists) {
+            $this->logger->debug('Creating full-text search index');
+
+            $this->exec('ALTER TABLE ' . $this->connection->getTableNamePrefix() . 'items ADD FULLTEXT INDEX search (title, content)');
+        } elseif (!$this->configuration->searchIndex && $exists) {
+            $this->logger->debug('Dropping full-text search index');
+
+            $this->exec('ALTER TABLE ' . $this->connection->getTableNamePrefix() . 'items DROP INDEX search');
+        }
+
+        $this->hasSearchIndex = $this->configuration->searchIndex;
+    }
+
+    public function hasSearchIndex(): bool {
+        if ($this->hasSearchIndex === null) {
+            $this->hasSearchIndex = $this->searchIndexExists();
+            if ($this->configuration->searchIndex && !$this->hasSearchIndex) {
+                $this->logger->warning('Full-text search index is missing, create it by running `php cliupdate.php search-index`');
+            }
+        }
+
+        return $this->hasSearchIndex;
+    }
+
+    private function searchIndexExists(): bool {
+        return count($this->exec('SHOW INDEX FROM ' . $this->connection->getTableNamePrefix() . "items WHERE Key_name = 'search'")) > 0;
     }
 
     /**
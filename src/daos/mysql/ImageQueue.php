@@ -0,0 +1,110 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\daos\mysql;
+
+use Selfoss\daos\DatabaseInterface;
+use Selfoss\helpers\Configuration;
+
+/**
+ * Class for accessing the queue of images waiting to be downloaded -- mysql
+ */
+class ImageQueue implements \Selfoss\daos\ImageQueueInterface {
+    /** Number of entries inserted by a single statement, keeping the number of bound parameters within database limits */
+    private const INSERT_BATCH_SIZE = 100;
+
+    /** Number of seconds after which entries claimed by a process that did not complete them can be claimed again */
+    private const CLAIM_TIMEOUT = 3600;
+
+    /** @var class-string SQL helper */
+    protected static string $stmt = Statements::class;
+
+    public function __construct(
+        private readonly Configuration $configuration,
+        protected DatabaseInterface $database
+    ) {
+    }
+
+    public function enqueue(array $images): void {
+        foreach (array_chunk($images, self::INSERT_BATCH_SIZE) as $batch) {
+            $rows = [];
+            $params = [];
+            foreach ($batch as $i => $image) {
+                $rows[] = "(:item{$i}, :type{$i}, :url{$i})";
+                $params += [
+                    ":item{$i}" => $image['item'],
+                    ":type{$i}" => $image['type'],
+                    ":url{$i}" => $image['url'],
+                ];
+            }
+
+            $this->database->exec(
+                'INSERT INTO ' . $this->configuration->dbPrefix . 'imagequeue (item, type, url) VALUES ' . implode(', ', $rows),
+                $params
+            );
+        }
+    }
+
+    public function claim(int $limit): array {
+        $claim = bin2hex(random_bytes(16));
+        $now = new \DateTimeImmutable();
+        $stale = $now->sub(new \DateInterval('PT' . self::CLAIM_TIMEOUT . 'S'))->format('Y-m-d H:i:s');
+        $claimable = fn(string $param): string => '(claim IS NULL OR claimed < ' . $param . ')';
+
+        // The condition is repeated so that entries claimed concurrently after the subquery
+        // selected them are skipped once the row locks are released.
+        $this->database->exec(
+            'UPDATE ' . $this->configuration->dbPrefix . 'imagequeue SET claim = :claim, claimed = :now
+            WHERE ' . $claimable(':stale') . ' AND id IN (
+                SELECT id FROM (
+                    SELECT id FROM ' . $this->configuration->dbPrefix . 'imagequeue WHERE ' . $claimable(':stale2') . ' ORDER BY id LIMIT ' . $limit . '
+                ) AS pending
+            )',
+            [
+                ':claim' => $claim,
+                ':now' => $now->format('Y-m-d H:i:s'),
+                ':stale' => $stale,
+                ':stale2' => $stale,
+            ]
+        );
+
+        $entries = $this->database->exec(
+            'SELECT id, item, type, url FROM ' . $this->configuration->dbPrefix . 'imagequeue WHERE claim = :claim ORDER BY id',
+            [':claim' => $claim]
+        );
+
+        /** @var list<array{id: int, item: int, type: self::THUMBNAIL|self::ICON, url: string}> */
+        $entries = static::$stmt::ensureRowTypes($entries, [
+            'id' => DatabaseInterface::PARAM_INT,
+            'item' => DatabaseInterface::PARAM_INT,
+        ]);
+
+        return $entries;
+    }
+
+    public function complete(array $ids, string $type, string $file): void {
+        $column = match ($type) {
+            self::THUMBNAIL => 'thumbnail',
+            self::ICON => 'icon',
+        };
+
+        $this->database->exec(
+            'UPDATE ' . $this->configuration->dbPrefix . 'items SET ' . $column . ' = :file
+            WHERE id IN (
+                SELECT item FROM ' . $this->configuration->dbPrefix . 'imagequeue WHERE ' . static::$stmt::intRowMatches('id', $ids) . '
+            )',
+            [':file' => $file]
+        );
+        $this->database->exec(
+            'DELETE FROM ' . $this->configuration->dbPrefix . 'imagequeue WHERE ' . static::$stmt::intRowMatches('id', $ids)
+        );
+    }
+
+    public function cleanup(): void {
+        $this->database->exec(
+            'DELETE FROM ' . $this->configuration->dbPrefix . 'imagequeue
+            WHERE item NOT IN (SELECT id FROM ' . $this->configuration->dbPrefix . 'items)'
+        );
+    }
+}
@@ -6,7 +6,6 @@ namespace Selfoss\daos\mysql;
 
 use DateTime;
 use DateTimeImmutable;
-use Monolog\Logger;
 use Selfoss\daos\DatabaseInterface;
 use Selfoss\daos\ItemOptions;
 use Selfoss\helpers\Configuration;
@@ -21,6 +20,9 @@ use Selfoss\helpers\HtmlString;
  * @author     Harald Lapp <harald.lapp@gmail.com>
  */
 class Items implements \Selfoss\daos\ItemsInterface {
+    /** Number of items inserted by a single statement, keeping the number of bound parameters within database limits */
+    private const INSERT_BATCH_SIZE = 50;
+
     /** Indicates whether last run has more results or not */
     protected bool $hasMore = false;
 
@@ -28,7 +30,6 @@ class Items implements \Selfoss\daos\ItemsInterface {
     protected static string $stmt = Statements::class;
 
     public function __construct(
-        private readonly Logger $logger,
         private readonly Configuration $configuration,
         protected DatabaseInterface $database
     ) {
@@ -47,12 +48,21 @@ class Items implements \Selfoss\daos\ItemsInterface {
                 $ids
             )
         );
-        $this->database->exec(
-            'UPDATE ' . $this->configuration->dbPrefix . "items SET unread=:unread WHERE id IN ($ids)",
-            [
-                'unread' => false,
-            ]
-        );
+        $this->database->beginTransaction();
+        try {
+            $this->adjustCounter('unreadcount', -1, "items.id IN ($ids) AND " . static::$stmt::isTrue('items.unread'));
+            $this->database->exec(
+                'UPDATE ' . $this->configuration->dbPrefix . "items SET unread=:unread WHERE id IN ($ids)",
+                [
+                    'unread' => false,
+                ]
+            );
+            $this->database->commit();
+        } catch (\Throwable $e) {
+            $this->database->rollBack();
+
+            throw $e;
+        }
     }
 
     /**
@@ -68,12 +78,21 @@ class Items implements \Selfoss\daos\ItemsInterface {
                 $ids
             )
         );
-        $this->database->exec(
-            'UPDATE ' . $this->configuration->dbPrefix . "items SET unread=:unread WHERE id IN ($ids)",
-            [
-                'unread' => true,
-            ]
-        );
+        $this->database->beginTransaction();
+        try {
+            $this->adjustCounter('unreadcount', 1, "items.id IN ($ids) AND " . static::$stmt::isFalse('items.unread'));
+            $this->database->exec(
+                'UPDATE ' . $this->configuration->dbPrefix . "items SET unread=:unread WHERE id IN ($ids)",
+                [
+                    'unread' => true,
+                ]
+            );
+            $this->database->commit();
+        } catch (\Throwable $e) {
+            $this->database->rollBack();
+
+            throw $e;
+        }
     }
 
     /**
@@ -82,10 +101,19 @@ class Items implements \Selfoss\daos\ItemsInterface {
      * @param int $id the item
      */
     public function starr(int $id): void {
-        $this->database->exec('UPDATE ' . $this->configuration->dbPrefix . 'items SET starred=:bool WHERE id=:id', [
-            ':bool' => true,
-            ':id' => $id,
-        ]);
+        $this->database->beginTransaction();
+        try {
+            $this->adjustCounter('starredcount', 1, 'items.id = :id AND ' . static::$stmt::isFalse('items.starred'), [':id' => $id]);
+            $this->database->exec('UPDATE ' . $this->configuration->dbPrefix . 'items SET starred=:bool WHERE id=:id', [
+                ':bool' => true,
+                ':id' => $id,
+            ]);
+            $this->database->commit();
+        } catch (\Throwable $e) {
+            $this->database->rollBack();
+
+            throw $e;
+        }
     }
 
     /**
@@ -94,60 +122,122 @@ class Items implements \Selfoss\daos\ItemsInterface {
      * @param int $id the item
      */
     public function unstarr(int $id): void {
-        $this->database->exec('UPDATE ' . $this->configuration->dbPrefix . 'items SET starred=:bool WHERE id=:id', [
-            ':bool' => false,
-            ':id' => $id,
-        ]);
+        $this->database->beginTransaction();
+        try {
+            $this->adjustCounter('starredcount', -1, 'items.id = :id AND ' . static::$stmt::isTrue('items.starred'), [':id' => $id]);
+            $this->database->exec('UPDATE ' . $this->configuration->dbPrefix . 'items SET starred=:bool WHERE id=:id', [
+                ':bool' => false,
+                ':id' => $id,
+            ]);
+            $this->database->commit();
+        } catch (\Throwable $e) {
+            $this->database->rollBack();
+
+            throw $e;
+        }
     }
 
     /**
-     * add new item
+     * add multiple new items using as few statements as possible
      *
-     * @param array{datetime: \DateTimeInterface, title: HtmlString, content: HtmlString, thumbnail: ?string, icon: ?string, source: int, uid: string, link: string, author: ?string} $values
+     * @param list<array{datetime: \DateTimeInterface, title: HtmlString, content: HtmlString, thumbnail: ?string, icon: ?string, source: int, uid: string, link: string, author: ?string}> $items
+     */
+    public function addAll(array $items): void {
+        foreach (array_chunk($items, self::INSERT_BATCH_SIZE) as $batch) {
+            $rows = [];
+            $params = [];
+            foreach ($batch as $i => $values) {
+                $rows[] = "(:datetime{$i}, :title{$i}, :content{$i}, :unread{$i}, :starred{$i}, :source{$i}, :thumbnail{$i}, :icon{$i}, :uid{$i}, :link{$i}, :author{$i})";
+                $params += [
+                    ":datetime{$i}" => $values['datetime']->format('Y-m-d H:i:s'),
+                    ":title{$i}" => $values['title']->getRaw(),
+                    ":content{$i}" => $values['content']->getRaw(),
+                    ":thumbnail{$i}" => $values['thumbnail'],
+                    ":icon{$i}" => $values['icon'],
+                    ":unread{$i}" => 1,
+                    ":starred{$i}" => 0,
+                    ":source{$i}" => $values['source'],
+                    ":uid{$i}" => $values['uid'],
+                    ":link{$i}" => $values['link'],
+                    ":author{$i}" => $values['author'],
+                ];
+            }
+
+            $this->database->exec(
+                'INSERT INTO ' . $this->configuration->dbPrefix . 'items (
+                    datetime,
+                    title,
+                    content,
+                    unread,
+                    starred,
+                    source,
+                    thumbnail,
+                    icon,
+                    uid,
+                    link,
+                    author
+                ) VALUES ' . implode(', ', $rows),
+                $params
+            );
+        }
+
+        foreach (array_count_values(array_column($items, 'source')) as $source => $count) {
+            $this->addToCounters($source, $count);
+        }
+    }
+
+    /**
+     * Count new unread items in the counters of their source.
      */
-    public function add(array $values): void {
+    private function addToCounters(int $source, int $count): void {
         $this->database->exec(
-            'INSERT INTO ' . $this->configuration->dbPrefix . 'items (
-                datetime,
-                title,
-                content,
-                unread,
-                starred,
-                source,
-                thumbnail,
-                icon,
-                uid,
-                link,
-                author
-            ) VALUES (
-                :datetime,
-                :title,
-                :content,
-                :unread,
-                :starred,
-                :source,
-                :thumbnail,
-                :icon,
-                :uid,
-                :link,
-                :author
-            )',
+            'UPDATE ' . $this->configuration->dbPrefix . 'sources
+            SET itemcount = itemcount + :items, unreadcount = unreadcount + :unread
+            WHERE id = :source',
             [
-                ':datetime' => $values['datetime']->format('Y-m-d H:i:s'),
-                ':title' => $values['title']->getRaw(),
-                ':content' => $values['content']->getRaw(),
-                ':thumbnail' => $values['thumbnail'],
-                ':icon' => $values['icon'],
-                ':unread' => 1,
-                ':starred' => 0,
-                ':source' => $values['source'],
-                ':uid' => $values['uid'],
-                ':link' => $values['link'],
-                ':author' => $values['author'],
+                ':items' => $count,
+                ':unread' => $count,
+                ':source' => $source,
             ]
         );
     }
 
+    /**
+     * Change a counter stored with sources by the number of their items matching the condition.
+     *
+     * Needs to be called in a transaction before the items are changed, while the condition still matches them.
+     * The matching items are locked so that concurrent changes of the same items wait for the transaction
+     * and do not count them again.
+     *
+     * @param string $counter counter column of the sources table
+     * @param int $sign 1 to increase the counter, -1 to decrease it
+     * @param string $condition SQL condition on the items table aliased as `items`
+     * @param array<string, mixed> $params parameters bound to the condition
+     */
+    private function adjustCounter(string $counter, int $sign, string $condition, array $params = []): void {
+        // Locking clause cannot be combined with GROUP BY in PostgreSQL so the rows are locked in a subquery.
+        $counts = $this->database->exec(
+            'SELECT locked.source, COUNT(*) AS amount
+            FROM (
+                SELECT items.source
+                FROM ' . $this->configuration->dbPrefix . 'items AS items
+                WHERE ' . $condition . '
+                ORDER BY items.id' . static::$stmt::forUpdate() . '
+            ) AS locked
+            GROUP BY locked.source',
+            $params
+        );
+        foreach ($counts as $count) {
+            $this->database->exec(
+                'UPDATE ' . $this->configuration->dbPrefix . 'sources SET ' . $counter . ' = ' . $counter . ' + :delta WHERE id = :source',
+                [
+                    ':delta' => $sign * (int) $count['amount'],
+                    ':source' => (int) $count['source'],
+                ]
+            );
+        }
+    }
+
     /**
      * checks whether an item with given
      * uid exists or not
@@ -200,6 +290,33 @@ class Items implements \Selfoss\daos\ItemsInterface {
             WHERE ' . static::$stmt::intRowMatches('id', $itemIds));
     }
 
+    /**
+     * Update the time items were last seen in the feed for items
+     * that were present in the feed the last time it was fetched.
+     *
+     * All items seen in a fetch are updated at once so they share the most recent time.
+     *
+     * @param int $sourceId the id of the source whose items to update
+     */
+    public function updateLastSeenOfSource(int $sourceId): void {
+        $latest = $this->database->exec(
+            'SELECT MAX(lastseen) AS lastseen FROM ' . $this->configuration->dbPrefix . 'items WHERE source = :source',
+            [':source' => $sourceId]
+        );
+        if ($latest[0]['lastseen'] === null) {
+            return;
+        }
+
+        $this->database->exec(
+            'UPDATE ' . $this->configuration->dbPrefix . 'items SET lastseen = CURRENT_TIMESTAMP
+            WHERE source = :source AND lastseen = :lastseen',
+            [
+                ':source' => $sourceId,
+                ':lastseen' => $latest[0]['lastseen'],
+            ]
+        );
+    }
+
     /**
      * cleanup orphaned and old items
      *
@@ -210,11 +327,24 @@ class Items implements \Selfoss\daos\ItemsInterface {
             WHERE source NOT IN (
                 SELECT id FROM ' . $this->configuration->dbPrefix . 'sources)');
         if ($date !== null) {
-            $this->database->exec(
-                'DELETE FROM ' . $this->configuration->dbPrefix . 'items
-                WHERE ' . static::$stmt::isFalse('starred') . ' AND lastseen<:date',
-                [':date' => $date->format('Y-m-d') . ' 00:00:00']
-            );
+            $params = [':date' => $date->format('Y-m-d') . ' 00:00:00'];
+            $old = static::$stmt::isFalse('items.starred') . ' AND items.lastseen<:date';
+
+            $this->database->beginTransaction();
+            try {
+                $this->adjustCounter('itemcount', -1, $old, $params);
+                $this->adjustCounter('unreadcount', -1, $old . ' AND ' . static::$stmt::isTrue('items.unread'), $params);
+                $this->database->exec(
+                    'DELETE FROM ' . $this->configuration->dbPrefix . 'items
+                    WHERE ' . static::$stmt::isFalse('starred') . ' AND lastseen<:date',
+                    $params
+                );
+                $this->database->commit();
+            } catch (\Throwable $e) {
+                $this->database->rollBack();
+
+                throw $e;
+            }
         }
     }
 
@@ -249,6 +379,11 @@ class Items implements \Selfoss\daos\ItemsInterface {
             if (preg_match('#^/(?P<regex>.+)/$#', $options->search, $matches)) {
                 $params[':search'] = $params[':search2'] = $params[':search3'] = [$matches['regex'], \PDO::PARAM_STR];
                 $where[] = static::$stmt::exprOr(static::$stmt::matchesRegex('items.title', ':search'), static::$stmt::matchesRegex('items.content', ':search2'), static::$stmt::matchesRegex('sources.title', ':search3'));
+            } elseif ($this->configuration->searchIndex && $this->database->hasSearchIndex() && count($words = \Selfoss\helpers\Search::splitWords($options->search)) > 0) {
+                // Source titles are not part of the index but there are only few of them.
+                $params[':search'] = [static::$stmt::fullTextQuery($words), \PDO::PARAM_STR];
+                $params[':search2'] = ['%' . implode('%', \Selfoss\helpers\Search::splitTerms($options->search)) . '%', \PDO::PARAM_STR];
+                $where[] = static::$stmt::exprOr(static::$stmt::matchesFullText(':search'), 'sources.title LIKE :search2');
             } else {
                 $search = implode('%', \Selfoss\helpers\Search::splitTerms($options->search));
                 $params[':search'] = $params[':search2'] = $params[':search3'] = ['%' . $search . '%', \PDO::PARAM_STR];
@@ -451,43 +586,33 @@ class Items implements \Selfoss\daos\ItemsInterface {
     }
 
     /**
-     * return all thumbnails
-     *
-     * @param string $thumbnail name
+     * return all thumbnails in use
      *
-     * @return bool true if thumbnail is still in use
+     * @return string[] file names in the thumbnails directory
      */
-    public function hasThumbnail(string $thumbnail): bool {
+    public function getThumbnails(): array {
         $res = $this->database->exec(
-            'SELECT count(*) AS amount
+            'SELECT DISTINCT thumbnail
                    FROM ' . $this->configuration->dbPrefix . 'items
-                   WHERE thumbnail=:thumbnail',
-            [':thumbnail' => $thumbnail]
+                   WHERE thumbnail IS NOT NULL AND thumbnail <> \'\''
         );
-        $amount = $res[0]['amount'];
-        if ($amount == 0) {
-            $this->logger->debug('thumbnail not found: ' . $thumbnail);
-        }
 
-        return $amount > 0;
+        return array_column($res, 'thumbnail');
     }
 
     /**
-     * return all icons
+     * return all icons in use
      *
-     * @param string $icon file
-     *
-     * @return bool true if icon is still in use
+     * @return string[] file names in the favicons directory
      */
-    public function hasIcon(string $icon): bool {
+    public function getIcons(): array {
         $res = $this->database->exec(
-            'SELECT count(*) AS amount
+            'SELECT DISTINCT icon
                    FROM ' . $this->configuration->dbPrefix . 'items
-                   WHERE icon=:icon',
-            [':icon' => $icon]
+                   WHERE icon IS NOT NULL AND icon <> \'\''
         );
 
-        return $res[0]['amount'] > 0;
+        return array_column($res, 'icon');
     }
 
     /**
@@ -496,11 +621,10 @@ class Items implements \Selfoss\daos\ItemsInterface {
      * @return int amount of entries in database which are unread
      */
     public function numberOfUnread(): int {
-        $res = $this->database->exec('SELECT count(*) AS amount
-                   FROM ' . $this->configuration->dbPrefix . 'items
-                   WHERE ' . static::$stmt::isTrue('unread'));
+        $res = $this->database->exec('SELECT COALESCE(SUM(unreadcount), 0) AS amount
+                   FROM ' . $this->configuration->dbPrefix . 'sources');
 
-        return $res[0]['amount'];
+        return (int) $res[0]['amount'];
     }
 
     /**
@@ -509,11 +633,12 @@ class Items implements \Selfoss\daos\ItemsInterface {
      * @return array{total: int, unread: int, starred: int} mount of total, unread, starred entries in database
      */
     public function stats(): array {
+        // Counters stored with sources avoid scanning all items on every poll.
         $res = $this->database->exec('SELECT
-            COUNT(*) AS total,
-            ' . static::$stmt::sumBool('unread') . ' AS unread,
-            ' . static::$stmt::sumBool('starred') . ' AS starred
-            FROM ' . $this->configuration->dbPrefix . 'items;');
+            COALESCE(SUM(itemcount), 0) AS total,
+            COALESCE(SUM(unreadcount), 0) AS unread,
+            COALESCE(SUM(starredcount), 0) AS starred
+            FROM ' . $this->configuration->dbPrefix . 'sources;');
         $res = static::$stmt::ensureRowTypes($res, [
             'total' => DatabaseInterface::PARAM_INT,
             'unread' => DatabaseInterface::PARAM_INT,
@@ -576,12 +701,12 @@ class Items implements \Selfoss\daos\ItemsInterface {
                         if ($status[$sk] == 'true') {
                             $statusUpdate = [
                                 'sk' => $sk,
-                                'sql' => static::$stmt::isTrue($sk),
+                                'value' => true,
                             ];
                         } elseif ($status[$sk] == 'false') {
                             $statusUpdate = [
                                 'sk' => $sk,
-                                'sql' => static::$stmt::isFalse($sk),
+                                'value' => false,
                             ];
                         }
                     }
@@ -602,7 +727,7 @@ class Items implements \Selfoss\daos\ItemsInterface {
                         // after the last server update for this entry.
                         if (!array_key_exists($sk, $sql[$id]['updates'])
                             || $updateDate > $sql[$id]['datetime']) {
-                            $sql[$id]['updates'][$sk] = $statusUpdate['sql'];
+                            $sql[$id]['updates'][$sk] = $statusUpdate['value'];
                         }
                         if ($updateDate < $sql[$id]['datetime']) {
                             $sql[$id]['datetime'] = $updateDate;
@@ -610,7 +735,7 @@ class Items implements \Selfoss\daos\ItemsInterface {
                     } else {
                         // create new status update
                         $sql[$id] = [
-                            'updates' => [$sk => $statusUpdate['sql']],
+                            'updates' => [$sk => $statusUpdate['value']],
                             'datetime' => $updateDate->format('Y-m-d H:i:s'),
                         ];
                     }
@@ -620,30 +745,101 @@ class Items implements \Selfoss\daos\ItemsInterface {
 
         if ($sql) {
             $this->database->beginTransaction();
-            foreach ($sql as $id => $q) {
-                $params = [
-                    ':id' => [$id, \PDO::PARAM_INT],
-                    ':statusUpdate' => [$q['datetime'], \PDO::PARAM_STR],
-                ];
-                $updated = $this->database->execute(
-                    'UPDATE ' . $this->configuration->dbPrefix . 'items
-                    SET ' . implode(', ', array_values($q['updates'])) . '
-                    WHERE id = :id AND updatetime < :statusUpdate',
-                    $params
-                );
-                if ($updated->rowCount() === 0) {
-                    // entry status was updated in between so updatetime must
-                    // be updated to ensure client side consistency of
-                    // statuses.
-                    $this->database->exec(
+            try {
+                foreach ($sql as $id => $q) {
+                    $params = [
+                        ':id' => [$id, \PDO::PARAM_INT],
+                        ':statusUpdate' => [$q['datetime'], \PDO::PARAM_STR],
+                    ];
+                    $updates = [];
+                    foreach ($q['updates'] as $sk => $value) {
+                        $this->adjustCounter(
+                            $sk . 'count',
+                            $value ? 1 : -1,
+                            'items.id = :id AND items.updatetime < :statusUpdate AND ' . ($value ? static::$stmt::isFalse('items.' . $sk) : static::$stmt::isTrue('items.' . $sk)),
+                            $params
+                        );
+                        $updates[] = $value ? static::$stmt::isTrue($sk) : static::$stmt::isFalse($sk);
+                    }
+                    $updated = $this->database->execute(
                         'UPDATE ' . $this->configuration->dbPrefix . 'items
-                         SET ' . static::$stmt::rowTouch('updatetime') . '
-                         WHERE id = :id',
-                        [':id' => [$id, \PDO::PARAM_INT]]
+                        SET ' . implode(', ', $updates) . '
+                        WHERE id = :id AND updatetime < :statusUpdate',
+                        $params
                     );
+                    if ($updated->rowCount() === 0) {
+                        // entry status was updated in between so updatetime must
+                        // be updated to ensure client side consistency of
+                        // statuses.
+                        $this->database->exec(
+                            'UPDATE ' . $this->configuration->dbPrefix . 'items
+                             SET ' . static::$stmt::rowTouch('updatetime') . '
+                             WHERE id = :id',
+                            [':id' => [$id, \PDO::PARAM_INT]]
+                        );
+                    }
                 }
+                $this->database->commit();
+            } catch (\Throwable $e) {
+                $this->database->rollBack();
+
+                throw $e;
             }
-            $this->database->commit();
         }
     }
+
+    /**
+     * recount the number of items, unread and starred items stored with each source
+     */
+    public function rebuildCounters(): void {
+        $sources = $this->configuration->dbPrefix . 'sources';
+        $items = $this->configuration->dbPrefix . 'items';
+        $this->database->exec('UPDATE ' . $sources . ' SET
+            itemcount = (SELECT COUNT(*) FROM ' . $items . ' AS items WHERE items.source = ' . $sources . '.id),
+            unreadcount = (SELECT COUNT(*) FROM ' . $items . ' AS items WHERE items.source = ' . $sources . '.id AND ' . static::$stmt::isTrue('items.unread') . '),
+            starredcount = (SELECT COUNT(*) FROM ' . $items . ' AS items WHERE items.source = ' . $sources . '.id AND ' . static::$stmt::isTrue('items.starred') . ')');
+    }
+
+    /**
+     * compare the counters stored with each source with the actual number of items
+     *
+     * @return array<array{source: int, counter: string, stored: int, actual: int}> counters that do not match
+     */
+    public function verifyCounters(): array {
+        $res = $this->database->exec('SELECT
+            sources.id, sources.itemcount, sources.unreadcount, sources.starredcount,
+            COUNT(items.id) AS items,
+            COALESCE(' . static::$stmt::sumBool('items.unread') . ', 0) AS unread,
+            COALESCE(' . static::$stmt::sumBool('items.starred') . ', 0) AS starred
+            FROM ' . $this->configuration->dbPrefix . 'sources AS sources
+            LEFT OUTER JOIN ' . $this->configuration->dbPrefix . 'items AS items
+                ON items.source = sources.id
+            GROUP BY sources.id, sources.itemcount, sources.unreadcount, sources.starredcount
+            ORDER BY sources.id');
+        $res = static::$stmt::ensureRowTypes($res, [
+            'id' => DatabaseInterface::PARAM_INT,
+            'itemcount' => DatabaseInterface::PARAM_INT,
+            'unreadcount' => DatabaseInterface::PARAM_INT,
+            'starredcount' => DatabaseInterface::PARAM_INT,
+            'items' => DatabaseInterface::PARAM_INT,
+            'unread' => DatabaseInterface::PARAM_INT,
+            'starred' => DatabaseInterface::PARAM_INT,
+        ]);
+
+        $mismatches = [];
+        foreach ($res as $row) {
+            foreach (['itemcount' => 'items', 'unreadcount' => 'unread', 'starredcount' => 'starred'] as $counter => $actual) {
+                if ($row[$counter] !== $row[$actual]) {
+                    $mismatches[] = [
+                        'source' => $row['id'],
+                        'counter' => $counter,
+                        'stored' => $row[$counter],
+                        'actual' => $row[$actual],
+                    ];
+                }
+            }
+        }
+
+        return $mismatches;
+    }
 }
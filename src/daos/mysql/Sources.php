@@ -10,6 +10,7 @@ use const JSON_ERROR_NONE;
 use function json_last_error;
 use function json_last_error_msg;
 use Selfoss\daos\DatabaseInterface;
+use Selfoss\helpers\CacheValidators;
 use Selfoss\helpers\Configuration;
 
 /**
@@ -20,6 +21,9 @@ use Selfoss\helpers\Configuration;
  * @author     Tobias Zeising <tobias.zeising@aditu.de>
  */
 class Sources implements \Selfoss\daos\SourcesInterface {
+    /** Number of sources inserted by a single statement, keeping the number of bound parameters within database limits */
+    private const INSERT_BATCH_SIZE = 100;
+
     /** @var class-string SQL helper */
     protected static string $stmt = Statements::class;
 
@@ -54,6 +58,39 @@ class Sources implements \Selfoss\daos\SourcesInterface {
         ]);
     }
 
+    /**
+     * add multiple new sources using as few statements as possible
+     *
+     * @param list<array{title: string, tags: string[], filter: ?string, spout: string, params: array<string, mixed>}> $sources
+     */
+    public function addAll(array $sources): void {
+        foreach (array_chunk($sources, self::INSERT_BATCH_SIZE) as $batch) {
+            $rows = [];
+            $params = [];
+            foreach ($batch as $i => $source) {
+                $encodedParams = @json_encode($source['params']);
+                if (json_last_error() !== JSON_ERROR_NONE) {
+                    throw new Exception(json_last_error_msg(), json_last_error());
+                }
+                assert($encodedParams !== false); // For PHPStan: Exception would be thrown when the function returns false.
+
+                $rows[] = "(:title{$i}, :tags{$i}, :filter{$i}, :spout{$i}, :params{$i})";
+                $params += [
+                    ":title{$i}" => trim($source['title']),
+                    ":tags{$i}" => static::$stmt::csvRow($source['tags']),
+                    ":filter{$i}" => $source['filter'],
+                    ":spout{$i}" => $source['spout'],
+                    ":params{$i}" => htmlentities($encodedParams),
+                ];
+            }
+
+            $this->database->exec(
+                'INSERT INTO ' . $this->configuration->dbPrefix . 'sources (title, tags, filter, spout, params) VALUES ' . implode(', ', $rows),
+                $params
+            );
+        }
+    }
+
     /**
      * edit source
      *
@@ -70,7 +107,7 @@ class Sources implements \Selfoss\daos\SourcesInterface {
         }
         assert($params !== false); // For PHPStan: Exception would be thrown when the function returns false.
 
-        $this->database->exec('UPDATE ' . $this->configuration->dbPrefix . 'sources SET title=:title, tags=:tags, filter=:filter, spout=:spout, params=:params WHERE id=:id', [
+        $this->database->exec('UPDATE ' . $this->configuration->dbPrefix . 'sources SET title=:title, tags=:tags, filter=:filter, spout=:spout, params=:params, etag=NULL, lastmodified=NULL WHERE id=:id', [
             ':title' => trim($title),
             ':tags' => static::$stmt::csvRow($tags),
             ':filter' => $filter,
@@ -139,6 +176,22 @@ class Sources implements \Selfoss\daos\SourcesInterface {
         }
     }
 
+    /**
+     * Remember validators of the fetched content for conditional requests.
+     *
+     * @param int $id the source id
+     */
+    public function saveCacheValidators(int $id, ?CacheValidators $validators): void {
+        $this->database->exec(
+            'UPDATE ' . $this->configuration->dbPrefix . 'sources SET etag=:etag, lastmodified=:lastmodified WHERE id=:id',
+            [
+                ':id' => $id,
+                ':etag' => $validators?->etag,
+                ':lastmodified' => $validators?->lastModified,
+            ]
+        );
+    }
+
     /**
      * Gets the number of sources.
      */
@@ -149,12 +202,12 @@ class Sources implements \Selfoss\daos\SourcesInterface {
     }
 
     /**
-     * returns all sources
+     * returns all sources, the ones that were never updated first
      *
-     * @return array<array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int}> all sources
+     * @return array<array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int, etag: ?string, lastmodified: ?string}> all sources
      */
     public function getByLastUpdate(): array {
-        $ret = $this->database->exec('SELECT id, title, tags, spout, params, filter, error, lastupdate, lastentry FROM ' . $this->configuration->dbPrefix . 'sources ORDER BY lastupdate ASC');
+        $ret = $this->database->exec('SELECT id, title, tags, spout, params, filter, error, lastupdate, lastentry, etag, lastmodified FROM ' . $this->configuration->dbPrefix . 'sources ORDER BY ' . static::$stmt::nullFirst('lastupdate', 'ASC'));
         $ret = static::$stmt::ensureRowTypes($ret, [
             'id' => DatabaseInterface::PARAM_INT,
             'lastupdate' => DatabaseInterface::PARAM_INT | DatabaseInterface::PARAM_NULL,
@@ -167,10 +220,10 @@ class Sources implements \Selfoss\daos\SourcesInterface {
     /**
      * Returns source with given id (or null if it doesnt exist).
      *
-     * @return ?array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int}
+     * @return ?array{id: int, title: string, tags: string, spout: string, params: string, filter: ?string, error: ?string, lastupdate: ?int, lastentry: ?int, etag: ?string, lastmodified: ?string}
      */
     public function get(int $id): ?array {
-        $ret = $this->database->exec('SELECT id, title, tags, spout, params, filter, error, lastupdate, lastentry FROM ' . $this->configuration->dbPrefix . 'sources WHERE id=:id', [':id' => $id]);
+        $ret = $this->database->exec('SELECT id, title, tags, spout, params, filter, error, lastupdate, lastentry, etag, lastmodified FROM ' . $this->configuration->dbPrefix . 'sources WHERE id=:id', [':id' => $id]);
         $ret = static::$stmt::ensureRowTypes($ret, [
             'id' => DatabaseInterface::PARAM_INT,
             'lastupdate' => DatabaseInterface::PARAM_INT | DatabaseInterface::PARAM_NULL,
@@ -208,11 +261,8 @@ class Sources implements \Selfoss\daos\SourcesInterface {
      */
     public function getWithUnread(): array {
         $ret = $this->database->exec('SELECT
-            sources.id, sources.title, COUNT(items.id) AS unread
+            sources.id, sources.title, sources.unreadcount AS unread
             FROM ' . $this->configuration->dbPrefix . 'sources AS sources
-            LEFT OUTER JOIN ' . $this->configuration->dbPrefix . 'items AS items
-                 ON (items.source=sources.id AND ' . static::$stmt::isTrue('items.unread') . ')
-            GROUP BY sources.id, sources.title
             ORDER BY lower(sources.title) ASC');
 
         return static::$stmt::ensureRowTypes($ret, [
@@ -223,4 +223,38 @@ class Statements implements \Selfoss\daos\StatementsInterface {
         // https://dev.mysql.com/doc/refman/5.7/en/regexp.html
         return $value . ' REGEXP ' . $regex;
     }
+
+    /**
+     * Match items against a full-text query using the index
+     * maintained when `search_index` option is enabled.
+     *
+     * @param string $query query created by `fullTextQuery`
+     *
+     * @return string expression for matching
+     */
+    public static function matchesFullText(string $query): string {
+        // https://mariadb.com/kb/en/match-against/
+        return 'MATCH (items.title, items.content) AGAINST (' . $query . ' IN BOOLEAN MODE)';
+    }
+
+    /**
+     * Build a full-text query matching items containing
+     * words starting with each of the given words.
+     *
+     * @param string[] $words words consisting only of letters, digits and underscores
+     *
+     * @return string query to bind to the parameter passed to `matchesFullText`
+     */
+    public static function fullTextQuery(array $words): string {
+        return implode(' ', array_map(fn(string $word): string => '+' . $word . '*', $words));
+    }
+
+    /**
+     * Clause locking the rows selected by a query until the end of the transaction.
+     *
+     * @return string clause to append to a SELECT statement
+     */
+    public static function forUpdate(): string {
+        return ' FOR UPDATE';
+    }
 }
@@ -83,11 +83,9 @@ class Tags implements \Selfoss\daos\TagsInterface {
      * @return array<array{tag: string, color: string, unread: int}>
      */
     public function getWithUnread(): array {
-        $select = 'SELECT tag, color, COUNT(items.id) AS unread
+        $select = 'SELECT tag, color, SUM(sources.unreadcount) AS unread
                    FROM ' . $this->configuration->dbPrefix . 'tags AS tags,
                         ' . $this->configuration->dbPrefix . 'sources AS sources
-                   LEFT OUTER JOIN ' . $this->configuration->dbPrefix . 'items AS items
-                       ON (items.source=sources.id AND ' . static::$stmt::isTrue('items.unread') . ')
                    WHERE ' . static::$stmt::csvRowMatches('sources.tags', 'tags.tag') . '
                    GROUP BY tags.tag, tags.color
                    ORDER BY LOWER(tags.tag);';
@@ -6,6 +6,7 @@ namespace Selfoss\daos\pgsql;
 
 use Monolog\Logger;
 use Selfoss\daos\CommonSqlDatabase;
+use Selfoss\helpers\Configuration;
 use Selfoss\helpers\DatabaseConnection;
 
 /**
@@ -26,6 +27,9 @@ use Selfoss\helpers\DatabaseConnection;
 final class Database implements \Selfoss\daos\DatabaseInterface {
     use CommonSqlDatabase;
 
+    /** Whether the full-text index exists, checked when first needed */
+    private ?bool $hasSearchIndex = null;
+
     /**
      * establish connection and create undefined tables
      *
@@ -33,7 +37,8 @@ final class Database implements \Selfoss\daos\DatabaseInterface {
      */
     public function __construct(
         private DatabaseConnection $connection,
-        private Logger $logger
+        private Logger $logger,
+        private Configuration $configuration
     ) {
         $this->logger->debug('Establishing PostgreSQL database connection');
 
@@ -273,6 +278,91 @@ final class Database implements \Selfoss\daos\DatabaseInterface {
             $this->exec('INSERT INTO version (version) VALUES (14)');
             $this->commit();
         }
+        if ($version < 15) {
+            $this->logger->debug('Upgrading database schema to version 15');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE sources ADD etag TEXT, ADD lastmodified TEXT');
+            $this->exec('INSERT INTO version (version) VALUES (15)');
+            $this->commit();
+        }
+        if ($version < 16) {
+            $this->logger->debug('Upgrading database schema to version 16');
+
+            $this->beginTransaction();
+            $this->exec('
+                CREATE TABLE imagequeue (
+                    id      SERIAL PRIMARY KEY,
+                    item    INTEGER NOT NULL,
+                    type    TEXT NOT NULL,
+                    url     TEXT NOT NULL
+                )
+            ');
+            $this->exec('INSERT INTO version (version) VALUES (16)');
+            $this->commit();
+        }
+        if ($version < 17) {
+            $this->logger->debug('Upgrading database schema to version 17');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE sources ADD itemcount INTEGER NOT NULL DEFAULT 0, ADD unreadcount INTEGER NOT NULL DEFAULT 0, ADD starredcount INTEGER NOT NULL DEFAULT 0');
+            $this->exec('
+                UPDATE sources SET
+                    itemcount = (SELECT COUNT(*) FROM items WHERE items.source = sources.id),
+                    unreadcount = (SELECT COUNT(*) FROM items WHERE items.source = sources.id AND items.unread = TRUE),
+                    starredcount = (SELECT COUNT(*) FROM items WHERE items.source = sources.id AND items.starred = TRUE)
+            ');
+            $this->exec('INSERT INTO version (version) VALUES (17)');
+            $this->commit();
+        }
+        if ($version < 18) {
+            $this->logger->debug('Upgrading database schema to version 18');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE imagequeue ADD claim TEXT, ADD claimed TIMESTAMP WITH TIME ZONE');
+            $this->exec('INSERT INTO version (version) VALUES (18)');
+            $this->commit();
+        }
+    }
+
+    /**
+     * Create or drop the full-text index according to `search_index` option
+     *
+     * The index is built over a generated column so that it is kept in sync by the database.
+     */
+    public function updateSearchIndex(): void {
+        $exists = $this->searchIndexExists();
+
+        if ($this->configuration->searchIndex && !$exists) {
+            $this->logger->debug('Creating full-text search index');
+
+            $this->beginTransaction();
+            $this->exec("ALTER TABLE items ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (to_tsvector('simple', title || ' ' || content)) STORED");
+            $this->exec('CREATE INDEX items_search_vector ON items USING GIN (search_vector)');
+            $this->commit();
+        } elseif (!$this->configuration->searchIndex && $exists) {
+            $this->logger->debug('Dropping full-text search index');
+
+            // Also drops the index.
+            $this->exec('ALTER TABLE items DROP COLUMN search_vector');
+        }
+
+        $this->hasSearchIndex = $this->configuration->searchIndex;
+    }
+
+    public function hasSearchIndex(): bool {
+        if ($this->hasSearchIndex === null) {
+            $this->hasSearchIndex = $this->searchIndexExists();
+            if ($this->configuration->searchIndex && !$this->hasSearchIndex) {
+                $this->logger->warning('Full-text search index is missing, create it by running `php cliupdate.php search-index`');
+            }
+        }
+
+        return $this->hasSearchIndex;
+    }
+
+    private function searchIndexExists(): bool {
+        return count($this->exec("SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = 'items' AND column_name = 'search_vector'")) > 0;
     }
 
     /**
@@ -0,0 +1,13 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\daos\pgsql;
+
+/**
+ * Class for accessing the queue of images waiting to be downloaded -- postgresql
+ */
+final class ImageQueue extends \Selfoss\daos\mysql\ImageQueue {
+    /** @var class-string SQL helper */
+    protected static string $stmt = Statements::class;
+}
@@ -131,4 +131,29 @@ final class Statements extends \Selfoss\daos\mysql\Statements {
         // https://www.postgresql.org/docs/12/functions-matching.html#FUNCTIONS-POSIX-REGEXP
         return $value . ' ~ ' . $regex;
     }
+
+    /**
+     * Match items against a full-text query using the index
+     * maintained when `search_index` option is enabled.
+     *
+     * @param string $query query created by `fullTextQuery`
+     *
+     * @return string expression for matching
+     */
+    public static function matchesFullText(string $query): string {
+        // https://www.postgresql.org/docs/12/textsearch-tables.html#TEXTSEARCH-TABLES-INDEX
+        return "items.search_vector @@ to_tsquery('simple', " . $query . ')';
+    }
+
+    /**
+     * Build a full-text query matching items containing
+     * words starting with each of the given words.
+     *
+     * @param string[] $words words consisting only of letters, digits and underscores
+     *
+     * @return string query to bind to the parameter passed to `matchesFullText`
+     */
+    public static function fullTextQuery(array $words): string {
+        return implode(' & ', array_map(fn(string $word): string => $word . ':*', $words));
+    }
 }
@@ -6,6 +6,7 @@ namespace Selfoss\daos\sqlite;
 
 use Monolog\Logger;
 use Selfoss\daos\CommonSqlDatabase;
+use Selfoss\helpers\Configuration;
 use Selfoss\helpers\DatabaseConnection;
 
 /**
@@ -19,6 +20,9 @@ use Selfoss\helpers\DatabaseConnection;
 final class Database implements \Selfoss\daos\DatabaseInterface {
     use CommonSqlDatabase;
 
+    /** Whether the full-text index exists, checked when first needed */
+    private ?bool $hasSearchIndex = null;
+
     /**
      * establish connection and create undefined tables
      *
@@ -26,7 +30,8 @@ final class Database implements \Selfoss\daos\DatabaseInterface {
      */
     public function __construct(
         private DatabaseConnection $connection,
-        private Logger $logger
+        private Logger $logger,
+        private Configuration $configuration
     ) {
         $this->logger->debug('Establishing SQLite database connection');
 
@@ -291,6 +296,115 @@ final class Database implements \Selfoss\daos\DatabaseInterface {
             $this->exec('INSERT INTO version (version) VALUES (14)');
             $this->commit();
         }
+        if ($version < 15) {
+            $this->logger->debug('Upgrading database schema to version 15');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE sources ADD etag TEXT');
+            $this->exec('ALTER TABLE sources ADD lastmodified TEXT');
+            $this->exec('INSERT INTO version (version) VALUES (15)');
+            $this->commit();
+        }
+        if ($version < 16) {
+            $this->logger->debug('Upgrading database schema to version 16');
+
+            $this->beginTransaction();
+            $this->exec('
+                CREATE TABLE imagequeue (
+                    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+                    item    INT NOT NULL,
+                    type    TEXT NOT NULL,
+                    url     TEXT NOT NULL
+                )
+            ');
+            $this->exec('INSERT INTO version (version) VALUES (16)');
+            $this->commit();
+        }
+        if ($version < 17) {
+            $this->logger->debug('Upgrading database schema to version 17');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE sources ADD itemcount INT NOT NULL DEFAULT 0');
+            $this->exec('ALTER TABLE sources ADD unreadcount INT NOT NULL DEFAULT 0');
+            $this->exec('ALTER TABLE sources ADD starredcount INT NOT NULL DEFAULT 0');
+            $this->exec('
+                UPDATE sources SET
+                    itemcount = (SELECT COUNT(*) FROM items WHERE items.source = sources.id),
+                    unreadcount = (SELECT COUNT(*) FROM items WHERE items.source = sources.id AND items.unread = 1),
+                    starredcount = (SELECT COUNT(*) FROM items WHERE items.source = sources.id AND items.starred = 1)
+            ');
+            $this->exec('INSERT INTO version (version) VALUES (17)');
+            $this->commit();
+        }
+        if ($version < 18) {
+            $this->logger->debug('Upgrading database schema to version 18');
+
+            $this->beginTransaction();
+            $this->exec('ALTER TABLE imagequeue ADD claim TEXT');
+            $this->exec('ALTER TABLE imagequeue ADD claimed DATETIME');
+            $this->exec('INSERT INTO version (version) VALUES (18)');
+            $this->commit();
+        }
+    }
+
+    /**
+     * Create or drop the full-text index according to `search_index` option
+     *
+     * The index is an external content FTS5 table kept in sync by triggers.
+     */
+    public function updateSearchIndex(): void {
+        $exists = $this->searchIndexExists();
+
+        if ($this->configuration->searchIndex && !$exists) {
+            $this->logger->debug('Creating full-text search index');
+
+            $this->beginTransaction();
+            $this->exec("CREATE VIRTUAL TABLE items_fts USING fts5(title, content, content='items', content_rowid='id')");
+            $this->exec('
+                CREATE TRIGGER items_fts_insert AFTER INSERT ON items BEGIN
+                    INSERT INTO items_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+                END
+            ');
+            $this->exec("
+                CREATE TRIGGER items_fts_delete AFTER DELETE ON items BEGIN
+                    INSERT INTO items_fts (items_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                END
+            ");
+            $this->exec("
+                CREATE TRIGGER items_fts_update AFTER UPDATE OF title, content ON items BEGIN
+                    INSERT INTO items_fts (items_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                    INSERT INTO items_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+                END
+            ");
+            $this->exec("INSERT INTO items_fts (items_fts) VALUES ('rebuild')");
+            $this->commit();
+        } elseif (!$this->configuration->searchIndex && $exists) {
+            $this->logger->debug('Dropping full-text search index');
+
+            $this->beginTransaction();
+            $this->exec('DROP TRIGGER items_fts_insert');
+            $this->exec('DROP TRIGGER items_fts_delete');
+            $this->exec('DROP TRIGGER items_fts_update');
+            $this->exec('DROP TABLE items_fts');
+            $this->commit();
+        }
+
+        $this->hasSearchIndex = $this->configuration->searchIndex;
+    }
+
+    public function hasSearchIndex(): bool {
+        if ($this->hasSearchIndex === null) {
+            $this->hasSearchIndex = $this->searchIndexExists();
+            if ($this->configuration->searchIndex && !$this->hasSearchIndex) {
+                $this->logger->warning('Full-text search index is missing, create it by running `php cliupdate.php search-index`');
+            }
+        }
+
+        return $this->hasSearchIndex;
+    }
+
+    private function searchIndexExists(): bool {
+        return count($this->exec('SELECT name FROM sqlite_master WHERE type = \'table\' AND name = \'items_fts\'')) > 0;
     }
 
     /**
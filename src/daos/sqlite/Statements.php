@@ -74,4 +74,39 @@ final class Statements extends \Selfoss\daos\mysql\Statements {
         // https://www.sqlite.org/lang_expr.html#the_like_glob_regexp_and_match_operators
         return $value . ' REGEXP ' . $regex;
     }
+
+    /**
+     * Match items against a full-text query using the index
+     * maintained when `search_index` option is enabled.
+     *
+     * @param string $query query created by `fullTextQuery`
+     *
+     * @return string expression for matching
+     */
+    public static function matchesFullText(string $query): string {
+        // https://www.sqlite.org/fts5.html#full_text_query_syntax
+        return 'items.id IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ' . $query . ')';
+    }
+
+    /**
+     * Build a full-text query matching items containing
+     * words starting with each of the given words.
+     *
+     * @param string[] $words words consisting only of letters, digits and underscores
+     *
+     * @return string query to bind to the parameter passed to `matchesFullText`
+     */
+    public static function fullTextQuery(array $words): string {
+        return implode(' ', array_map(fn(string $word): string => '"' . $word . '"*', $words));
+    }
+
+    /**
+     * Clause locking the rows selected by a query until the end of the transaction.
+     *
+     * @return string clause to append to a SELECT statement
+     */
+    public static function forUpdate(): string {
+        // SQLite does not support row locks, writes to the database are serialized.
+        return '';
+    }
 }
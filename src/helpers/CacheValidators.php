@@ -0,0 +1,54 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\helpers;
+
+use Psr\Http\Message\RequestInterface;
+use Psr\Http\Message\ResponseInterface;
+
+/**
+ * Values of `ETag` and `Last-Modified` headers of a fetched resource,
+ * allowing to ask the server to only send it again when it changed.
+ *
+ * @see https://www.rfc-editor.org/rfc/rfc9110#section-13.1
+ */
+final readonly class CacheValidators {
+    public function __construct(
+        public ?string $etag,
+        public ?string $lastModified
+    ) {
+    }
+
+    /**
+     * Extract validators from the response, returns null when there are none.
+     */
+    public static function fromResponse(ResponseInterface $response): ?self {
+        $etag = $response->getHeaderLine('ETag');
+        $lastModified = $response->getHeaderLine('Last-Modified');
+
+        if ($etag === '' && $lastModified === '') {
+            return null;
+        }
+
+        return new self(
+            $etag !== '' ? $etag : null,
+            $lastModified !== '' ? $lastModified : null
+        );
+    }
+
+    /**
+     * Make the request conditional on the resource having changed since these validators were obtained.
+     */
+    public function applyTo(RequestInterface $request): RequestInterface {
+        if ($this->etag !== null) {
+            $request = $request->withHeader('If-None-Match', $this->etag);
+        }
+
+        if ($this->lastModified !== null) {
+            $request = $request->withHeader('If-Modified-Since', $this->lastModified);
+        }
+
+        return $request;
+    }
+}
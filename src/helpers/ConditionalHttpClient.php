@@ -0,0 +1,88 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\helpers;
+
+use Override;
+use Psr\Http\Client\ClientInterface;
+use Psr\Http\Message\RequestInterface;
+use Psr\Http\Message\ResponseInterface;
+
+/**
+ * HTTP client wrapper making the request for a feed conditional
+ * and keeping track of the validators the server responded with.
+ *
+ * Other requests (e.g. for feed autodiscovery) are passed through unchanged.
+ * When the feed was already downloaded by `FeedPrefetcher`, that response is used instead.
+ */
+final class ConditionalHttpClient implements ClientInterface {
+    /** URL of the feed being fetched */
+    private ?string $url = null;
+
+    /** Validators to send with the request for the feed */
+    private ?CacheValidators $validators = null;
+
+    /** Validators received with the feed */
+    private ?CacheValidators $responseValidators = null;
+
+    /** Whether the server responded that the feed has not changed */
+    private bool $notModified = false;
+
+    /** Whether any other URL was fetched, meaning the requested URL is not the feed itself */
+    private bool $otherRequests = false;
+
+    public function __construct(
+        private readonly ClientInterface $client,
+        private readonly FeedPrefetcher $prefetcher
+    ) {
+    }
+
+    /**
+     * Prepare for fetching the feed at given URL.
+     *
+     * @param ?CacheValidators $validators validators of the previously fetched version of the feed
+     */
+    public function expect(string $url, ?CacheValidators $validators): void {
+        $this->url = $url;
+        $this->validators = $validators;
+        $this->responseValidators = null;
+        $this->notModified = false;
+        $this->otherRequests = false;
+    }
+
+    #[Override]
+    public function sendRequest(RequestInterface $request): ResponseInterface {
+        if ((string) $request->getUri() !== $this->url) {
+            $this->otherRequests = true;
+
+            return $this->client->sendRequest($request);
+        }
+
+        if ($this->validators !== null) {
+            $request = $this->validators->applyTo($request);
+        }
+
+        $response = $this->prefetcher->take($this->url) ?? $this->client->sendRequest($request);
+
+        if ($response->getStatusCode() === 304) {
+            $this->notModified = true;
+        } else {
+            $this->responseValidators = CacheValidators::fromResponse($response);
+        }
+
+        return $response;
+    }
+
+    public function isNotModified(): bool {
+        return $this->notModified;
+    }
+
+    /**
+     * Validators of the fetched feed, null when there were none
+     * or the feed had to be discovered from a different URL.
+     */
+    public function getResponseValidators(): ?CacheValidators {
+        return $this->otherRequests ? null : $this->responseValidators;
+    }
+}
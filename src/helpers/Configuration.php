@@ -19,6 +19,7 @@ final class Configuration {
     public const INTERPOLATED_PROPERTIES = [
         'dbFile',
         'loggerDestination',
+        'metricsDestination',
         'cache',
         'ftrssCustomDataDir',
     ];
@@ -64,10 +65,24 @@ final class Configuration {
 
     public LoggerLevel $loggerLevel = LoggerLevel::Error;
 
+    public ?string $metricsDestination = null;
+
+    public bool $metricsQueries = false;
+
+    public bool $searchIndex = false;
+
     public int $itemsPerpage = 50;
 
     public int $itemsLifetime = 30;
 
+    public int $updateConcurrency = 6;
+
+    public int $updateConcurrencyPerHost = 2;
+
+    public bool $imageQueue = false;
+
+    public int $cleanupTimeBudget = 0;
+
     public string $baseUrl = '';
 
     public string $username = '';
@@ -7,6 +7,7 @@ namespace Selfoss\helpers;
 use Monolog\Logger;
 use Selfoss\daos;
 use Selfoss\helpers\Filters\AcceptingFilter;
+use Selfoss\helpers\Filters\FilterEvaluationError;
 use Selfoss\helpers\Filters\FilterFactory;
 use Selfoss\helpers\Filters\FilterSyntaxError;
 
@@ -21,13 +22,28 @@ final readonly class ContentLoader {
     public const ICON_FORMAT = Image::FORMAT_PNG;
     public const THUMBNAIL_FORMAT = Image::FORMAT_JPEG;
 
+    /** Number of seconds that need to pass before a source can be updated again */
+    private const MINIMUM_UPDATE_INTERVAL = 20;
+
+    /** Number of batches of concurrent requests worth of feeds to prefetch at once */
+    private const PREFETCH_BATCH_FACTOR = 10;
+
+    /** Number of image queue entries processed at once */
+    private const IMAGE_QUEUE_BATCH_SIZE = 200;
+
+    /** Number of times storing the changes of a source is attempted when it runs into a deadlock */
+    private const STORE_ATTEMPTS = 3;
+
     public function __construct(
         private Configuration $configuration,
         private daos\DatabaseInterface $database,
+        private FeedPrefetcher $feedPrefetcher,
         private IconStore $iconStore,
         private Image $imageHelper,
+        private daos\ImageQueue $imageQueue,
         private daos\Items $itemsDao,
         private Logger $logger,
+        private RequestMetrics $metrics,
         private daos\Sources $sourcesDao,
         private SpoutLoader $spoutLoader,
         private ThumbnailStore $thumbnailStore,
@@ -43,14 +59,60 @@ final readonly class ContentLoader {
         $updateVisitor->started($count);
 
         $sources = $this->sourcesDao->getByLastUpdate();
-        foreach ($sources as $source) {
-            $this->fetch($source);
-            $updateVisitor->sourceUpdated();
+        // Feeds are downloaded concurrently in batches, keeping only a limited number of them in memory.
+        $batchSize = max(1, $this->configuration->updateConcurrency) * self::PREFETCH_BATCH_FACTOR;
+        foreach (array_chunk($sources, $batchSize) as $batch) {
+            $this->prefetch($batch);
+            foreach ($batch as $source) {
+                $this->fetch($source);
+                $updateVisitor->sourceUpdated();
+            }
+            $this->feedPrefetcher->clear();
         }
         $this->cleanup();
         $updateVisitor->finished();
     }
 
+    /**
+     * Download feeds of given sources concurrently so that fetching them does not need to wait for network.
+     *
+     * Only feed spouts are supported, other spouts will fetch their content when updated.
+     *
+     * @param array<array{id: int, spout: string, params: string, lastupdate: ?int, etag: ?string, lastmodified: ?string}> $sources
+     */
+    private function prefetch(array $sources): void {
+        if (!$this->feedPrefetcher->isEnabled()) {
+            return;
+        }
+
+        $feeds = [];
+        foreach ($sources as $source) {
+            // Will be skipped by fetch.
+            if (time() - $source['lastupdate'] < self::MINIMUM_UPDATE_INTERVAL) {
+                continue;
+            }
+
+            $spout = $this->spoutLoader->get($source['spout']);
+            if (!$spout instanceof \spouts\rss\feed) {
+                continue;
+            }
+
+            // Needs to match the url the spout will look up the response under.
+            $url = $spout->getFetchUrl(json_decode(html_entity_decode($source['params']), true));
+            if ($url === null) {
+                continue;
+            }
+
+            $feeds[$url] = $source['etag'] !== null || $source['lastmodified'] !== null
+                ? new CacheValidators($source['etag'], $source['lastmodified'])
+                : null;
+        }
+
+        if (count($feeds) > 0) {
+            $this->feedPrefetcher->prefetch($feeds);
+        }
+    }
+
     /**
      * updates single source
      *
@@ -68,6 +130,52 @@ final readonly class ContentLoader {
         }
     }
 
+    /**
+     * Download and store thumbnails and icons queued by source updates.
+     *
+     * Images are downloaded concurrently and each URL is only processed once,
+     * even when it is shared by items of multiple sources.
+     */
+    public function processImageQueue(): void {
+        /** @var array<daos\ImageQueueInterface::THUMBNAIL|daos\ImageQueueInterface::ICON, array<string, string>> paths of already processed images */
+        $processed = [
+            daos\ImageQueueInterface::THUMBNAIL => [],
+            daos\ImageQueueInterface::ICON => [],
+        ];
+
+        while (count($entries = $this->imageQueue->claim(self::IMAGE_QUEUE_BATCH_SIZE)) > 0) {
+            /** @var array<daos\ImageQueueInterface::THUMBNAIL|daos\ImageQueueInterface::ICON, array<string, non-empty-list<int>>> ids of queue entries for each image */
+            $images = [];
+            foreach ($entries as $entry) {
+                $images[$entry['type']][$entry['url']][] = $entry['id'];
+            }
+
+            $downloads = [];
+            foreach ($images as $type => $urls) {
+                foreach (array_keys($urls) as $url) {
+                    if (!isset($processed[$type][$url])) {
+                        $downloads[$url] = null;
+                    }
+                }
+            }
+            $this->logger->debug('processing ' . count($entries) . ' queued images, downloading ' . count($downloads));
+            $this->feedPrefetcher->prefetch($downloads);
+
+            foreach ($images as $type => $urls) {
+                foreach ($urls as $url => $ids) {
+                    $processed[$type][$url] ??= (
+                        $type === daos\ImageQueueInterface::THUMBNAIL
+                            ? $this->fetchThumbnail($url)
+                            : $this->fetchIcon($url)
+                    ) ?: '';
+                    $this->imageQueue->complete($ids, $type, $processed[$type][$url]);
+                }
+            }
+
+            $this->feedPrefetcher->clear();
+        }
+    }
+
     /**
      * updates a given source
      * returns an error or true on success
@@ -79,7 +187,7 @@ final readonly class ContentLoader {
 
         // at least 20 seconds wait until next update of a given source
         $this->updateSource($source, null);
-        if (time() - $source['lastupdate'] < 20) {
+        if (time() - $source['lastupdate'] < self::MINIMUM_UPDATE_INTERVAL) {
             $this->logger->debug('Source ' . $source['title'] . ' updated less then 20 seconds ago, skipping.');
 
             return;
@@ -105,6 +213,12 @@ final readonly class ContentLoader {
         // receive content
         $this->logger->debug('fetch content');
         try {
+            $fetchStart = hrtime(true);
+            $spout->setCacheValidators(
+                $source['etag'] !== null || $source['lastmodified'] !== null
+                    ? new CacheValidators($source['etag'], $source['lastmodified'])
+                    : null
+            );
             $spout->load(
                 json_decode(html_entity_decode($source['params']), true)
             );
@@ -125,6 +239,7 @@ final readonly class ContentLoader {
             if (!is_array($items)) {
                 $items = iterator_to_array($items);
             }
+            $this->metrics->recordFetch((int) $source['id'], (hrtime(true) - $fetchStart) / 1e9);
 
             $itemsInFeed = [];
             foreach ($items as $item) {
@@ -135,6 +250,10 @@ final readonly class ContentLoader {
             $iconCache = [];
             $sourceIconUrl = null;
             $itemsSeen = [];
+            /** @var array<string, array{title: HtmlString, content: HtmlString, source: int, datetime: \DateTimeImmutable, uid: string, link: string, author: ?string, thumbnail: ?string, icon: ?string}> */
+            $newItems = [];
+            /** @var list<array{uid: string, type: daos\ImageQueueInterface::THUMBNAIL|daos\ImageQueueInterface::ICON, url: string}> */
+            $queuedImages = [];
 
             $filterExpression = trim($source['filter'] ?? '');
             try {
@@ -153,6 +272,11 @@ final readonly class ContentLoader {
                     continue;
                 }
 
+                if (isset($newItems[$item->getId()])) {
+                    $this->logger->debug('item "' . $titlePlainText . '" appears in the feed multiple times.');
+                    continue;
+                }
+
                 // test date: continue with next if item too old
                 $itemDate = $item->getDate();
                 if ($itemDate === null) {
@@ -186,9 +310,14 @@ final readonly class ContentLoader {
                 // sanitize title
                 $title = HtmlString::fromRaw(trim($this->sanitizeField($item->getTitle())->getRaw()));
 
-                // Check sanitized title against filter
-                if (!$filter->admits($item->withTitle($title)->withContent($content))) {
-                    continue;
+                // Check sanitized title against filter, sources without filter do not need the modified item
+                try {
+                    if (!$filter instanceof AcceptingFilter && !$filter->admits($item->withTitle($title)->withContent($content))) {
+                        continue;
+                    }
+                } catch (FilterEvaluationError $e) {
+                    // Better show an item that should have been hidden than silently lose it.
+                    $this->logger->error('filter error for "' . $titlePlainText . '": ' . $e->getMessage());
                 }
 
                 $this->logger->debug('item content sanitized');
@@ -207,15 +336,35 @@ final readonly class ContentLoader {
 
                 $thumbnailUrl = $item->getThumbnail();
                 if ($thumbnailUrl !== null) {
-                    // save thumbnail
-                    $newItem['thumbnail'] = $this->fetchThumbnail($thumbnailUrl) ?: '';
+                    if ($this->configuration->imageQueue) {
+                        // thumbnail will be downloaded by the image queue worker
+                        $queuedImages[] = ['uid' => $item->getId(), 'type' => daos\ImageQueueInterface::THUMBNAIL, 'url' => $thumbnailUrl];
+                    } else {
+                        // save thumbnail
+                        $newItem['thumbnail'] = $this->fetchThumbnail($thumbnailUrl) ?: '';
+                    }
                 }
 
                 try {
                     // Clear the value in case we need it in catch clause.
                     $iconUrl = null;
                     $iconUrl = $item->getIcon();
-                    if ($iconUrl !== null) {
+                    if ($this->configuration->imageQueue) {
+                        // with the queue, source icon is kept as an URL
+                        if ($iconUrl === null && $sourceIconUrl === null) {
+                            // we do not want to run this more than once
+                            $sourceIconUrl = '';
+                            $sourceIconUrl = $spout->getIcon() ?: '';
+                        }
+                        $iconUrl ??= $sourceIconUrl;
+
+                        if (strlen(trim($iconUrl)) > 0) {
+                            // icon will be downloaded by the image queue worker
+                            $queuedImages[] = ['uid' => $item->getId(), 'type' => daos\ImageQueueInterface::ICON, 'url' => $iconUrl];
+                        } else {
+                            $this->logger->debug('no icon for this item or source');
+                        }
+                    } elseif ($iconUrl !== null) {
                         if (isset($iconCache[$iconUrl])) {
                             $this->logger->debug('reusing recently used icon: ' . $iconUrl);
                         } else {
@@ -252,15 +401,24 @@ final readonly class ContentLoader {
                     $this->logger->error('icon: error', ['exception' => $e]);
                 }
 
-                // insert new item
-                $this->itemsDao->add($newItem);
-                $this->logger->debug('item inserted');
+                // items will be inserted all at once
+                $newItems[$item->getId()] = $newItem;
 
                 $this->logger->debug('Memory usage: ' . memory_get_usage());
                 $this->logger->debug('Memory peak usage: ' . memory_get_peak_usage());
 
                 $lastEntry = max($lastEntry, $itemDate->getTimestamp());
             }
+        } catch (NotModifiedException $e) {
+            $this->metrics->recordFetch((int) $source['id'], (hrtime(true) - $fetchStart) / 1e9);
+            $this->logger->debug('source has not changed since the last update');
+            $spout->destroy();
+            $this->updateSource($source, null);
+
+            // items from the last update are still in the feed
+            $this->itemsDao->updateLastSeenOfSource($source['id']);
+
+            return;
         } catch (\Throwable $e) {
             $this->logger->error('error loading feed content for ' . $source['title'], ['exception' => $e]);
             $this->sourcesDao->error($source['id'], date('Y-m-d H:i:s') . 'error loading feed content: ' . $e->getMessage());
@@ -268,17 +426,87 @@ final readonly class ContentLoader {
             return;
         }
 
+        $validators = $spout->getCacheValidators();
+
         // destroy feed object (prevent memory issues)
         $this->logger->debug('destroy spout object');
         $spout->destroy();
 
-        // remove previous errors and set last update timestamp
-        $this->updateSource($source, $lastEntry);
+        // store all changes to the source in a single transaction
+        for ($attempt = 1; ; ++$attempt) {
+            $this->database->beginTransaction();
+            try {
+                $this->storeChanges($source, array_values($newItems), $itemsSeen, $queuedImages, $validators, $lastEntry);
+                $this->database->commit();
+
+                break;
+            } catch (\Throwable $e) {
+                $this->database->rollBack();
+                if (self::isDeadlock($e) && $attempt < self::STORE_ATTEMPTS) {
+                    $this->logger->debug('deadlock storing items of ' . $source['title'] . ', retrying');
+
+                    continue;
+                }
+                $this->logger->error('error storing items of ' . $source['title'], ['exception' => $e]);
+                $this->sourcesDao->error($source['id'], date('Y-m-d H:i:s') . 'error storing items: ' . $e->getMessage());
+
+                break;
+            }
+        }
+    }
 
+    /**
+     * Store the items of an updated source and the state of the source.
+     *
+     * Items are changed before the source so that locks are taken in the same order
+     * as when marking items, which changes the counters of their sources last.
+     *
+     * @param list<array{datetime: \DateTimeInterface, title: HtmlString, content: HtmlString, thumbnail: ?string, icon: ?string, source: int, uid: string, link: string, author: ?string}> $newItems
+     * @param int[] $itemsSeen ids of already stored items present in the feed
+     * @param list<array{uid: string, type: daos\ImageQueueInterface::THUMBNAIL|daos\ImageQueueInterface::ICON, url: string}> $queuedImages
+     */
+    private function storeChanges(mixed $source, array $newItems, array $itemsSeen, array $queuedImages, ?CacheValidators $validators, ?int $lastEntry): void {
         // mark items seen in the feed to prevent premature garbage removal
         if (count($itemsSeen) > 0) {
             $this->itemsDao->updateLastSeen($itemsSeen);
         }
+
+        if (count($newItems) > 0) {
+            $this->itemsDao->addAll($newItems);
+            $this->logger->debug(count($newItems) . ' items inserted');
+
+            // mark new items seen together with the others so that all items in the feed share the time
+            // (the new rows are not visible to other transactions so this cannot wait for their locks)
+            $newIds = $this->itemsDao->findAll(
+                array_map(fn(array $item): string => $item['uid'], $newItems),
+                $source['id']
+            );
+            $this->itemsDao->updateLastSeen(array_values($newIds));
+
+            if (count($queuedImages) > 0) {
+                $this->imageQueue->enqueue(array_map(
+                    fn(array $image): array => ['item' => $newIds[$image['uid']], 'type' => $image['type'], 'url' => $image['url']],
+                    $queuedImages
+                ));
+                $this->logger->debug(count($queuedImages) . ' images queued');
+            }
+        }
+
+        // remember validators so that unchanged feed need not be downloaded again
+        if ($validators?->etag !== $source['etag'] || $validators?->lastModified !== $source['lastmodified']) {
+            $this->sourcesDao->saveCacheValidators($source['id'], $validators);
+        }
+
+        // remove previous errors and set last update timestamp
+        $this->updateSource($source, $lastEntry);
+    }
+
+    /**
+     * Check whether the transaction failed because it was chosen as a deadlock victim.
+     */
+    private static function isDeadlock(\Throwable $e): bool {
+        // serialization failure (MySQL deadlock) and PostgreSQL deadlock detected
+        return $e instanceof \PDOException && in_array($e->getCode(), ['40001', '40P01'], true);
     }
 
     /**
@@ -329,7 +557,7 @@ final readonly class ContentLoader {
      */
     private function fetchThumbnail(string $url): ?string {
         try {
-            $data = $this->webClient->request($url);
+            $data = $this->download($url);
             $format = self::THUMBNAIL_FORMAT;
             $image = $this->imageHelper->loadImage($data, $format, 500, 500);
 
@@ -356,7 +584,7 @@ final readonly class ContentLoader {
      */
     private function fetchIcon(string $url): ?string {
         try {
-            $data = $this->webClient->request($url);
+            $data = $this->download($url);
             $format = Image::FORMAT_PNG;
             $image = $this->imageHelper->loadImage($data, $format, 30, null);
 
@@ -374,6 +602,25 @@ final readonly class ContentLoader {
         return null;
     }
 
+    /**
+     * Retrieve content from URL, using the prefetched response when available.
+     *
+     * @throws \Throwable When the download fails
+     */
+    private function download(string $url): string {
+        $response = $this->feedPrefetcher->take($url);
+        if ($response === null) {
+            return $this->webClient->request($url);
+        }
+
+        $data = (string) $response->getBody();
+        if ($response->getStatusCode() !== 200) {
+            throw new \Exception(substr($data, 0, 512));
+        }
+
+        return $data;
+    }
+
     /**
      * Obtain title for given data
      *
@@ -423,20 +670,31 @@ final readonly class ContentLoader {
         $this->itemsDao->cleanup($minDate);
         $this->logger->debug('cleanup orphaned and old items finished');
 
-        // delete orphaned thumbnails
-        $this->logger->debug('delete orphaned thumbnails');
-        $this->thumbnailStore->cleanup(
-            fn(string $file): bool => $this->itemsDao->hasThumbnail($file)
-        );
-        $this->logger->debug('delete orphaned thumbnails finished');
+        // delete queued images of removed items
+        $this->imageQueue->cleanup();
+
+        // Files not visited before the deadline will be checked by the next cleanup.
+        $deadline = $this->configuration->cleanupTimeBudget > 0 ? microtime(true) + $this->configuration->cleanupTimeBudget : null;
 
         // delete orphaned icons
+        // (before thumbnails, which are much more numerous and could use up all the time)
         $this->logger->debug('delete orphaned icons');
+        $icons = array_flip($this->itemsDao->getIcons());
         $this->iconStore->cleanup(
-            fn(string $file): bool => $this->itemsDao->hasIcon($file)
+            fn(string $file): bool => isset($icons[$file]),
+            $deadline
         );
         $this->logger->debug('delete orphaned icons finished');
 
+        // delete orphaned thumbnails
+        $this->logger->debug('delete orphaned thumbnails');
+        $thumbnails = array_flip($this->itemsDao->getThumbnails());
+        $this->thumbnailStore->cleanup(
+            fn(string $file): bool => isset($thumbnails[$file]),
+            $deadline
+        );
+        $this->logger->debug('delete orphaned thumbnails finished');
+
         // optimize database
         $this->logger->debug('optimize database');
         $this->database->optimize();
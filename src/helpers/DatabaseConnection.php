@@ -27,6 +27,7 @@ final class DatabaseConnection {
      */
     public function __construct(
         private readonly Logger $logger,
+        private readonly RequestMetrics $metrics,
         string $dsn,
         ?string $user = null,
         ?string $password = null,
@@ -98,6 +99,18 @@ final class DatabaseConnection {
      * @param array<string, mixed> $args
      */
     public function execute(string $cmd, array $args = []): \PDOStatement {
+        $start = hrtime(true);
+        try {
+            return $this->executeStatement($cmd, $args);
+        } finally {
+            $this->metrics->recordQuery((hrtime(true) - $start) / 1e9, $cmd, $args);
+        }
+    }
+
+    /**
+     * @param array<string, mixed> $args
+     */
+    private function executeStatement(string $cmd, array $args): \PDOStatement {
         try {
             $query = $this->pdo->prepare($cmd);
         } catch (PDOException $e) {
@@ -0,0 +1,133 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\helpers;
+
+use GuzzleHttp\Promise\PromiseInterface;
+use GuzzleHttp\Psr7\HttpFactory;
+use Monolog\Logger;
+use Psr\Http\Message\ResponseInterface;
+
+/**
+ * Downloads multiple feeds at once ahead of their sources being updated,
+ * limiting the number of concurrent requests in total and to a single host.
+ *
+ * The responses are then handed out to `FeedReader` instead of fetching the feeds again,
+ * so the parsing and storing of items stays sequential.
+ * The image queue worker uses it the same way for downloading thumbnails and icons.
+ */
+final class FeedPrefetcher {
+    /** @var array<string, ResponseInterface|\Throwable> Responses or errors for prefetched URLs */
+    private array $responses = [];
+
+    public function __construct(
+        private readonly Configuration $configuration,
+        private readonly HttpFactory $httpFactory,
+        private readonly Logger $logger,
+        private readonly WebClient $webClient
+    ) {
+    }
+
+    /**
+     * Whether the update should prefetch feeds at all.
+     */
+    public function isEnabled(): bool {
+        return $this->configuration->updateConcurrency > 1;
+    }
+
+    /**
+     * Download the given feeds concurrently, waiting until all of them finish.
+     *
+     * @param array<string, ?CacheValidators> $feeds URLs of feeds with validators to make the requests conditional
+     */
+    public function prefetch(array $feeds): void {
+        $concurrency = max(1, $this->configuration->updateConcurrency);
+        $concurrencyPerHost = max(1, $this->configuration->updateConcurrencyPerHost);
+        $client = $this->webClient->getHttpClient();
+
+        /** @var array<string, list<string>> URLs waiting to be fetched, grouped by host */
+        $queues = [];
+        foreach (array_keys($feeds) as $url) {
+            $queues[(string) parse_url($url, PHP_URL_HOST)][] = $url;
+        }
+
+        $this->logger->debug('prefetching ' . count($feeds) . ' feeds from ' . count($queues) . ' hosts');
+
+        /** @var array<string, int> number of requests in progress for each host */
+        $active = [];
+        $running = 0;
+        /** @var PromiseInterface[] */
+        $promises = [];
+
+        // Starts as many requests as the limits allow, called again whenever a request finishes.
+        $startRequests = function() use (&$startRequests, &$queues, &$active, &$running, &$promises, $feeds, $client, $concurrency, $concurrencyPerHost): void {
+            foreach ($queues as $host => $urls) {
+                while ($running < $concurrency && ($active[$host] ?? 0) < $concurrencyPerHost && count($queues[$host]) > 0) {
+                    $url = array_shift($queues[$host]);
+                    $request = $this->httpFactory->createRequest('GET', $url);
+                    if ($feeds[$url] !== null) {
+                        $request = $feeds[$url]->applyTo($request);
+                    }
+
+                    ++$running;
+                    $active[$host] = ($active[$host] ?? 0) + 1;
+
+                    // Error responses are handed over like with `sendRequest` so that SimplePie reports them the same way.
+                    $promises[] = $client->sendAsync($request, ['http_errors' => false])->then(
+                        function(ResponseInterface $response) use ($url): void {
+                            $this->responses[$url] = $response;
+                        },
+                        function(mixed $reason) use ($url): void {
+                            $this->responses[$url] = $reason instanceof \Throwable ? $reason : new \Exception((string) $reason);
+                        }
+                    )->then(
+                        function() use (&$startRequests, &$active, &$running, $host): void {
+                            --$running;
+                            --$active[$host];
+                            $startRequests();
+                        }
+                    );
+                }
+
+                if (count($queues[$host]) === 0) {
+                    unset($queues[$host]);
+                }
+            }
+        };
+
+        $startRequests();
+
+        // Waiting on a promise also progresses the other transfers and lets finished ones start new requests.
+        while (($promise = array_shift($promises)) !== null) {
+            $promise->wait();
+        }
+    }
+
+    /**
+     * Returns the prefetched response for the URL, removing it from the store.
+     *
+     * @throws \Throwable the error the prefetch failed with
+     */
+    public function take(string $url): ?ResponseInterface {
+        if (!isset($this->responses[$url])) {
+            return null;
+        }
+
+        $response = $this->responses[$url];
+        unset($this->responses[$url]);
+
+        if ($response instanceof \Throwable) {
+            throw $response;
+        }
+
+        return $response;
+    }
+
+    /**
+     * Forget responses that were not used.
+     */
+    public function clear(): void {
+        $this->responses = [];
+    }
+}
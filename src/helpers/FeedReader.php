@@ -13,12 +13,17 @@ use SimplePie\SimplePie;
  * Helper class for obtaining feeds
  */
 final readonly class FeedReader {
+    private ConditionalHttpClient $httpClient;
+
     public function __construct(
         HttpFactory $httpFactory,
         private SimplePie $simplepie,
         ClientInterface $webClient,
+        FeedPrefetcher $prefetcher,
         ?CacheInterface $cache = null
     ) {
+        $this->httpClient = new ConditionalHttpClient($webClient, $prefetcher);
+
         // initialize simplepie feed loader
         if ($cache !== null) {
             $this->simplepie->set_cache($cache);
@@ -27,7 +32,7 @@ final readonly class FeedReader {
         }
 
         $this->simplepie->set_http_client(
-            $webClient,
+            $this->httpClient,
             $httpFactory,
             $httpFactory,
         );
@@ -40,14 +45,23 @@ final readonly class FeedReader {
      * Load the feed for provided URL using SimplePie.
      *
      * @param string $url URL of the feed
+     * @param ?CacheValidators $validators validators of the previously loaded version of the feed
+     *
+     * @throws NotModifiedException when the feed has not changed since it was loaded with the validators
      *
-     * @return array{items: \SimplePie\Item[], htmlUrl: string, title: ?string}
+     * @return array{items: \SimplePie\Item[], htmlUrl: string, title: ?string, validators: ?CacheValidators}
      */
-    public function load(string $url): array {
+    public function load(string $url, ?CacheValidators $validators = null): array {
+        $this->httpClient->expect($url, $validators);
         @$this->simplepie->set_feed_url($url);
         // fetch items
         @$this->simplepie->init();
 
+        // SimplePie considers 304 response an error, do not bother parsing it again.
+        if ($this->httpClient->isNotModified()) {
+            throw new NotModifiedException("Feed $url has not been modified.");
+        }
+
         // on error retry with force_feed
         if ($this->simplepie->error() !== null) {
             @$this->simplepie->set_autodiscovery_level(SimplePie::LOCATOR_NONE);
@@ -71,6 +85,7 @@ final readonly class FeedReader {
             'htmlUrl' => htmlspecialchars_decode((string) $this->simplepie->get_link(), ENT_COMPAT), // SimplePie sanitizes URLs
             // Atom feeds can contain HTML in titles, strip tags and convert to text.
             'title' => htmlspecialchars_decode(strip_tags($this->simplepie->get_title() ?? '')),
+            'validators' => $this->httpClient->getResponseValidators(),
         ];
     }
 
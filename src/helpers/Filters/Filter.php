@@ -24,6 +24,8 @@ interface Filter {
      * @param T $item
      *
      * @return bool indicating filter success
+     *
+     * @throws FilterEvaluationError when the value cannot be checked
      */
     public function admits($item): bool;
 }
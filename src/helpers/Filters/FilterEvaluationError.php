@@ -0,0 +1,14 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\helpers\Filters;
+
+use Exception;
+
+/**
+ * Thrown when a filter cannot decide whether it admits a value,
+ * e.g. when a regular expression exceeds the PCRE backtracking limit.
+ */
+final class FilterEvaluationError extends Exception {
+}
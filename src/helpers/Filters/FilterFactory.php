@@ -10,6 +10,9 @@ namespace Selfoss\helpers\Filters;
 use spouts\Item;
 
 final class FilterFactory {
+    /** @var array<string, Filter<Item<mixed>>> Filters already created for expressions, they are immutable so they can be shared */
+    private static array $filters = [];
+
     /**
      * Creates a filter based on filter expression language.
      * See [filter docs](https://selfoss.aditu.de/docs/usage/filters/).
@@ -19,6 +22,15 @@ final class FilterFactory {
      * @return Filter<Item<mixed>>
      */
     public static function fromString(string $expression): Filter {
+        return self::$filters[$expression] ??= self::parse($expression);
+    }
+
+    /**
+     * @throws FilterSyntaxError when the expression is not valid
+     *
+     * @return Filter<Item<mixed>>
+     */
+    private static function parse(string $expression): Filter {
         if ($expression === '') {
             return new AcceptingFilter();
         }
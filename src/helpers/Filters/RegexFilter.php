@@ -29,10 +29,14 @@ final readonly class RegexFilter implements Filter {
 
     /**
      * @param string $item
+     *
+     * @throws FilterEvaluationError when matching fails, e.g. on backtracking limit or invalid UTF-8
      */
     public function admits($item): bool {
         $result = @preg_match($this->regex, $item);
-        \assert($result !== false); // Verified at construction.
+        if ($result === false) {
+            throw new FilterEvaluationError("Matching regex {$this->regex} failed: " . preg_last_error_msg());
+        }
 
         return $result === 1;
     }
@@ -31,8 +31,9 @@ final readonly class IconStore {
      * Delete all icons except for requested ones.
      *
      * @param callable(string):bool $shouldKeep
+     * @param ?float $deadline Unix timestamp after which the cleanup should stop, to be continued next time
      */
-    public function cleanup(callable $shouldKeep): void {
-        $this->storage->cleanup($shouldKeep);
+    public function cleanup(callable $shouldKeep, ?float $deadline = null): void {
+        $this->storage->cleanup($shouldKeep, $deadline);
     }
 }
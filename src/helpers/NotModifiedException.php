@@ -0,0 +1,11 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\helpers;
+
+/**
+ * Thrown by spouts when the server reports the source has not changed since the last fetch.
+ */
+final class NotModifiedException extends \Exception {
+}
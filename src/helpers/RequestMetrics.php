@@ -0,0 +1,113 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Selfoss\helpers;
+
+/**
+ * Collects timings of the current request for performance analysis.
+ */
+final class RequestMetrics {
+    /** Time spent executing SQL statements in seconds */
+    private float $databaseTime = 0.0;
+
+    /** Number of SQL statements executed */
+    private int $queryCount = 0;
+
+    /** @var array<int, float> Time spent fetching each source in seconds, indexed by source id */
+    private array $fetchTimes = [];
+
+    /** @var list<array{sql: string, params: \stdClass}> Executed SQL statements, only kept when `metrics_queries` is enabled */
+    private array $statements = [];
+
+    public function __construct(
+        private readonly Configuration $configuration
+    ) {
+    }
+
+    /**
+     * @param array<string, mixed> $args parameters bound to the statement, optionally as [$value, $type] pairs
+     */
+    public function recordQuery(float $duration, string $sql, array $args): void {
+        $this->databaseTime += $duration;
+        ++$this->queryCount;
+
+        if ($this->configuration->metricsQueries) {
+            $this->statements[] = [
+                'sql' => $sql,
+                // Object so that statements without parameters are serialized as `{}` rather than `[]`.
+                'params' => (object) array_map(fn(mixed $arg): mixed => is_array($arg) ? $arg[0] : $arg, $args),
+            ];
+        }
+    }
+
+    public function recordFetch(int $sourceId, float $duration): void {
+        $this->fetchTimes[$sourceId] = ($this->fetchTimes[$sourceId] ?? 0.0) + $duration;
+    }
+
+    /**
+     * Time since the request started in seconds.
+     */
+    private function getTotalTime(): float {
+        return microtime(true) - (float) $_SERVER['REQUEST_TIME_FLOAT'];
+    }
+
+    /**
+     * Returns the collected metrics in a form suitable for serializing as JSON.
+     *
+     * @return array{route: string, total: float, db: float, queries: int, fetch: float, sources: list<array{id: int, time: float}>, memory_peak: int, statements?: list<array{sql: string, params: \stdClass}>}
+     */
+    public function toArray(string $route): array {
+        $metrics = [
+            'route' => $route,
+            'total' => $this->getTotalTime(),
+            'db' => $this->databaseTime,
+            'queries' => $this->queryCount,
+            'fetch' => array_sum($this->fetchTimes),
+            'sources' => array_map(
+                fn(int $id, float $time): array => ['id' => $id, 'time' => $time],
+                array_keys($this->fetchTimes),
+                array_values($this->fetchTimes)
+            ),
+            'memory_peak' => memory_get_peak_usage(true),
+        ];
+
+        if ($this->configuration->metricsQueries) {
+            $metrics['statements'] = $this->statements;
+        }
+
+        return $metrics;
+    }
+
+    /**
+     * Formats the metrics as a value of `Server-Timing` HTTP header, durations are in milliseconds.
+     *
+     * @see https://www.w3.org/TR/server-timing/
+     */
+    public function getServerTimingHeader(): string {
+        $metrics = [
+            sprintf('db;dur=%.3f;desc="%d queries"', $this->databaseTime * 1000, $this->queryCount),
+        ];
+
+        if (count($this->fetchTimes) > 0) {
+            $metrics[] = sprintf('fetch;dur=%.3f;desc="%d sources"', array_sum($this->fetchTimes) * 1000, count($this->fetchTimes));
+        }
+
+        $metrics[] = sprintf('total;dur=%.3f', $this->getTotalTime() * 1000);
+
+        return implode(', ', $metrics);
+    }
+
+    /**
+     * Returns a route identifier for the current request, replacing ids in the path with a placeholder.
+     */
+    public static function getCurrentRoute(): string {
+        if (PHP_SAPI === 'cli') {
+            return 'cli ' . basename($_SERVER['SCRIPT_NAME'] ?? '');
+        }
+
+        $path = parse_url($_SERVER['REQUEST_URI'] ?? '/', PHP_URL_PATH) ?: '/';
+
+        return $_SERVER['REQUEST_METHOD'] . ' ' . preg_replace('(/[0-9]+(?=/|$))', '/:id', $path);
+    }
+}
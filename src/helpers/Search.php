@@ -31,4 +31,18 @@ final class Search {
             fn(string $item): bool => $item !== ''
         );
     }
+
+    /**
+     * return words of the search for use with full-text index
+     *
+     * Punctuation is dropped since the index does not store it either.
+     *
+     * @return string[] words
+     */
+    public static function splitWords(string $search): array {
+        $words = preg_split('/[^\p{L}\p{N}_]+/u', $search, -1, PREG_SPLIT_NO_EMPTY);
+
+        // Can return false on invalid UTF-8.
+        return $words === false ? [] : $words;
+    }
 }
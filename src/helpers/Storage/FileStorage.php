@@ -10,6 +10,12 @@ use Monolog\Logger;
  * Simple file storage.
  */
 final readonly class FileStorage {
+    /** Name of the file remembering where an interrupted cleanup should continue */
+    private const CLEANUP_CURSOR_FILE = '.cleanup-cursor';
+
+    /** Number of seconds a file is kept after it was written even when it is not referenced, so that items using it can be stored first */
+    private const CLEANUP_GRACE_PERIOD = 3600;
+
     public function __construct(
         private Logger $logger,
         /** Directory where the files will be stored */
@@ -37,20 +43,58 @@ final readonly class FileStorage {
     /**
      * Delete all files except for requested ones.
      *
+     * Files are visited in alphabetical order. When the deadline passes, the cleanup stops
+     * and the next one will continue after the last visited file. Files written within the last hour
+     * are always kept.
+     *
      * @param callable(string):bool $shouldKeep
+     * @param ?float $deadline Unix timestamp after which the cleanup should stop
      */
-    public function cleanup(callable $shouldKeep): void {
+    public function cleanup(callable $shouldKeep, ?float $deadline = null): void {
+        $cursorPath = $this->directory . '/' . self::CLEANUP_CURSOR_FILE;
+        $cursor = @file_get_contents($cursorPath) ?: '';
+        // Recently written files might not be referenced yet, e.g. by items of a source
+        // that is still being updated or by a concurrent update started after the references were loaded.
+        $keepNewerThan = time() - self::CLEANUP_GRACE_PERIOD;
+
+        $names = @scandir($this->directory);
+        if ($names === false) {
+            $this->logger->warning('Unable to list files in ' . $this->directory);
+
+            return;
+        }
+
         $undeleted = [];
-        foreach (new \DirectoryIterator($this->directory) as $fileInfo) {
-            $name = $fileInfo->getFilename();
-            if ($fileInfo->isFile() && $name !== '.htaccess') {
-                if (!$shouldKeep($name)) {
-                    $path = $fileInfo->getPathname();
-                    if (!@unlink($path)) {
-                        $undeleted[] = $path;
-                    }
+        $lastVisited = null;
+        $finished = true;
+        foreach ($names as $name) {
+            if (str_starts_with($name, '.') || strcmp($name, $cursor) <= 0) {
+                continue;
+            }
+
+            if ($deadline !== null && microtime(true) > $deadline) {
+                $finished = false;
+                if ($lastVisited !== null) {
+                    @file_put_contents($cursorPath, $lastVisited);
                 }
+                $this->logger->debug('Cleanup of ' . $this->directory . ' ran out of time, continuing after ' . ($lastVisited ?? $cursor) . ' next time');
+                break;
+            }
+            $lastVisited = $name;
+
+            $path = $this->directory . '/' . $name;
+            if (!is_file($path) || $shouldKeep($name) || @filemtime($path) >= $keepNewerThan) {
+                continue;
             }
+
+            if (!@unlink($path)) {
+                $undeleted[] = $path;
+            }
+        }
+
+        if ($finished) {
+            // Start from the beginning next time.
+            @unlink($cursorPath);
         }
 
         if (count($undeleted) > 0) {
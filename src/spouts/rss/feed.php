@@ -5,6 +5,7 @@ declare(strict_types=1);
 namespace spouts\rss;
 
 use Monolog\Logger;
+use Selfoss\helpers\CacheValidators;
 use Selfoss\helpers\FeedReader;
 use Selfoss\helpers\HtmlString;
 use Selfoss\helpers\Image;
@@ -45,6 +46,9 @@ class feed extends \spouts\spout {
     /** @var SimplePie\Item[] current fetched items */
     private array $items = [];
 
+    /** Validators of the previously loaded feed, replaced by those of the current one after loading */
+    private ?CacheValidators $cacheValidators = null;
+
     public function __construct(
         private readonly FeedReader $feed,
         private readonly Image $imageHelper,
@@ -57,10 +61,19 @@ class feed extends \spouts\spout {
     //
 
     public function load(array $params): void {
-        $feedData = $this->feed->load(htmlspecialchars_decode($params['url']));
+        $feedData = $this->feed->load(htmlspecialchars_decode($params['url']), $this->cacheValidators);
         $this->items = $feedData['items'];
         $this->htmlUrl = $feedData['htmlUrl'];
         $this->title = $feedData['title'];
+        $this->cacheValidators = $feedData['validators'];
+    }
+
+    public function setCacheValidators(?CacheValidators $validators): void {
+        $this->cacheValidators = $validators;
+    }
+
+    public function getCacheValidators(): ?CacheValidators {
+        return $this->cacheValidators;
     }
 
     public function getTitle(): ?string {
@@ -71,6 +84,18 @@ class feed extends \spouts\spout {
         return isset($params['url']) ? html_entity_decode($params['url']) : null;
     }
 
+    /**
+     * returns the url the feed is downloaded from by load, decoded the same way
+     *
+     * @param array<string, mixed> $params params for the source
+     */
+    public function getFetchUrl(array $params): ?string {
+        // Spouts building the url from other params pass their xml url to load.
+        $url = isset($params['url']) ? (string) $params['url'] : $this->getXmlUrl($params);
+
+        return $url !== null ? htmlspecialchars_decode($url) : null;
+    }
+
     public function getHtmlUrl(): ?string {
         return $this->htmlUrl;
     }
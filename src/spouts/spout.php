@@ -4,6 +4,8 @@ declare(strict_types=1);
 
 namespace spouts;
 
+use Selfoss\helpers\CacheValidators;
+
 /**
  * This abstract class defines the interface of a spout (source or plugin)
  * template pattern
@@ -65,9 +67,26 @@ abstract class spout {
      * @param array<string, mixed> $params params of this source
      *
      * @throws \GuzzleHttp\Exception\GuzzleException When an error is encountered
+     * @throws \Selfoss\helpers\NotModifiedException When the content has not changed since it was loaded with validators passed to `setCacheValidators`
      */
     abstract public function load(array $params): void;
 
+    /**
+     * Provide validators of the content obtained the last time the source was loaded.
+     * Spouts supporting conditional requests will then throw `NotModifiedException`
+     * from `load` when the content has not changed since.
+     */
+    public function setCacheValidators(?CacheValidators $validators): void {
+    }
+
+    /**
+     * Returns validators of the content obtained by `load`
+     * or null when the spout does not support conditional requests.
+     */
+    public function getCacheValidators(): ?CacheValidators {
+        return null;
+    }
+
     /**
      * returns the xml feed url for the source
      *
@@ -0,0 +1,83 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Tests\Daos;
+
+use DateTimeImmutable;
+use PHPUnit\Framework\TestCase;
+use Selfoss\daos\DatabaseInterface;
+use Selfoss\daos\mysql\Items;
+use Selfoss\helpers\Configuration;
+use Selfoss\helpers\HtmlString;
+
+final class ItemsTest extends TestCase {
+    /**
+     * @return list<array{datetime: \DateTimeInterface, title: HtmlString, content: HtmlString, thumbnail: ?string, icon: ?string, source: int, uid: string, link: string, author: ?string}>
+     */
+    private static function items(int $source, int $count): array {
+        return array_map(
+            fn(int $k): array => [
+                'datetime' => new DateTimeImmutable('2024-01-01 00:00:00'),
+                'title' => HtmlString::fromRaw("Entry {$k}"),
+                'content' => HtmlString::fromRaw("Content of entry {$k}"),
+                'thumbnail' => null,
+                'icon' => null,
+                'source' => $source,
+                'uid' => "source-{$source}-entry-{$k}",
+                'link' => "https://example.com/{$source}/{$k}",
+                'author' => null,
+            ],
+            range(1, $count)
+        );
+    }
+
+    public function testAddAllInsertsInBatches(): void {
+        /** @var list<array{string, array<string, mixed>}> */
+        $statements = [];
+        $database = $this->createMock(DatabaseInterface::class);
+        $database->method('exec')->willReturnCallback(
+            function(string $cmd, array $args = []) use (&$statements): array {
+                $statements[] = [$cmd, $args];
+
+                return [];
+            }
+        );
+
+        $itemsDao = new Items(new Configuration(), $database);
+        $itemsDao->addAll([...self::items(1, 70), ...self::items(2, 50)]);
+
+        $inserts = array_values(array_filter(
+            $statements,
+            fn(array $statement): bool => str_starts_with($statement[0], 'INSERT INTO')
+        ));
+        $this->assertSame(
+            [50, 50, 20],
+            array_map(fn(array $statement): int => substr_count($statement[0], ':uid'), $inserts),
+            'Items should be inserted in batches of at most 50 rows.'
+        );
+        $this->assertSame(
+            [50 * 11, 50 * 11, 20 * 11],
+            array_map(fn(array $statement): int => count($statement[1]), $inserts),
+            'Each row of a batch should have its own parameters.'
+        );
+        $this->assertSame('source-2-entry-50', $inserts[2][1][':uid19']);
+
+        $counters = array_values(array_filter(
+            $statements,
+            fn(array $statement): bool => str_contains($statement[0], 'itemcount = itemcount + :items')
+        ));
+        $this->assertSame(
+            [
+                ['source' => 1, 'items' => 70],
+                ['source' => 2, 'items' => 50],
+            ],
+            array_map(fn(array $statement): array => ['source' => $statement[1][':source'], 'items' => $statement[1][':items']], $counters),
+            'Counters should be increased once per source after all batches.'
+        );
+        $this->assertGreaterThan(
+            array_search($inserts[2], $statements, true),
+            array_search($counters[0], $statements, true)
+        );
+    }
+}
@@ -0,0 +1,100 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Tests\Helpers;
+
+use GuzzleHttp\Client;
+use GuzzleHttp\Handler\MockHandler;
+use GuzzleHttp\HandlerStack;
+use GuzzleHttp\Middleware;
+use GuzzleHttp\Psr7\HttpFactory;
+use GuzzleHttp\Psr7\Request;
+use GuzzleHttp\Psr7\Response;
+use Monolog\Logger;
+use PHPUnit\Framework\TestCase;
+use Psr\Http\Message\RequestInterface;
+use Selfoss\helpers\CacheValidators;
+use Selfoss\helpers\ConditionalHttpClient;
+use Selfoss\helpers\Configuration;
+use Selfoss\helpers\FeedPrefetcher;
+use Selfoss\helpers\WebClient;
+
+final class ConditionalHttpClientTest extends TestCase {
+    private const FEED_URL = 'https://example.com/feed.xml';
+
+    private const LAST_MODIFIED = 'Sat, 01 Jun 2024 12:00:00 GMT';
+
+    /** @var array<int, array{request: RequestInterface}> requests sent by the client */
+    private array $history = [];
+
+    /**
+     * @param Response[] $responses
+     */
+    private function createClient(array $responses): ConditionalHttpClient {
+        $stack = HandlerStack::create(new MockHandler($responses));
+        $stack->push(Middleware::history($this->history));
+        $httpClient = new Client(['handler' => $stack]);
+
+        $configuration = new Configuration();
+        $httpFactory = new HttpFactory();
+        $logger = new Logger('selfoss');
+        $prefetcher = new FeedPrefetcher($configuration, $httpFactory, $logger, new WebClient($configuration, $httpFactory, $logger));
+
+        return new ConditionalHttpClient($httpClient, $prefetcher);
+    }
+
+    public function testFromResponse(): void {
+        $this->assertNull(CacheValidators::fromResponse(new Response(200)));
+
+        $validators = CacheValidators::fromResponse(new Response(200, ['ETag' => 'W/"1"']));
+        $this->assertNotNull($validators);
+        $this->assertSame('W/"1"', $validators->etag);
+        $this->assertNull($validators->lastModified);
+
+        $validators = CacheValidators::fromResponse(new Response(200, ['Last-Modified' => self::LAST_MODIFIED]));
+        $this->assertNotNull($validators);
+        $this->assertNull($validators->etag);
+        $this->assertSame(self::LAST_MODIFIED, $validators->lastModified);
+    }
+
+    public function testRoundTrip(): void {
+        $client = $this->createClient([
+            new Response(200, ['ETag' => '"v1"', 'Last-Modified' => self::LAST_MODIFIED], '<rss/>'),
+            new Response(304, ['ETag' => '"v1"']),
+        ]);
+
+        $client->expect(self::FEED_URL, null);
+        $client->sendRequest(new Request('GET', self::FEED_URL));
+        $this->assertFalse($client->isNotModified());
+        $this->assertFalse($this->history[0]['request']->hasHeader('If-None-Match'));
+        $this->assertFalse($this->history[0]['request']->hasHeader('If-Modified-Since'));
+
+        $validators = $client->getResponseValidators();
+        $this->assertEquals(new CacheValidators('"v1"', self::LAST_MODIFIED), $validators);
+
+        $client->expect(self::FEED_URL, $validators);
+        $response = $client->sendRequest(new Request('GET', self::FEED_URL));
+        $this->assertSame(304, $response->getStatusCode());
+        $this->assertTrue($client->isNotModified());
+        $this->assertSame('"v1"', $this->history[1]['request']->getHeaderLine('If-None-Match'));
+        $this->assertSame(self::LAST_MODIFIED, $this->history[1]['request']->getHeaderLine('If-Modified-Since'));
+    }
+
+    public function testOtherRequestsAreNotConditional(): void {
+        $client = $this->createClient([
+            new Response(200, ['ETag' => '"page"'], '<html/>'),
+            new Response(200, ['ETag' => '"v2"'], '<rss/>'),
+        ]);
+
+        // Other documents fetched along with the URL mean the response validators might not describe the feed.
+        $client->expect(self::FEED_URL, new CacheValidators('"v1"', null));
+        $client->sendRequest(new Request('GET', 'https://example.com/'));
+        $client->sendRequest(new Request('GET', self::FEED_URL));
+
+        $this->assertFalse($this->history[0]['request']->hasHeader('If-None-Match'));
+        $this->assertSame('"v1"', $this->history[1]['request']->getHeaderLine('If-None-Match'));
+        $this->assertFalse($client->isNotModified());
+        $this->assertNull($client->getResponseValidators());
+    }
+}
@@ -0,0 +1,101 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Tests\Helpers;
+
+use GuzzleHttp\Client;
+use GuzzleHttp\HandlerStack;
+use GuzzleHttp\Promise\Promise;
+use GuzzleHttp\Promise\PromiseInterface;
+use GuzzleHttp\Psr7\HttpFactory;
+use GuzzleHttp\Psr7\Response;
+use Monolog\Logger;
+use PHPUnit\Framework\TestCase;
+use Psr\Http\Message\RequestInterface;
+use Selfoss\helpers\CacheValidators;
+use Selfoss\helpers\Configuration;
+use Selfoss\helpers\FeedPrefetcher;
+use Selfoss\helpers\WebClient;
+
+final class FeedPrefetcherTest extends TestCase {
+    /** @var array<string, int> number of requests in progress for each host */
+    private array $active = [];
+
+    /** @var array<string, int> highest number of requests in progress at once for each host */
+    private array $maxActive = [];
+
+    /** Highest number of requests in progress at once in total */
+    private int $maxRunning = 0;
+
+    /** @var array<string, RequestInterface> requests sent, indexed by their URL */
+    private array $requests = [];
+
+    private function createPrefetcher(int $concurrency, int $concurrencyPerHost): FeedPrefetcher {
+        // Responses only arrive when the prefetcher waits for them so that the requests overlap.
+        $handler = function(RequestInterface $request): PromiseInterface {
+            $url = (string) $request->getUri();
+            $host = $request->getUri()->getHost();
+            $this->requests[$url] = $request;
+            $this->active[$host] = ($this->active[$host] ?? 0) + 1;
+            $this->maxActive[$host] = max($this->maxActive[$host] ?? 0, $this->active[$host]);
+            $this->maxRunning = max($this->maxRunning, array_sum($this->active));
+
+            $promise = new Promise(function() use (&$promise, $host, $url): void {
+                --$this->active[$host];
+                $promise->resolve(new Response(str_ends_with($url, 'missing.xml') ? 404 : 200, [], $url));
+            });
+
+            return $promise;
+        };
+        $httpClient = new Client(['handler' => HandlerStack::create($handler)]);
+
+        $configuration = new Configuration();
+        $configuration->updateConcurrency = $concurrency;
+        $configuration->updateConcurrencyPerHost = $concurrencyPerHost;
+        $httpFactory = new HttpFactory();
+        $logger = new Logger('selfoss');
+        $webClient = new class($configuration, $httpFactory, $logger, $httpClient) extends WebClient {
+            public function __construct(Configuration $configuration, HttpFactory $httpFactory, Logger $logger, private readonly Client $client) {
+                parent::__construct($configuration, $httpFactory, $logger);
+            }
+
+            public function getHttpClient(): Client {
+                return $this->client;
+            }
+        };
+
+        return new FeedPrefetcher($configuration, $httpFactory, $logger, $webClient);
+    }
+
+    public function testConcurrencyLimits(): void {
+        $feeds = [];
+        foreach (range(1, 6) as $i) {
+            $feeds["https://a.example/{$i}.xml"] = null;
+        }
+        foreach (range(1, 3) as $i) {
+            $feeds["https://b.example/{$i}.xml"] = null;
+        }
+        $feeds['https://c.example/feed.xml'] = new CacheValidators('"v1"', null);
+        $feeds['https://c.example/missing.xml'] = null;
+
+        $prefetcher = $this->createPrefetcher(4, 2);
+        $prefetcher->prefetch($feeds);
+
+        $this->assertSame(2, $this->maxActive['a.example'], 'Requests to a single host should be limited.');
+        foreach ($this->maxActive as $host => $maxActive) {
+            $this->assertLessThanOrEqual(2, $maxActive, "No more than two requests should go to {$host} at once.");
+        }
+        $this->assertSame(4, $this->maxRunning, 'No more than four requests should be in progress at once.');
+        $this->assertSame('"v1"', $this->requests['https://c.example/feed.xml']->getHeaderLine('If-None-Match'));
+
+        foreach (array_keys($feeds) as $url) {
+            $response = $prefetcher->take($url);
+            $this->assertNotNull($response, "Response for {$url} should be prefetched.");
+            $this->assertSame($url, (string) $response->getBody());
+            // Error responses are handed over as well.
+            $this->assertSame(str_ends_with($url, 'missing.xml') ? 404 : 200, $response->getStatusCode());
+        }
+        $this->assertNull($prefetcher->take('https://a.example/1.xml'), 'Response should only be handed over once.');
+    }
+}
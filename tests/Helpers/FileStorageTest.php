@@ -0,0 +1,93 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Tests\Helpers;
+
+use Monolog\Logger;
+use PHPUnit\Framework\TestCase;
+use Selfoss\helpers\Storage\FileStorage;
+
+final class FileStorageTest extends TestCase {
+    private const CURSOR_FILE = '.cleanup-cursor';
+
+    private string $directory;
+
+    private FileStorage $storage;
+
+    protected function setUp(): void {
+        $this->directory = sys_get_temp_dir() . '/selfoss-file-storage-' . bin2hex(random_bytes(8));
+        mkdir($this->directory);
+        $this->storage = new FileStorage(new Logger('selfoss'), $this->directory);
+    }
+
+    protected function tearDown(): void {
+        foreach (scandir($this->directory) ?: [] as $name) {
+            if ($name !== '.' && $name !== '..') {
+                unlink($this->directory . '/' . $name);
+            }
+        }
+        rmdir($this->directory);
+    }
+
+    /**
+     * Create files last written long enough ago to be deleted.
+     */
+    private function createOldFiles(string ...$names): void {
+        $written = time() - 2 * 3600;
+        foreach ($names as $name) {
+            touch($this->directory . '/' . $name, $written);
+        }
+    }
+
+    /**
+     * @return string[]
+     */
+    private function listFiles(): array {
+        return array_values(array_filter(
+            scandir($this->directory) ?: [],
+            fn(string $name): bool => !str_starts_with($name, '.')
+        ));
+    }
+
+    public function testCleanupKeepsUsedAndRecentFiles(): void {
+        $this->createOldFiles('a.jpg', 'b.jpg', 'c.jpg');
+        touch($this->directory . '/new.jpg');
+
+        $this->storage->cleanup(fn(string $name): bool => $name === 'b.jpg');
+
+        $this->assertSame(['b.jpg', 'new.jpg'], $this->listFiles());
+        $this->assertFileDoesNotExist($this->directory . '/' . self::CURSOR_FILE);
+    }
+
+    public function testCleanupContinuesAfterDeadline(): void {
+        $this->createOldFiles('a.jpg', 'b.jpg', 'c.jpg', 'd.jpg');
+
+        // Run out of time while checking the second file.
+        $deadline = microtime(true) + 0.1;
+        $this->storage->cleanup(
+            function(string $name) use ($deadline): bool {
+                if ($name === 'b.jpg') {
+                    time_sleep_until($deadline + 0.01);
+                }
+
+                return false;
+            },
+            $deadline
+        );
+
+        $this->assertSame(['c.jpg', 'd.jpg'], $this->listFiles());
+        $this->assertStringEqualsFile($this->directory . '/' . self::CURSOR_FILE, 'b.jpg');
+
+        // Files before the cursor are only checked once the cleanup starts over.
+        $this->createOldFiles('a2.jpg');
+        $this->storage->cleanup(fn(string $name): bool => false, microtime(true) + 60);
+
+        $this->assertSame(['a2.jpg'], $this->listFiles());
+        $this->assertFileDoesNotExist($this->directory . '/' . self::CURSOR_FILE);
+
+        $this->storage->cleanup(fn(string $name): bool => false);
+
+        $this->assertSame([], $this->listFiles());
+    }
+}
@@ -10,6 +10,7 @@ namespace Tests\Helpers;
 use DateTimeImmutable;
 use PHPUnit\Framework\TestCase;
 use Selfoss\helpers\Filters\Filter;
+use Selfoss\helpers\Filters\FilterEvaluationError;
 use Selfoss\helpers\Filters\FilterFactory;
 use Selfoss\helpers\Filters\FilterSyntaxError;
 use Selfoss\helpers\Filters\MapFilter;
@@ -81,6 +82,20 @@ final class FilterTest extends TestCase {
         $this->assertInstanceOf($class, $filter);
     }
 
+    public function testParsedFilterIsReused(): void {
+        $this->assertSame(
+            FilterFactory::fromString('title:/pattern/'),
+            FilterFactory::fromString('title:/pattern/')
+        );
+    }
+
+    public function testRegexMatchingFailure(): void {
+        $filter = new RegexFilter('/(*UTF)pattern/');
+
+        $this->expectException(FilterEvaluationError::class);
+        $filter->admits("invalid \xff UTF-8");
+    }
+
     /**
      * @return Item<null>
      */
@@ -0,0 +1,113 @@
+<?php
+
+declare(strict_types=1);
+
+namespace Tests\Helpers;
+
+use PHPUnit\Framework\TestCase;
+use Selfoss\daos;
+use Selfoss\helpers\Search;
+
+final class SearchTest extends TestCase {
+    /**
+     * @return iterable<array{string, string[]}>
+     */
+    public function splitTermsProvider(): iterable {
+        yield 'Empty' => [
+            '',
+            [],
+        ];
+
+        yield 'Words separated by spaces' => [
+            'foo  bar ',
+            ['foo', 'bar'],
+        ];
+
+        yield 'Quoted phrase' => [
+            'foo "bar baz"',
+            ['foo', 'bar baz'],
+        ];
+    }
+
+    /**
+     * @dataProvider splitTermsProvider
+     *
+     * @param string[] $expected
+     */
+    public function testSplitTerms(string $search, array $expected): void {
+        $this->assertSame($expected, array_values(Search::splitTerms($search)));
+    }
+
+    /**
+     * @return iterable<array{string, string[]}>
+     */
+    public function splitWordsProvider(): iterable {
+        yield 'Empty' => [
+            '',
+            [],
+        ];
+
+        yield 'Only punctuation' => [
+            '"-!',
+            [],
+        ];
+
+        yield 'Words separated by spaces' => [
+            ' foo  bar ',
+            ['foo', 'bar'],
+        ];
+
+        yield 'Punctuation and quotes' => [
+            '"foo-bar" baz, qux_1',
+            ['foo', 'bar', 'baz', 'qux_1'],
+        ];
+
+        yield 'Non-ASCII letters and digits' => [
+            'Příliš žluťoučký kůň 42',
+            ['Příliš', 'žluťoučký', 'kůň', '42'],
+        ];
+
+        yield 'Invalid UTF-8' => [
+            "foo \xff bar",
+            [],
+        ];
+    }
+
+    /**
+     * @dataProvider splitWordsProvider
+     *
+     * @param string[] $expected
+     */
+    public function testSplitWords(string $search, array $expected): void {
+        $this->assertSame($expected, Search::splitWords($search));
+    }
+
+    /**
+     * @return iterable<array{class-string<daos\StatementsInterface>, string}>
+     */
+    public function fullTextQueryProvider(): iterable {
+        yield 'MySQL' => [
+            daos\mysql\Statements::class,
+            '+foo* +bar_1*',
+        ];
+
+        yield 'PostgreSQL' => [
+            daos\pgsql\Statements::class,
+            'foo:* & bar_1:*',
+        ];
+
+        yield 'SQLite' => [
+            daos\sqlite\Statements::class,
+            '"foo"* "bar_1"*',
+        ];
+    }
+
+    /**
+     * @dataProvider fullTextQueryProvider
+     *
+     * @param class-string<daos\StatementsInterface> $statements
+     */
+    public function testFullTextQuery(string $statements, string $expected): void {
+        $this->assertSame($expected, $statements::fullTextQuery(Search::splitWords('foo, "bar_1"')));
+    }
+}
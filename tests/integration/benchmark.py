@@ -0,0 +1,88 @@
+import argparse
+from pathlib import Path
+from benchmarks import (
+    cleanup,
+    images,
+    import_opml,
+    insert,
+    load,
+    mark,
+    pagination,
+    refresh_all,
+    search,
+    stats,
+    sync,
+)
+from helpers.benchmark import server_metrics_summary, write_results
+from helpers.storage_servers import STORAGE_BACKENDS
+
+
+BENCHMARKS = {
+    "refresh-all": refresh_all,
+    "insert": insert,
+    "images": images,
+    "cleanup": cleanup,
+    "import-opml": import_opml,
+    "load": load,
+    "mark": mark,
+    "pagination": pagination,
+    "search": search,
+    "stats": stats,
+    "sync": sync,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Runs selfoss performance benchmarks",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=STORAGE_BACKENDS.keys(),
+        default=["sqlite"],
+        help="Storage backends to run the benchmark against",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of PHP processes serving selfoss requests",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Directory to store JSON results in, printed to standard output when omitted",
+    )
+
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    for name, benchmark in BENCHMARKS.items():
+        subparser = subparsers.add_parser(name, help=benchmark.DESCRIPTION)
+        benchmark.add_arguments(subparser)
+
+    args = parser.parse_args()
+    benchmark = BENCHMARKS[args.benchmark]
+
+    for storage_backend in args.backends:
+        # Do not mix in requests from previous backend.
+        server_metrics_summary()
+        results = benchmark.run(storage_backend, args)
+        write_results(
+            args.benchmark,
+            storage_backend,
+            results,
+            args.output_dir,
+            server={
+                "workers": args.workers,
+                "routes": server_metrics_summary(),
+            },
+            arguments={
+                key: value
+                for key, value in vars(args).items()
+                if key not in ["backends", "output_dir", "benchmark", "workers"]
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
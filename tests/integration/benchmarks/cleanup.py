@@ -0,0 +1,94 @@
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, List
+from helpers.benchmark import SelfossBenchmark
+from helpers.seeder import ITEM_COLUMNS, SeedSpec, item_rows
+
+
+DESCRIPTION = "Measures how long removing orphaned thumbnails takes."
+
+# Seeded items with a thumbnail reference files named after their index.
+THUMBNAIL_NAME = "{:040x}.jpg"
+
+# Seconds since the thumbnail files were written, longer than the cleanup grace period.
+FILE_AGE = 2 * 3600
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=100_000,
+        help="Number of items to seed the database with, some of them having a thumbnail",
+    )
+    parser.add_argument(
+        "--files",
+        type=int,
+        default=100_000,
+        help="Number of thumbnail files to create, those not used by any item are orphaned",
+    )
+    parser.add_argument(
+        "--time-budgets",
+        type=int,
+        nargs="+",
+        default=[0, 5],
+        help="Values of cleanup_time_budget option to benchmark with",
+    )
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    spec = SeedSpec(sources=10, items=args.items)
+    thumbnail_column = ITEM_COLUMNS.index("thumbnail")
+    referenced = {
+        row[thumbnail_column]
+        for row in item_rows(spec, first_source_id=1)
+        if row[thumbnail_column] is not None
+    }
+
+    results = []
+    for time_budget in args.time_budgets:
+        instance = SelfossBenchmark(storage_backend, workers=args.workers)
+        instance.selfoss_config = {"cleanup_time_budget": str(time_budget)}
+        with instance:
+            api = instance.api()
+            instance.seed(api, sources=spec.sources, items=spec.items)
+
+            thumbnails_dir = instance.selfoss_thread.data_dir / "thumbnails"
+            # Recently written files are kept, pretend these are old.
+            written = time.time() - FILE_AGE
+            for i in range(args.files):
+                path = thumbnails_dir / THUMBNAIL_NAME.format(i)
+                path.write_bytes(b"")
+                os.utime(path, (written, written))
+
+            run_times = []
+            while True:
+                start = time.perf_counter()
+                instance.selfoss_thread.run_cli("cleanup")
+                run_times.append(time.perf_counter() - start)
+                if not (thumbnails_dir / ".cleanup-cursor").exists():
+                    break
+
+            remaining = {path.name for path in thumbnails_dir.iterdir()}
+            assert referenced <= remaining, "Used thumbnails should be kept."
+            assert len(remaining) == len(
+                referenced & {THUMBNAIL_NAME.format(i) for i in range(args.files)}
+            ), "Orphaned thumbnails should be deleted."
+
+        result = {
+            "time_budget": time_budget,
+            "files": args.files,
+            "deleted": args.files - len(remaining),
+            "runs": len(run_times),
+            "run_times": run_times,
+            "total_time": sum(run_times),
+        }
+        print(
+            f"{storage_backend}: budget {time_budget} s, {result['deleted']} files deleted in {result['runs']} runs, {result['total_time']:.2f} s",
+            file=sys.stderr,
+        )
+        results.append(result)
+
+    return results
@@ -0,0 +1,82 @@
+import argparse
+import sys
+import time
+from typing import Any, Dict
+from helpers.benchmark import SelfossBenchmark
+
+
+DESCRIPTION = "Compares update duration with thumbnails downloaded inline and through the image queue."
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=20,
+        help="Number of sources to benchmark with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=25,
+        help="Number of items in each feed",
+    )
+    parser.add_argument(
+        "--images",
+        type=int,
+        default=100,
+        help="Number of distinct images shared by the items",
+    )
+    parser.add_argument(
+        "--image-latency",
+        type=int,
+        default=200,
+        help="Milliseconds the data server waits before responding with each image",
+    )
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    results = {}
+    for mode, config in [("inline", {}), ("queue", {"image_queue": "1"})]:
+        instance = SelfossBenchmark(storage_backend, workers=args.workers)
+        instance.selfoss_config = config
+        with instance:
+            api = instance.api()
+            instance.add_farm_sources(
+                api,
+                args.sources,
+                items=args.items,
+                images=args.images,
+                image_latency=args.image_latency,
+            )
+
+            start = time.perf_counter()
+            refresh = api.refresh_all()
+            update_time = time.perf_counter() - start
+            assert refresh == "finished", "Refreshing sources should succeed."
+            update_stats = instance.data_server_thread.stats
+
+            instance.data_server_thread.reset_stats()
+            start = time.perf_counter()
+            if mode == "queue":
+                instance.selfoss_thread.run_cli("images")
+            queue_time = time.perf_counter() - start
+            queue_stats = instance.data_server_thread.stats
+
+            thumbnails = sum(1 for item in api.iter_items() if item.get("thumbnail"))
+            assert (
+                thumbnails == args.sources * args.items
+            ), "All items should have a thumbnail."
+
+        results[mode] = {
+            "update_time": update_time,
+            "queue_time": queue_time,
+            "update_data_server": update_stats,
+            "queue_data_server": queue_stats,
+        }
+        print(
+            f"{storage_backend}, {mode}: update {update_time:.2f} s, queue {queue_time:.2f} s, {update_stats['requests'] + queue_stats['requests']} requests",
+            file=sys.stderr,
+        )
+
+    return results
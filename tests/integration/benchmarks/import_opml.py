@@ -0,0 +1,94 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+from helpers.benchmark import SelfossBenchmark
+from helpers.data_server import farm_feed_path
+from helpers.feeds.opml import invalid_outlines, synthetic_opml
+from helpers.selfoss_api import SelfossApi
+
+
+DESCRIPTION = "Measures how long importing a large OPML file takes."
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--feeds",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000],
+        help="Numbers of feeds in the imported file, each measured with a fresh database",
+    )
+    parser.add_argument(
+        "--tags",
+        type=int,
+        default=50,
+        help="Number of folders the feeds are sorted into",
+    )
+
+
+def import_file(api: SelfossApi, path: Path) -> Dict[str, Any]:
+    start = time.perf_counter()
+    response = api.import_opml(path)
+    return {
+        "wall_time": time.perf_counter() - start,
+        "messages": response["messages"],
+    }
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for feeds in args.feeds:
+        with SelfossBenchmark(
+            storage_backend, workers=args.workers
+        ) as instance, tempfile.TemporaryDirectory() as temp_dir:
+            api = instance.api()
+
+            path = Path(temp_dir) / "subscriptions.opml"
+            with open(path, "wb") as opml:
+                urls = [
+                    instance.data_uri(farm_feed_path(feed_id))
+                    for feed_id in range(feeds)
+                ]
+                opml.writelines(synthetic_opml(urls, tags=args.tags))
+
+            first = import_file(api, path)
+            # Each refused outline is reported by its title, success message is only shown without errors.
+            expected_messages = max(invalid_outlines(feeds), 1)
+            assert (
+                len(first["messages"]) == expected_messages
+            ), f"Import should report {invalid_outlines(feeds)} invalid outlines, got {first['messages'][:5]}."
+
+            stats = api.get_stats(sources="true")
+            assert (
+                len(stats["sources"]) == feeds
+            ), f"Import should add {feeds} sources, got {len(stats['sources'])}."
+            assert stats["total"] == 0, "Import should leave fetching to the update."
+
+            # Importing the same file again only merges tags of the existing sources.
+            second = import_file(api, path)
+            assert (
+                len(api.get_stats(sources="true")["sources"]) == feeds
+            ), "Importing the same file again should not add sources."
+
+        results.append(
+            {
+                "feeds": feeds,
+                "import_wall_time": first["wall_time"],
+                "reimport_wall_time": second["wall_time"],
+            }
+        )
+
+    print(
+        f"{storage_backend}: feeds, import, repeated import",
+        file=sys.stderr,
+    )
+    for result in results:
+        print(
+            f"{result['feeds']:>10} {result['import_wall_time']:>10.2f} s {result['reimport_wall_time']:>10.2f} s",
+            file=sys.stderr,
+        )
+
+    return {"runs": results}
@@ -0,0 +1,48 @@
+import argparse
+import sys
+import time
+from typing import Any, Dict
+from helpers.benchmark import SelfossBenchmark
+
+
+DESCRIPTION = "Measures how long importing a single large feed takes."
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=10_000,
+        help="Number of items in the feed",
+    )
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    instance = SelfossBenchmark(storage_backend, workers=args.workers)
+    with instance:
+        api = instance.api()
+        # Farm feed items are a minute apart so they all fit into the default items lifetime.
+        instance.add_farm_sources(api, 1, items=args.items)
+
+        start = time.perf_counter()
+        refresh = api.refresh_all()
+        wall_time = time.perf_counter() - start
+        assert refresh == "finished", "Refreshing sources should succeed."
+
+        inserted = api.get_stats()["total"]
+        assert inserted == args.items, "All items from the feed should be inserted."
+
+        result = {
+            "items": inserted,
+            "wall_time": wall_time,
+            "items_per_second": inserted / wall_time,
+            "db_size": instance.storage_server.get_size(),
+            "data_server": instance.data_server_thread.stats,
+        }
+
+    print(
+        f"{storage_backend}: {inserted} items in {wall_time:.2f} s ({result['items_per_second']:.0f} items/s)",
+        file=sys.stderr,
+    )
+
+    return result
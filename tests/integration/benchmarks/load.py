@@ -0,0 +1,78 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict
+from helpers.benchmark import SelfossBenchmark
+from helpers.load_generator import DEFAULT_MIX, LoadGenerator, parse_mix
+
+
+DESCRIPTION = "Measures latency of selfoss under concurrent mixed workload."
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=100,
+        help="Number of sources to populate the database with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=25,
+        help="Number of items in each feed",
+    )
+    parser.add_argument(
+        "--users",
+        type=int,
+        default=10,
+        help="Number of concurrent virtual users",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Target number of requests per second across all users, unlimited by default",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=60,
+        help="Duration of the load in seconds",
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Weights of operations, e.g. get_items=70,mark_read=20,mark_starred=9,refresh_all=1",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for the random choices of virtual users",
+    )
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    with SelfossBenchmark(storage_backend, workers=args.workers) as instance:
+        api = instance.api()
+        instance.add_farm_sources(api, args.sources, items=args.items)
+        assert api.refresh_all() == "finished", "Refreshing sources should succeed."
+
+        item_ids = [item["id"] for item in api.get_items(items=200)]
+        assert len(item_ids) > 0, "There need to be items to mark."
+
+        generator = LoadGenerator(
+            api_factory=instance.api,
+            item_ids=item_ids,
+            users=args.users,
+            duration=args.duration,
+            rate=args.rate,
+            mix=args.mix,
+            seed=args.seed,
+        )
+        results = generator.run()
+
+    print(json.dumps(results["endpoints"], indent=4), file=sys.stderr)
+
+    return results
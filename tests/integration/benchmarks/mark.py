@@ -0,0 +1,109 @@
+import argparse
+import math
+import sys
+import time
+from typing import Any, Callable, Dict, List
+from helpers.benchmark import RequestCounter, SelfossBenchmark, item_ids
+from helpers.selfoss_api import SelfossApi
+
+
+DESCRIPTION = "Compares marking items one by one with batched marking."
+
+# Item status changes are only applied when they are newer than the last change,
+# which is stored with a second precision.
+STATUS_CHANGE_RESOLUTION = 1
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--counts",
+        type=int,
+        nargs="+",
+        default=[100, 1000, 10000],
+        help="Numbers of items to mark",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=100,
+        help="Number of items in each feed",
+    )
+
+
+def phases(api: SelfossApi, ids: List[int]):
+    """
+    Yields marking operations to measure in order. Every operation reverts
+    the previous one so that each of them actually changes the items.
+    """
+
+    def one_by_one(method: Callable[..., bool], **kwargs) -> Callable[[], bool]:
+        return lambda: all(method(id, **kwargs) for id in ids)
+
+    yield "read", "single", one_by_one(api.mark_read)
+    yield "unread", "batch", lambda: api.mark_read_many(ids, target=False)
+    yield "read", "batch", lambda: api.mark_read_many(ids)
+    yield "unread", "single", one_by_one(api.mark_read, target=False)
+    yield "starred", "single", one_by_one(api.mark_starred)
+    yield "unstarred", "batch", lambda: api.mark_starred_many(ids, target=False)
+    yield "starred", "batch", lambda: api.mark_starred_many(ids)
+    yield "unstarred", "single", one_by_one(api.mark_starred, target=False)
+
+
+def expected_stats(status: str, total: int, count: int) -> Dict[str, int]:
+    return {
+        "read": {"unread": total - count, "starred": 0},
+        "unread": {"unread": total, "starred": 0},
+        "starred": {"unread": total, "starred": count},
+        "unstarred": {"unread": total, "starred": 0},
+    }[status]
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+
+    for count in args.counts:
+        with SelfossBenchmark(storage_backend, workers=args.workers) as instance:
+            api = instance.api()
+            instance.add_farm_sources(
+                api,
+                math.ceil(count / args.items),
+                items=args.items,
+            )
+            assert api.refresh_all() == "finished", "Refreshing sources should succeed."
+
+            ids = item_ids(api)[:count]
+            assert len(ids) == count, f"There should be {count} items to mark."
+            total = api.get_stats()["total"]
+
+            requests = RequestCounter(api)
+            for status, method, operation in phases(api, ids):
+                time.sleep(STATUS_CHANGE_RESOLUTION)
+
+                requests.reset()
+                start = time.perf_counter()
+                assert operation(), f"Marking items as {status} should succeed."
+                wall_time = time.perf_counter() - start
+                request_count = requests.count
+
+                stats = api.get_stats()
+                expected = expected_stats(status, total, count)
+                assert {
+                    key: stats[key] for key in expected
+                } == expected, f"All items should be marked as {status}."
+
+                print(
+                    f"{storage_backend}: {count} items marked {status} ({method}): {wall_time:.2f} s, {request_count} requests",
+                    file=sys.stderr,
+                )
+                results.append(
+                    {
+                        "items": count,
+                        "status": status,
+                        "method": method,
+                        "wall_time": wall_time,
+                        "requests": request_count,
+                        "items_per_second": count / wall_time,
+                    }
+                )
+
+    return results
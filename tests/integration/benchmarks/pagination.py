@@ -0,0 +1,132 @@
+import argparse
+import sys
+import time
+from typing import Any, Dict, Iterator, List
+from helpers.benchmark import SelfossBenchmark
+from helpers.selfoss_api import MAX_PAGE_SIZE, SelfossApi
+
+
+DESCRIPTION = "Measures item page latency by depth with offset and seek pagination."
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=100,
+        help="Number of sources to populate the database with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=100,
+        help="Number of items in each feed",
+    )
+    parser.add_argument(
+        "--seed-items",
+        type=int,
+        help="Load this many items directly into the database instead of fetching the sources",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=MAX_PAGE_SIZE,
+        help="Number of items per page",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        help="Stop after this many pages",
+    )
+    parser.add_argument(
+        "--type",
+        choices=["newest", "unread", "starred"],
+        default="newest",
+        help="Item filter to page through",
+    )
+
+
+def offset_pages(
+    api: SelfossApi, page_size: int, **filters
+) -> Iterator[List[Dict[str, Any]]]:
+    offset = 0
+    while True:
+        page = api.get_items(items=page_size, offset=offset, **filters)
+        if len(page) == 0:
+            return
+
+        yield page
+
+        offset += len(page)
+
+
+def measure_pages(
+    pages: Iterator[List[Dict[str, Any]]], max_pages
+) -> List[Dict[str, Any]]:
+    """
+    Records how long it took to obtain each page and how deep in the list it is.
+    """
+    measurements = []
+    depth = 0
+    while max_pages is None or len(measurements) < max_pages:
+        start = time.perf_counter()
+        page = next(pages, None)
+        latency = time.perf_counter() - start
+        if page is None:
+            break
+
+        measurements.append(
+            {
+                "page": len(measurements),
+                "depth": depth,
+                "latency": latency,
+            }
+        )
+        depth += len(page)
+
+    return measurements
+
+
+def print_table(storage_backend: str, results: Dict[str, List[Dict[str, Any]]]) -> None:
+    """
+    Prints latencies of roughly ten pages spread across the depth.
+    """
+    offset = results["offset"]
+    seek = results["seek"]
+    pages = min(len(offset), len(seek))
+    step = max(1, pages // 10)
+
+    print(f"{storage_backend}: depth, offset latency, seek latency", file=sys.stderr)
+    for page in sorted({*range(0, pages, step), pages - 1} - {-1}):
+        print(
+            f"{offset[page]['depth']:>10} {offset[page]['latency'] * 1000:>10.1f} ms {seek[page]['latency'] * 1000:>10.1f} ms",
+            file=sys.stderr,
+        )
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    filters = {}
+    if args.type != "newest":
+        filters["type"] = args.type
+
+    with SelfossBenchmark(storage_backend, workers=args.workers) as instance:
+        api = instance.api()
+        if args.seed_items is not None:
+            timings = instance.seed(api, sources=args.sources, items=args.seed_items)
+            print(f"{storage_backend}: seeded in {timings}", file=sys.stderr)
+        else:
+            instance.add_farm_sources(api, args.sources, items=args.items)
+            assert api.refresh_all() == "finished", "Refreshing sources should succeed."
+
+        results = {
+            "offset": measure_pages(
+                offset_pages(api, args.page_size, **filters), args.max_pages
+            ),
+            "seek": measure_pages(
+                api.iter_item_pages(args.page_size, **filters), args.max_pages
+            ),
+        }
+
+    print_table(storage_backend, results)
+
+    return results
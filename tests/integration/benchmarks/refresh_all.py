@@ -0,0 +1,132 @@
+import argparse
+import sys
+import time
+from typing import Any, Dict, List
+from helpers.benchmark import SelfossBenchmark
+
+
+DESCRIPTION = "Measures how long /update takes for increasing number of sources."
+
+# selfoss skips sources that were updated less than 20 seconds ago.
+SOURCE_UPDATE_INTERVAL = 20
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sources",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 5000],
+        help="Numbers of sources to benchmark with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=25,
+        help="Number of items in each feed",
+    )
+    parser.add_argument(
+        "--churn",
+        type=int,
+        default=2,
+        help="Number of new items in each feed on every subsequent refresh",
+    )
+    parser.add_argument(
+        "--latency",
+        type=int,
+        default=0,
+        help="Milliseconds the data server waits before responding with each feed",
+    )
+    parser.add_argument(
+        "--hosts",
+        type=int,
+        default=1,
+        help="Number of distinct host names to spread the feeds across",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[6],
+        help="Values of update_concurrency option to benchmark with",
+    )
+    parser.add_argument(
+        "--concurrency-per-host",
+        type=int,
+        default=2,
+        help="Value of update_concurrency_per_host option",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=1,
+        help="Number of refreshes to measure, the first one imports all the items",
+    )
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+
+    for source_count in args.sources:
+        for concurrency in args.concurrency:
+            results += run_instance(storage_backend, args, source_count, concurrency)
+
+    return results
+
+
+def run_instance(
+    storage_backend: str, args: argparse.Namespace, source_count: int, concurrency: int
+) -> List[Dict[str, Any]]:
+    results = []
+
+    instance = SelfossBenchmark(storage_backend, workers=args.workers)
+    instance.selfoss_config = {
+        "update_concurrency": str(concurrency),
+        "update_concurrency_per_host": str(args.concurrency_per_host),
+    }
+    with instance:
+        api = instance.api()
+        instance.add_farm_sources(
+            api,
+            source_count,
+            items=args.items,
+            churn=args.churn,
+            latency=args.latency,
+            hosts=args.hosts,
+        )
+
+        items_before = api.get_stats()["total"]
+        for refresh_round in range(args.rounds):
+            if refresh_round > 0:
+                time.sleep(SOURCE_UPDATE_INTERVAL)
+
+            instance.data_server_thread.reset_stats()
+
+            start = time.perf_counter()
+            refresh = api.refresh_all()
+            wall_time = time.perf_counter() - start
+            assert refresh == "finished", "Refreshing sources should succeed."
+
+            items_after = api.get_stats()["total"]
+            inserted = items_after - items_before
+            items_before = items_after
+
+            result = {
+                "sources": source_count,
+                "concurrency": concurrency,
+                "items_per_feed": args.items,
+                "round": refresh_round,
+                "wall_time": wall_time,
+                "items_inserted": inserted,
+                "items_per_second": inserted / wall_time,
+                "items_total": items_after,
+                "db_size": instance.storage_server.get_size(),
+                "data_server": instance.data_server_thread.stats,
+            }
+            print(
+                f"{storage_backend}: {source_count} sources, concurrency {concurrency}, round {refresh_round}: {wall_time:.2f} s, {inserted} items",
+                file=sys.stderr,
+            )
+            results.append(result)
+
+    return results
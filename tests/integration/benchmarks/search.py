@@ -0,0 +1,96 @@
+import argparse
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+from helpers.benchmark import SelfossBenchmark
+from helpers.selfoss_api import SelfossApi
+
+
+DESCRIPTION = "Compares item search latency with and without the full-text index."
+
+# Seeded items share a small vocabulary so these range from matching almost every item
+# to matching a handful (titles are “Seeded entry N”) or none at all.
+DEFAULT_QUERIES = ["lorem", "magna aliqua", "entry 12345", "nonexistent"]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=100,
+        help="Number of sources to seed the database with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=200_000,
+        help="Number of items to seed the database with",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=5,
+        help="Number of times to run each search",
+    )
+    parser.add_argument(
+        "--queries",
+        nargs="+",
+        default=DEFAULT_QUERIES,
+        help="Search terms to measure",
+    )
+
+
+def measure_search(api: SelfossApi, query: str, repeats: int) -> Dict[str, Any]:
+    """
+    Records latencies of fetching the first page of results for *query*.
+    """
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        page = api.get_items(search=query)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "query": query,
+        "results": len(page),
+        "latencies": latencies,
+        "median": statistics.median(latencies),
+    }
+
+
+def print_table(storage_backend: str, results: Dict[str, Any]) -> None:
+    print(
+        f"{storage_backend}: query, LIKE latency, index latency (first page results)",
+        file=sys.stderr,
+    )
+    for scan, indexed in zip(results["like"]["searches"], results["index"]["searches"]):
+        print(
+            f"{scan['query']:>20} {scan['median'] * 1000:>10.1f} ms {indexed['median'] * 1000:>10.1f} ms ({scan['results']} / {indexed['results']})",
+            file=sys.stderr,
+        )
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    results = {}
+    for mode, config in [("like", {}), ("index", {"search_index": "1"})]:
+        instance = SelfossBenchmark(storage_backend, workers=args.workers)
+        instance.selfoss_config = config
+        with instance:
+            api = instance.api()
+            if mode == "index":
+                # Created before seeding so that it includes the cost of keeping the index updated.
+                instance.selfoss_thread.run_cli("search-index")
+            seeding = instance.seed(api, sources=args.sources, items=args.items)
+            searches: List[Dict[str, Any]] = [
+                measure_search(api, query, args.repeats) for query in args.queries
+            ]
+
+        results[mode] = {
+            "seeding": seeding,
+            "searches": searches,
+        }
+
+    print_table(storage_backend, results)
+
+    return results
@@ -0,0 +1,116 @@
+import argparse
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+from helpers.benchmark import SelfossBenchmark
+from helpers.selfoss_api import SelfossApi
+
+
+DESCRIPTION = "Measures latency of item counts as the number of items grows."
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=100,
+        help="Number of sources to seed the database with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Numbers of items to seed the database with, each measured with a fresh database",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=20,
+        help="Number of times to request the stats",
+    )
+    parser.add_argument(
+        "--marks",
+        type=int,
+        default=50,
+        help="Number of items to mark as read and starred before checking the counters",
+    )
+
+
+def measure(request, repeats: int) -> Dict[str, Any]:
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        request()
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        "latencies": latencies,
+        "median": statistics.median(latencies),
+    }
+
+
+def check_counters(
+    instance: SelfossBenchmark, api: SelfossApi, marks: int
+) -> Dict[str, Any]:
+    """
+    Changes statuses of some items through the API and checks that the counts follow.
+    """
+    before = api.get_stats()
+    unread = [item["id"] for item in api.get_items(type="unread", items=marks)]
+    assert api.mark_read_many(unread), "Marking items as read should succeed."
+    # Goes through the bulk status update used by client synchronization.
+    starred = unread[: marks // 2]
+    assert api.mark_starred_many(starred), "Starring items should succeed."
+
+    after = api.get_stats()
+    expected_unread = before["unread"] - len(unread)
+    assert (
+        after["unread"] == expected_unread
+    ), f"Unread count should drop to {expected_unread} after marking {len(unread)} items, got {after['unread']}."
+    # Some of the items might have been starred already, or changed too recently for the update to apply.
+    assert (
+        before["starred"] <= after["starred"] <= before["starred"] + len(starred)
+    ), f"Starring {len(starred)} items should raise starred count from {before['starred']}, got {after['starred']}."
+
+    # Fails when the stored counters differ from counting the items.
+    instance.selfoss_thread.run_cli("counters", "verify")
+
+    return {"before": before, "after": after}
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for items in args.items:
+        with SelfossBenchmark(storage_backend, workers=args.workers) as instance:
+            api = instance.api()
+            seeding = instance.seed(api, sources=args.sources, items=items)
+
+            stats = measure(api.get_stats, args.repeats)
+            sources = measure(
+                lambda: api.get_stats(tags="true", sources="true"), args.repeats
+            )
+            counters = check_counters(instance, api, args.marks)
+
+        results.append(
+            {
+                "items": items,
+                "seeding": seeding,
+                "stats": stats,
+                "stats_with_tags_and_sources": sources,
+                "counters": counters,
+            }
+        )
+
+    print(
+        f"{storage_backend}: items, stats latency, with tags and sources",
+        file=sys.stderr,
+    )
+    for result in results:
+        print(
+            f"{result['items']:>10} {result['stats']['median'] * 1000:>10.1f} ms {result['stats_with_tags_and_sources']['median'] * 1000:>10.1f} ms",
+            file=sys.stderr,
+        )
+
+    return {"runs": results}
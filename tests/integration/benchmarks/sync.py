@@ -0,0 +1,131 @@
+import argparse
+import random
+import sys
+import time
+from typing import Any, Dict, List
+from helpers.benchmark import RequestCounter, SelfossBenchmark
+from helpers.selfoss_api import SelfossApi
+from helpers.sync_client import SyncClient
+
+
+DESCRIPTION = "Compares incremental /items/sync with polling full item lists."
+
+# Item updates are tracked with a second precision.
+STATUS_CHANGE_RESOLUTION = 1
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=100,
+        help="Number of sources to populate the database with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=100,
+        help="Number of items in each feed",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=10,
+        help="Number of polling rounds after the initial synchronization",
+    )
+    parser.add_argument(
+        "--changes",
+        type=int,
+        default=20,
+        help="Number of items whose status changes between rounds",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for choosing the changed items",
+    )
+
+
+def poll(api: SelfossApi) -> Dict[int, Dict[str, Any]]:
+    """
+    Obtains the state of all items using the item list API, as a client without sync would.
+    """
+    items = {}
+    while True:
+        page = api.get_items(items=200, offset=len(items))
+        items.update((item["id"], item) for item in page)
+        if len(page) < 200:
+            break
+    api.get_stats()
+
+    return items
+
+
+def measure(method: str, round_number: int, requests: RequestCounter, operation) -> Any:
+    requests.reset()
+    start = time.perf_counter()
+    result = operation()
+    wall_time = time.perf_counter() - start
+
+    return result, {
+        "method": method,
+        "round": round_number,
+        "requests": requests.count,
+        "bytes": requests.bytes,
+        "wall_time": wall_time,
+    }
+
+
+def run(storage_backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    results: List[Dict[str, Any]] = []
+
+    with SelfossBenchmark(storage_backend, workers=args.workers) as instance:
+        api = instance.api()
+        instance.add_farm_sources(api, args.sources, items=args.items)
+        assert api.refresh_all() == "finished", "Refreshing sources should succeed."
+
+        sync_api = instance.api()
+        sync_requests = RequestCounter(sync_api)
+        sync_client = SyncClient(sync_api)
+
+        poll_api = instance.api()
+        poll_requests = RequestCounter(poll_api)
+
+        for round_number in range(args.rounds + 1):
+            if round_number > 0:
+                time.sleep(STATUS_CHANGE_RESOLUTION)
+                changed = rng.sample(sorted(sync_client.items), args.changes)
+                api.mark_read_many(changed, target=rng.random() < 0.5)
+                time.sleep(STATUS_CHANGE_RESOLUTION)
+
+            first_sync_round = len(sync_client.rounds)
+            _, sync_result = measure(
+                "sync", round_number, sync_requests, sync_client.sync_all
+            )
+            sync_result["server_time"] = sum(
+                sync_round["server_time"]
+                for sync_round in sync_client.rounds[first_sync_round:]
+            )
+            polled, poll_result = measure(
+                "poll", round_number, poll_requests, lambda: poll(poll_api)
+            )
+
+            synced_unread = sum(item["unread"] for item in sync_client.items.values())
+            polled_unread = sum(item["unread"] for item in polled.values())
+            assert (
+                synced_unread == polled_unread
+            ), "Synchronized replica should match the polled state."
+
+            print(
+                f"{storage_backend}: round {round_number}: sync {sync_result['bytes']} B in {sync_result['wall_time']:.3f} s, poll {poll_result['bytes']} B in {poll_result['wall_time']:.3f} s",
+                file=sys.stderr,
+            )
+            results.extend([sync_result, poll_result])
+
+    return {
+        "sources": args.sources,
+        "items": args.sources * args.items,
+        "rounds": results,
+    }
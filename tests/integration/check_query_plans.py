@@ -0,0 +1,122 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+from helpers.benchmark import SelfossBenchmark
+from helpers.query_plans import (
+    Plan,
+    api_requests,
+    capture_statements,
+    create_explainer,
+    regressions,
+)
+from helpers.storage_servers import STORAGE_BACKENDS
+
+
+DEFAULT_BASELINE_DIR = Path(__file__).parent / "query-plans"
+
+
+def check(storage_backend: str, args: argparse.Namespace) -> List[str]:
+    """
+    Explains statements executed by item requests against a seeded database
+    and compares the plans with the stored baseline.
+
+    Returns the list of regressions.
+    """
+    instance = SelfossBenchmark(storage_backend)
+    instance.selfoss_config = {"metrics_queries": "1"}
+    with instance:
+        api = instance.api()
+        instance.seed(api, sources=args.sources, items=args.items)
+
+        statements = capture_statements(
+            instance.selfoss_thread.metrics_path,
+            api_requests(api, tag="tag-0", source=1, search="lorem ipsum"),
+        )
+
+        explainer = create_explainer(instance.storage_server.get_config())
+        plans: Dict[str, Plan] = {
+            name: explainer.explain_request(request_statements)
+            for name, request_statements in statements.items()
+        }
+
+    for name, plan in plans.items():
+        if plan.full_scans or plan.temp_sorts:
+            print(
+                f"{storage_backend}: {name}: full scans: {', '.join(sorted(plan.full_scans)) or 'none'}, temporary sorts: {plan.temp_sorts}",
+                file=sys.stderr,
+            )
+
+    baseline_path = args.baseline_dir / f"{storage_backend}.json"
+    if args.update_baseline or not baseline_path.exists():
+        args.baseline_dir.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w") as file:
+            json.dump(
+                {name: plan.to_json() for name, plan in plans.items()},
+                file,
+                indent=4,
+                sort_keys=True,
+            )
+        print(
+            f"{storage_backend}: baseline written to {baseline_path}", file=sys.stderr
+        )
+
+        return []
+
+    with open(baseline_path) as file:
+        baseline = {
+            name: Plan.from_json(plan) for name, plan in json.load(file).items()
+        }
+
+    return regressions(baseline, plans)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Checks query plans of item requests for regressions against a stored baseline",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=STORAGE_BACKENDS.keys(),
+        default=list(STORAGE_BACKENDS.keys()),
+        help="Storage backends to check",
+    )
+    parser.add_argument(
+        "--sources",
+        type=int,
+        default=1000,
+        help="Number of sources to seed the database with",
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=1_000_000,
+        help="Number of items to seed the database with",
+    )
+    parser.add_argument(
+        "--baseline-dir",
+        type=Path,
+        default=DEFAULT_BASELINE_DIR,
+        help="Directory with baseline plans for each backend",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the current plans as the new baseline",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for storage_backend in args.backends:
+        problems = check(storage_backend, args)
+        for problem in problems:
+            print(f"{storage_backend}: regression: {problem}", file=sys.stderr)
+        failed = failed or len(problems) > 0
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
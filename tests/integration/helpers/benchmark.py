@@ -0,0 +1,194 @@
+import datetime
+import json
+import platform
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from .data_server import farm_feed_path
+from .integration import SelfossIntegration
+from .seeder import SeedSpec, create_seeder
+from .selfoss_api import SelfossApi
+from .server_metrics import ServerTimingRecorder, read_metrics, summarize
+
+
+# Metrics of requests served by all instances since the last `server_metrics_summary` call.
+server_metrics_records: List[Dict[str, Any]] = []
+server_timing_recorder = ServerTimingRecorder()
+
+
+def server_metrics_summary() -> Dict[str, Dict[str, float]]:
+    """
+    Returns per-route breakdown of requests made since the last call.
+    """
+    global server_timing_recorder
+
+    summary = summarize(server_metrics_records, server_timing_recorder)
+    server_metrics_records.clear()
+    server_timing_recorder = ServerTimingRecorder()
+
+    return summary
+
+
+class SelfossBenchmark(SelfossIntegration):
+    """
+    Selfoss instance with a given storage backend for benchmarking.
+    The servers are started when entering the context and stopped when leaving it.
+    """
+
+    # There will be too many requests to log them all.
+    log_data_requests = False
+
+    def __init__(self, storage_backend: str, workers: int = 1):
+        super().__init__()
+        self.storage_backend = storage_backend
+        self.selfoss_workers = workers
+
+    def __enter__(self) -> "SelfossBenchmark":
+        self.setUp()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.selfoss_thread.metrics_path is not None:
+            server_metrics_records.extend(
+                read_metrics(self.selfoss_thread.metrics_path)
+            )
+        self.tearDown()
+
+    @property
+    def selfoss_base_uri(self) -> str:
+        return f"http://{self.selfoss_host_name}:{self.selfoss_port}"
+
+    def data_uri(self, path: str, host_name: Optional[str] = None) -> str:
+        return f"http://{host_name or self.data_host_name}:{self.data_port}{path}"
+
+    def api(self, login: bool = True) -> SelfossApi:
+        """
+        Returns a client for the selfoss instance, authenticated unless told otherwise.
+        """
+        api = SelfossApi(self.selfoss_base_uri)
+        api.session.hooks["response"].append(server_timing_recorder.hook)
+
+        if login:
+            result = api.login(self.selfoss_username, self.selfoss_password)
+            assert result["success"], f'Authentication failed with {result["error"]}.'
+
+        return api
+
+    def add_farm_sources(
+        self,
+        api: SelfossApi,
+        count: int,
+        items: int,
+        churn: int = 0,
+        latency: int = 0,
+        hosts: int = 1,
+        images: int = 0,
+        image_latency: int = 0,
+        **params,
+    ) -> None:
+        """
+        Subscribes to *count* distinct feeds from the data server farm.
+
+        The feeds are spread across *hosts* distinct host names,
+        subdomains of `localhost` pointing to the data server,
+        so that they are not subject to limits on connections to a single host.
+
+        With non-zero *images*, each item gets a thumbnail from a pool of that many images
+        (see `farm_feed_path`).
+        """
+        # Only this spout picks up images attached to items.
+        spout = "spouts\\rss\\images" if images > 0 else "spouts\\rss\\feed"
+        for feed_id in range(count):
+            host_name = (
+                f"feeds-{feed_id % hosts}.{self.data_host_name}" if hosts > 1 else None
+            )
+            result = api.add_source(
+                spout,
+                # Provide title so that selfoss does not need to fetch the feed.
+                title=f"Feed {feed_id}",
+                url=self.data_uri(
+                    farm_feed_path(
+                        feed_id,
+                        items=items,
+                        churn=churn,
+                        latency=latency,
+                        images=images,
+                        image_latency=image_latency,
+                    ),
+                    host_name,
+                ),
+                **params,
+            )
+            assert result["success"], f"Adding source {feed_id} should succeed."
+
+    def seed(self, api: SelfossApi, **spec) -> Dict[str, float]:
+        """
+        Fills the database directly with sources and items described by *spec*
+        (see `SeedSpec`), bypassing the fetching pipeline.
+
+        Returns the time it took to load each table.
+        """
+        # selfoss creates the database schema on the first request that needs it.
+        api.get_items(items=1)
+
+        return create_seeder(self.storage_server.get_config()).seed(
+            SeedSpec(feed_base_uri=self.data_uri(""), **spec)
+        )
+
+
+def item_ids(api: SelfossApi, **filters) -> List[int]:
+    """
+    Returns ids of all items matching the filters.
+    """
+    return [item["id"] for item in api.iter_items(**filters)]
+
+
+class RequestCounter:
+    """
+    Counts HTTP requests made by a `SelfossApi` session and bytes they received.
+    """
+
+    def __init__(self, api: SelfossApi):
+        self.count = 0
+        self.bytes = 0
+        api.session.hooks["response"].append(self.hook)
+
+    def hook(self, response, *args, **kwargs) -> None:
+        self.count += 1
+        self.bytes += len(response.content)
+
+    def reset(self) -> None:
+        self.count = 0
+        self.bytes = 0
+
+
+def write_results(
+    benchmark: str,
+    storage_backend: str,
+    results: Any,
+    output_dir: Optional[Path] = None,
+    **metadata,
+) -> None:
+    """
+    Writes benchmark results as a JSON document into *output_dir*
+    (named after the benchmark and storage backend) or to standard output.
+    """
+    document: Dict[str, Any] = {
+        "benchmark": benchmark,
+        "storage_backend": storage_backend,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        **metadata,
+        "results": results,
+    }
+
+    if output_dir is None:
+        json.dump(document, sys.stdout, indent=4)
+        print()
+    else:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_dir / f"{benchmark}-{storage_backend}.json", "w") as file:
+            json.dump(document, file, indent=4)
@@ -1,23 +1,271 @@
+import re
 import sys
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from .feeds.farm import farm_feed
 from .feeds.fibonacci import numbers_feed
+from .feeds.image import synthetic_png
 
 
 FIBONACCI_FEED_LENGTH = 20
 
+FARM_FEED_PATH = re.compile(r"^/feeds/(?P<id>[0-9]+)\.xml$")
+
+IMAGE_PATH = re.compile(r"^/images/(?P<id>[0-9]+)\.png$")
+
+DEFAULT_FARM_FEED_ITEMS = 20
+
+# Number of bytes to collect before sending them as a single chunk.
+CHUNK_SIZE = 64 * 1024
+
+
+def farm_feed_path(
+    feed_id: int,
+    items: int = DEFAULT_FARM_FEED_ITEMS,
+    churn: int = 0,
+    latency: int = 0,
+    images: int = 0,
+    image_latency: int = 0,
+) -> str:
+    """
+    Returns path of a feed served by `DataServer` farm,
+    optionally responding only after *latency* milliseconds.
+
+    With non-zero *images*, entries will have images attached,
+    picked from a pool of that many images shared by all farm feeds,
+    each served after *image_latency* milliseconds.
+    """
+    path = f"/feeds/{feed_id}.xml?items={items}&churn={churn}"
+    if latency > 0:
+        path += f"&latency={latency}"
+    if images > 0:
+        path += f"&images={images}&image_latency={image_latency}"
+
+    return path
+
+
+def image_path(image_id: int, latency: int = 0) -> str:
+    """
+    Returns path of a synthetic image served by `DataServer`,
+    optionally responding only after *latency* milliseconds.
+    """
+    path = f"/images/{image_id}.png"
+    if latency > 0:
+        path += f"?latency={latency}"
+
+    return path
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks whether `If-None-Match` header lists the entity tag,
+    using the weak comparison.
+    """
+    if if_none_match is None:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+
+    return "*" in tags or etag.removeprefix("W/") in (
+        tag.removeprefix("W/") for tag in tags
+    )
+
+
+class DataServerStats:
+    """
+    Thread-safe counters of the traffic served by `DataServer`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.full_responses = 0
+        self.not_modified_responses = 0
+        self.bytes_sent = 0
+        self.response_times: List[float] = []
+
+    def record(self, status: int, bytes_sent: int, response_time: float) -> None:
+        with self.lock:
+            self.requests += 1
+            if status == 200:
+                self.full_responses += 1
+            elif status == 304:
+                self.not_modified_responses += 1
+            self.bytes_sent += bytes_sent
+            self.response_times.append(response_time)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = 0
+            self.full_responses = 0
+            self.not_modified_responses = 0
+            self.bytes_sent = 0
+            self.response_times = []
+
+    def summary(self) -> Dict[str, float]:
+        with self.lock:
+            times = sorted(self.response_times)
+
+        return {
+            "requests": len(times),
+            "full_responses": self.full_responses,
+            "not_modified_responses": self.not_modified_responses,
+            "bytes_sent": self.bytes_sent,
+            "response_time_total": sum(times),
+            "response_time_mean": sum(times) / len(times) if times else 0.0,
+            "response_time_max": times[-1] if times else 0.0,
+        }
+
+
+class DataHTTPServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server keeping the state shared by `DataServer` handlers.
+    """
+
+    daemon_threads = True
+    # selfoss can open a lot of connections at once when updating many sources.
+    request_queue_size = 1024
+
+    def __init__(self, *args, log_requests: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.log_requests = log_requests
+        self.stats = DataServerStats()
+        self.polls_lock = threading.Lock()
+        self.polls: Dict[int, int] = defaultdict(int)
+
+    def poll(self, feed_id: int) -> int:
+        """
+        Returns how many times was the feed with given id fetched before.
+        """
+        with self.polls_lock:
+            count = self.polls[feed_id]
+            self.polls[feed_id] += 1
+
+        return count
+
 
 class DataServer(BaseHTTPRequestHandler):
     """
     A web server returning various feeds for selfoss to fetch.
+
+    - `/fibonacci.xml` lists first few fibonacci numbers.
+    - `/feeds/<id>.xml?items=N&churn=K` is a deterministic feed with *N* entries,
+      *K* of which are replaced with new ones every time the feed is fetched.
+      Adding `images=I&image_latency=T` attaches one of *I* images to each entry.
+    - `/images/<id>.png` is a synthetic PNG image.
+
+    Adding `latency=T` parameter delays the response by *T* milliseconds
+    to simulate remote servers.
+
+    Feeds carry an `ETag` identifying their entries so that a request
+    with matching `If-None-Match` header gets an empty 304 response.
     """
 
+    # Needed for chunked transfer encoding.
+    protocol_version = "HTTP/1.1"
+
     def do_GET(self):
+        start = time.perf_counter()
+
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        # Each request is handled in its own thread so this does not hold up others.
+        latency = int(query.get("latency", [0])[0])
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+        content_type = "application/rss+xml"
+        if url.path == "/fibonacci.xml":
+            etag = f"fibonacci-{FIBONACCI_FEED_LENGTH}"
+            body = numbers_feed(FIBONACCI_FEED_LENGTH)
+        elif (match := FARM_FEED_PATH.match(url.path)) is not None:
+            feed_id = int(match["id"])
+            items = int(query.get("items", [DEFAULT_FARM_FEED_ITEMS])[0])
+            churn = int(query.get("churn", [0])[0])
+            images = int(query.get("images", [0])[0])
+            image_latency = int(query.get("image_latency", [0])[0])
+            poll = self.server.poll(feed_id)
+            newest = items + poll * churn
+            etag = f"farm-{feed_id}-{items}-{newest}"
+
+            def image_url(k: int) -> str:
+                # Images are served from the same host as the feed.
+                return f"http://{self.headers['Host']}" + image_path(
+                    k % images, image_latency
+                )
+
+            body = farm_feed(
+                feed_id,
+                items=items,
+                newest=newest,
+                image_url=image_url if images > 0 else None,
+            )
+        elif (match := IMAGE_PATH.match(url.path)) is not None:
+            content_type = "image/png"
+            etag = f"image-{match['id']}"
+            body = [synthetic_png(int(match["id"]))]
+        else:
+            self.send_error(404)
+            self.server.stats.record(404, 0, time.perf_counter() - start)
+            return
+
+        # Weak because the dates of entries are relative to the current time.
+        etag = f'W/"{etag}"'
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.server.stats.record(304, 0, time.perf_counter() - start)
+            return
+
         self.send_response(200)
-        self.send_header("Content-type", "application/rss+xml")
+        self.send_header("Content-type", content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Transfer-Encoding", "chunked")
         self.end_headers()
-        # Currently, it will only send a feed listing first few fibonacci numbers.
-        self.wfile.write(numbers_feed(FIBONACCI_FEED_LENGTH).encode("utf-8"))
+        bytes_sent = self.write_chunked(body)
+
+        self.server.stats.record(200, bytes_sent, time.perf_counter() - start)
+
+    def write_chunked(self, chunks: Iterable[bytes]) -> int:
+        """
+        Sends the body using chunked transfer encoding
+        so that it does not need to be held in memory as a whole.
+
+        Small chunks are coalesced to limit the number of writes.
+
+        Returns the number of body bytes sent.
+        """
+        bytes_sent = 0
+        buffer = bytearray()
+
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) >= CHUNK_SIZE:
+                bytes_sent += self.write_chunk(buffer)
+                buffer.clear()
+
+        if buffer:
+            bytes_sent += self.write_chunk(buffer)
+
+        # Terminating zero-length chunk.
+        self.wfile.write(b"0\r\n\r\n")
+
+        return bytes_sent
+
+    def write_chunk(self, data: bytes) -> int:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+        return len(data)
+
+    def log_message(self, format, *args):
+        if self.server.log_requests:
+            super().log_message(format, *args)
 
 
 class DataServerThread(threading.Thread):
@@ -25,21 +273,57 @@ class DataServerThread(threading.Thread):
     A thread that starts and stops `DataServer`.
     """
 
-    def __init__(self, host_name="localhost", port=8000):
+    def __init__(self, host_name="localhost", port=8000, log_requests=True):
         super().__init__()
         self.host_name = host_name
         self.port = port
+        self.log_requests = log_requests
+        self.web_server: Optional[DataHTTPServer] = None
+        self.ready = threading.Event()
 
     def run(self):
-        with HTTPServer((self.host_name, self.port), DataServer) as self.web_server:
+        try:
+            self.web_server = DataHTTPServer(
+                (self.host_name, self.port),
+                DataServer,
+                log_requests=self.log_requests,
+            )
+            # Port 0 lets the operating system pick a free one.
+            self.port = self.web_server.server_address[1]
+        finally:
+            self.ready.set()
+
+        with self.web_server:
             print(
-                f"selfoss server started http://{self.host_name}:{self.port}",
+                f"data server started http://{self.host_name}:{self.port}",
                 file=sys.stderr,
             )
 
             self.web_server.serve_forever()
 
-        print("selfoss server stopped.", file=sys.stderr)
+        print("data server stopped.", file=sys.stderr)
+
+    def wait_until_ready(self) -> None:
+        """
+        Blocks until the server accepts connections.
+        """
+        self.ready.wait()
+        if self.web_server is None:
+            raise Exception("data server failed to start")
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Summary of requests served so far: their count, number of bytes sent
+        and response times in seconds.
+        """
+        self.ready.wait()
+        return self.web_server.stats.summary()
+
+    def reset_stats(self) -> None:
+        self.ready.wait()
+        self.web_server.stats.reset()
 
     def stop(self):
-        self.web_server.shutdown()
+        if self.web_server is not None:
+            self.web_server.shutdown()
@@ -0,0 +1,68 @@
+import datetime
+import random
+from typing import Callable, Iterator, Optional
+from .rss import FeedItem, rss_feed
+
+
+WORDS = [
+    "lorem",
+    "ipsum",
+    "dolor",
+    "sit",
+    "amet",
+    "consectetur",
+    "adipiscing",
+    "elit",
+    "sed",
+    "do",
+    "eiusmod",
+    "tempor",
+    "incididunt",
+    "ut",
+    "labore",
+    "et",
+    "dolore",
+    "magna",
+    "aliqua",
+]
+
+
+def item_text(feed_id: int, k: int, words: int = 60) -> str:
+    """
+    Generates a deterministic paragraph of text for *k*-th item of feed *feed_id*.
+    """
+    rng = random.Random(f"{feed_id}:{k}")
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+def farm_feed(
+    feed_id: int,
+    items: int,
+    newest: int,
+    image_url: Optional[Callable[[int], str]] = None,
+) -> Iterator[bytes]:
+    """
+    Generates a RSS feed with id *feed_id* containing *items* entries,
+    the most recent of them being the *newest*-th entry of the feed,
+    as a stream of encoded chunks.
+
+    When *image_url* is given, each entry gets an image enclosure
+    with URL it returns for the entry index.
+
+    The entries only depend on the feed id and their index
+    so that the same entry is identical across polls.
+    """
+    now = datetime.datetime.now()
+
+    entries = (
+        FeedItem(
+            title=f"Feed {feed_id} entry {k}",
+            guid=f"feed-{feed_id}-entry-{k}",
+            description=item_text(feed_id, k),
+            pub_date=now - datetime.timedelta(minutes=newest - k),
+            enclosure=image_url(k) if image_url is not None else None,
+        )
+        for k in range(newest, max(newest - items, 0), -1)
+    )
+
+    return rss_feed(f"Feed {feed_id}", entries)
@@ -1,55 +1,40 @@
 import datetime
-from xml.dom import getDOMImplementation
+from typing import Iterator, Tuple
+from .rss import FeedItem, rss_feed
 
 
-def numbers(n: int):
+def numbers_reversed(n: int) -> Iterator[Tuple[int, int]]:
     """
-    Generates first *n* fibonacci numbers.
+    Generates first *n* fibonacci numbers, starting with the largest one.
+
+    Only the last two numbers are kept in memory,
+    previous ones are obtained by subtraction.
     """
-    numbers = []
     a = 1
     b = 2
     for i in range(n):
-        numbers.append((i, a))
         a, b = b, a + b
+
+    for i in reversed(range(n)):
         yield i, a
+        a, b = b - a, a
 
 
-def numbers_feed(n: int) -> str:
+def numbers_feed(n: int) -> Iterator[bytes]:
     """
-    Generates a RSS feed containing first *n* fibonacci numbers.
+    Generates a RSS feed containing first *n* fibonacci numbers
+    as a stream of encoded chunks.
     """
-    doc = getDOMImplementation().createDocument(None, "rss", None)
-    root = doc.documentElement
-    root.setAttribute("version", "2.0")
-
-    channel = doc.createElement("channel")
-    root.appendChild(channel)
-
-    title = doc.createElement("title")
-    channel.appendChild(title)
-    title.appendChild(doc.createTextNode(f"{n} numbers"))
-
     od = datetime.datetime.now() - datetime.timedelta(minutes=n)
 
-    for k, a in reversed(list(numbers(n))):
-        item = doc.createElement("item")
-        channel.appendChild(item)
-
-        item_title = doc.createElement("title")
-        item.appendChild(item_title)
-        item_title.appendChild(doc.createTextNode(f"{a}"))
-
-        item_guid = doc.createElement("guid")
-        item.appendChild(item_guid)
-        item_guid.setAttribute("isPermaLink", "true")
-        item_guid.appendChild(doc.createTextNode(f"https://en.wikipedia.org/wiki/{a}"))
-
-        d = od + datetime.timedelta(minutes=k)
-        item_pubdate = doc.createElement("pubDate")
-        item.appendChild(item_pubdate)
-        item_pubdate.appendChild(
-            doc.createTextNode(d.strftime("%a, %d %b %Y %H:%M:%S %z"))
+    items = (
+        FeedItem(
+            title=f"{a}",
+            guid=f"https://en.wikipedia.org/wiki/{a}",
+            guid_is_permalink=True,
+            pub_date=od + datetime.timedelta(minutes=k),
         )
+        for k, a in numbers_reversed(n)
+    )
 
-    return doc.toprettyxml(indent=" " * 4)
+    return rss_feed(f"{n} numbers", items)
@@ -0,0 +1,32 @@
+import functools
+import struct
+import zlib
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data))
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def synthetic_png(image_id: int, width: int = 640, height: int = 480) -> bytes:
+    """
+    Generates a PNG image of given size filled with a colour derived from *image_id*
+    so that distinct images have distinct content.
+    """
+    color = bytes(
+        [(image_id * 73) % 256, (image_id * 151) % 256, (image_id * 199) % 256]
+    )
+    # Each scanline starts with a filter type byte.
+    scanline = b"\x00" + color * width
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + png_chunk(b"IDAT", zlib.compress(scanline * height))
+        + png_chunk(b"IEND", b"")
+    )
@@ -0,0 +1,60 @@
+import random
+from collections import defaultdict
+from typing import Dict, Iterator, List, Sequence
+from xml.sax.saxutils import quoteattr
+
+
+# Every this many feeds, one is also listed in a second folder and one invalid outline is added.
+DUPLICATE_EVERY = 50
+INVALID_EVERY = 100
+
+
+def invalid_outlines(feeds: int) -> int:
+    """
+    Number of outlines `synthetic_opml` adds that selfoss should refuse to import.
+    """
+    return feeds // INVALID_EVERY
+
+
+def synthetic_opml(
+    feed_urls: Sequence[str], tags: int = 50, seed: int = 0
+) -> Iterator[bytes]:
+    """
+    Generates an OPML document subscribing to *feed_urls*, grouped into tag folders
+    the way other feed readers export them, as a stream of UTF-8 encoded chunks.
+
+    Some feeds are listed in two folders and some outlines use an unsupported type
+    to exercise merging of tags and error reporting of the importer.
+    """
+    rng = random.Random(f"opml:{seed}")
+    folders: Dict[str, List[str]] = defaultdict(list)
+
+    for feed_id, url in enumerate(feed_urls):
+        outline = f'<outline type="rss" text={quoteattr(f"Feed {feed_id}")} xmlUrl={quoteattr(url)}/>'
+        folder = f"tag-{rng.randrange(tags)}" if tags > 0 else ""
+        folders[folder].append(outline)
+        if tags > 0 and feed_id % DUPLICATE_EVERY == 0:
+            folders[f"tag-{rng.randrange(tags)}"].append(outline)
+        if feed_id % INVALID_EVERY == INVALID_EVERY - 1:
+            folders[folder].append(
+                f'<outline type="html" text="Broken {feed_id}" xmlUrl={quoteattr(url)}/>'
+            )
+
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<opml version="2.0">\n'
+        "    <head><title>Synthetic subscriptions</title></head>\n"
+        "    <body>\n"
+    ).encode("utf-8")
+
+    for folder, outlines in folders.items():
+        indent = "        "
+        if folder:
+            yield f"{indent}<outline text={quoteattr(folder)}>\n".encode("utf-8")
+            indent += "    "
+        for outline in outlines:
+            yield f"{indent}{outline}\n".encode("utf-8")
+        if folder:
+            yield "        </outline>\n".encode("utf-8")
+
+    yield "    </body>\n</opml>\n".encode("utf-8")
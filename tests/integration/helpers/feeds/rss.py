@@ -0,0 +1,49 @@
+import datetime
+from typing import Iterable, Iterator, NamedTuple, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+
+class FeedItem(NamedTuple):
+    title: str
+    guid: str
+    pub_date: datetime.datetime
+    guid_is_permalink: bool = False
+    description: Optional[str] = None
+    # URL of an image attached to the item.
+    enclosure: Optional[str] = None
+
+
+def rss_feed(title: str, items: Iterable[FeedItem]) -> Iterator[bytes]:
+    """
+    Generates a RSS feed as a stream of UTF-8 encoded chunks.
+
+    Items are serialized one by one as they are produced by *items*
+    so the memory use does not depend on the length of the feed.
+    """
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0">\n'
+        "    <channel>\n"
+        f"        <title>{escape(title)}</title>\n"
+    ).encode("utf-8")
+
+    for item in items:
+        chunk = (
+            "        <item>\n"
+            f"            <title>{escape(item.title)}</title>\n"
+            f"            <guid isPermaLink={quoteattr(str(item.guid_is_permalink).lower())}>{escape(item.guid)}</guid>\n"
+        )
+        if item.description is not None:
+            chunk += (
+                f"            <description>{escape(item.description)}</description>\n"
+            )
+        if item.enclosure is not None:
+            chunk += f'            <enclosure url={quoteattr(item.enclosure)} length="0" type="image/png" />\n'
+        chunk += (
+            f"            <pubDate>{item.pub_date.strftime('%a, %d %b %Y %H:%M:%S %z')}</pubDate>\n"
+            "        </item>\n"
+        )
+
+        yield chunk.encode("utf-8")
+
+    yield ("    </channel>\n" "</rss>\n").encode("utf-8")
@@ -1,10 +1,26 @@
 import os
-import time
+import socket
 import unittest
 from pathlib import Path
+from typing import Dict, Optional
 from .data_server import DataServerThread
-from .storage_servers import MySQL, PostgreSQL, SQLite
-from .selfoss_server import SelfossServerThread
+from .storage_servers import create_storage_server, shared_storage_server
+from .seeder import Seeder, create_seeder
+from .selfoss_server import SelfossServerExited, SelfossServerThread
+
+
+# How many ports to try when another process takes the picked one before the server binds it.
+SELFOSS_START_ATTEMPTS = 5
+
+
+def free_port(host_name: str) -> int:
+    """
+    Returns a TCP port that is currently not in use.
+    Something else can take it before the caller binds it so starting a server on it needs to be retried.
+    """
+    with socket.socket() as sock:
+        sock.bind((host_name, 0))
+        return sock.getsockname()[1]
 
 
 class SelfossIntegration(unittest.TestCase):
@@ -13,50 +29,103 @@ class SelfossIntegration(unittest.TestCase):
     It starts selfoss server and a server providing test feeds.
     """
 
+    # Storage backend to use, overrides SELFOSS_TEST_STORAGE_BACKEND environment variable.
+    storage_backend: Optional[str] = None
+
+    # Whether the server providing test feeds should log every request.
+    log_data_requests = True
+
+    # Number of PHP processes serving selfoss requests.
+    selfoss_workers = 1
+
+    # Additional selfoss configuration options.
+    selfoss_config: Dict[str, str] = {}
+
+    # Whether to reuse a storage server started for the first test, clearing it between tests.
+    # Overrides SELFOSS_TEST_SHARE_STORAGE environment variable.
+    share_storage_server: Optional[bool] = None
+
     def setUp(self):
         current_dir = Path(__file__).parent.absolute()
 
+        # Ports are picked dynamically so that multiple instances can run in parallel.
         self.data_host_name = "localhost"
-        self.data_port = 8080
+        self.data_port = 0
         self.selfoss_host_name = "localhost"
-        self.selfoss_port = 8081
         self.selfoss_username = "admin"
         self.selfoss_password = "hunter2"
 
-        storage_backend = os.environ.get("SELFOSS_TEST_STORAGE_BACKEND", "sqlite")
-        if storage_backend == "mysql":
-            self.storage_server = MySQL()
-        elif storage_backend == "postgresql":
-            self.storage_server = PostgreSQL()
-        elif storage_backend == "sqlite":
-            self.storage_server = SQLite()
+        storage_backend = self.storage_backend or os.environ.get(
+            "SELFOSS_TEST_STORAGE_BACKEND", "sqlite"
+        )
+        self.shares_storage_server = (
+            self.share_storage_server
+            if self.share_storage_server is not None
+            else os.environ.get("SELFOSS_TEST_SHARE_STORAGE", "0") == "1"
+        )
+        if self.shares_storage_server:
+            self.storage_server = shared_storage_server(storage_backend)
+            self.storage_server.reset()
         else:
-            raise Exception(f"Unknown storage backend type: {storage_backend}")
-
-        self.storage_server.start()
+            self.storage_server = create_storage_server(storage_backend)
+            self.storage_server.start()
 
         self.selfoss_root = current_dir.parent.parent.parent
 
-        self.selfoss_thread = SelfossServerThread(
-            selfoss_root=self.selfoss_root,
-            password=self.selfoss_password,
-            username=self.selfoss_username,
-            host_name=self.selfoss_host_name,
-            port=self.selfoss_port,
-            storage_config=self.storage_server.get_config(),
-        )
-        self.selfoss_thread.start()
-
         self.data_server_thread = DataServerThread(
             host_name=self.data_host_name,
             port=self.data_port,
+            log_requests=self.log_data_requests,
         )
         self.data_server_thread.start()
 
         # Wait for the servers to become properly initialized.
-        time.sleep(2)
+        try:
+            self.data_server_thread.wait_until_ready()
+            self.data_port = self.data_server_thread.port
+            self.start_selfoss_server()
+        except Exception:
+            # tearDown is not called when setUp fails.
+            self.tearDown()
+            raise
+
+    def start_selfoss_server(self) -> None:
+        """
+        Starts selfoss server on a free port, trying another one
+        when the server fails to bind it.
+        """
+        for attempt in range(SELFOSS_START_ATTEMPTS):
+            self.selfoss_port = free_port(self.selfoss_host_name)
+            self.selfoss_thread = SelfossServerThread(
+                selfoss_root=self.selfoss_root,
+                password=self.selfoss_password,
+                username=self.selfoss_username,
+                host_name=self.selfoss_host_name,
+                port=self.selfoss_port,
+                storage_config=self.storage_server.get_config(),
+                workers=self.selfoss_workers,
+                config=self.selfoss_config,
+            )
+            self.selfoss_thread.start()
+
+            try:
+                self.selfoss_thread.wait_until_ready()
+                return
+            except SelfossServerExited:
+                self.selfoss_thread.join()
+                if attempt == SELFOSS_START_ATTEMPTS - 1:
+                    raise
+
+    def database(self) -> Seeder:
+        """
+        Returns a client for running statements directly against the selfoss database.
+        It needs to be closed after use.
+        """
+        return create_seeder(self.storage_server.get_config())
 
     def tearDown(self):
-        self.selfoss_thread.stop()
-        self.storage_server.stop()
+        if hasattr(self, "selfoss_thread"):
+            self.selfoss_thread.stop()
+        if not self.shares_storage_server:
+            self.storage_server.stop()
         self.data_server_thread.stop()
@@ -0,0 +1,203 @@
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from .selfoss_api import SelfossApi
+
+
+# Queries the web UI and mobile clients make when browsing items.
+ITEM_QUERIES: List[Dict[str, Any]] = [
+    {},
+    {"type": "unread"},
+    {"type": "starred"},
+    {"offset": 50},
+    {"search": "lorem"},
+    {"type": "unread", "search": "dolor"},
+]
+
+
+def get_items(api: SelfossApi, rng: random.Random, item_ids: Sequence[int]) -> None:
+    api.get_items(**rng.choice(ITEM_QUERIES))
+
+
+def mark_read(api: SelfossApi, rng: random.Random, item_ids: Sequence[int]) -> None:
+    api.mark_read(rng.choice(item_ids), target=rng.random() < 0.8)
+
+
+def mark_starred(api: SelfossApi, rng: random.Random, item_ids: Sequence[int]) -> None:
+    api.mark_starred(rng.choice(item_ids), target=rng.random() < 0.5)
+
+
+def get_stats(api: SelfossApi, rng: random.Random, item_ids: Sequence[int]) -> None:
+    api.get_stats()
+
+
+def refresh_all(api: SelfossApi, rng: random.Random, item_ids: Sequence[int]) -> None:
+    api.refresh_all()
+
+
+Operation = Callable[[SelfossApi, random.Random, Sequence[int]], None]
+
+OPERATIONS: Dict[str, Operation] = {
+    "get_items": get_items,
+    "mark_read": mark_read,
+    "mark_starred": mark_starred,
+    "get_stats": get_stats,
+    "refresh_all": refresh_all,
+}
+
+DEFAULT_MIX = {
+    "get_items": 70,
+    "mark_read": 20,
+    "mark_starred": 9,
+    "refresh_all": 1,
+}
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """
+    Parses operation weights in `name=weight,name=weight` format.
+    """
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name}")
+        weights[name] = int(weight)
+
+    return weights
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """
+    Returns *p*-th percentile of *sorted_values* using the nearest-rank method.
+    """
+    if not sorted_values:
+        return 0.0
+
+    rank = max(
+        0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+class LatencyRecorder:
+    """
+    Thread-safe collection of latencies and errors per endpoint.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, latency: float, error: bool = False) -> None:
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            if error:
+                self.errors[endpoint] += 1
+
+    def summary(self, duration: float) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            endpoints = {
+                endpoint: sorted(latencies)
+                for endpoint, latencies in self.latencies.items()
+            }
+            errors = dict(self.errors)
+
+        return {
+            endpoint: {
+                "requests": len(latencies),
+                "errors": errors.get(endpoint, 0),
+                "throughput": len(latencies) / duration,
+                "mean": sum(latencies) / len(latencies),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1],
+            }
+            for endpoint, latencies in endpoints.items()
+        }
+
+
+class LoadGenerator:
+    """
+    Drives concurrent virtual users, each with its own `SelfossApi` session,
+    through a weighted mix of operations.
+
+    Every user issues requests one after another, paced so that all users together
+    approach *rate* requests per second (or as fast as possible when it is `None`).
+    """
+
+    def __init__(
+        self,
+        api_factory: Callable[[], SelfossApi],
+        item_ids: Sequence[int],
+        users: int,
+        duration: float,
+        rate: Optional[float] = None,
+        mix: Optional[Dict[str, int]] = None,
+        seed: int = 0,
+    ):
+        self.api_factory = api_factory
+        self.item_ids = item_ids
+        self.users = users
+        self.duration = duration
+        self.rate = rate
+        self.mix = mix or DEFAULT_MIX
+        self.seed = seed
+        self.recorder = LatencyRecorder()
+
+    def virtual_user(self, user: int, deadline: float) -> None:
+        rng = random.Random(self.seed + user)
+        api = self.api_factory()
+        names = list(self.mix.keys())
+        weights = list(self.mix.values())
+        interval = self.users / self.rate if self.rate else 0.0
+        # Spread the users over the first interval so that they do not fire at once.
+        next_start = time.perf_counter() + rng.random() * interval
+
+        while True:
+            now = time.perf_counter()
+            if next_start > now:
+                time.sleep(next_start - now)
+            if time.perf_counter() >= deadline:
+                break
+
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                OPERATIONS[name](api, rng, self.item_ids)
+                error = False
+            except Exception:
+                error = True
+            self.recorder.record(name, time.perf_counter() - start, error)
+
+            # Keep a fixed schedule; when running late, do not try to catch up in a burst.
+            next_start = max(next_start + interval, start)
+
+    def run(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        deadline = start + self.duration
+
+        with ThreadPoolExecutor(max_workers=self.users) as executor:
+            futures = [
+                executor.submit(self.virtual_user, user, deadline)
+                for user in range(self.users)
+            ]
+            for future in futures:
+                future.result()
+
+        elapsed = time.perf_counter() - start
+
+        return {
+            "users": self.users,
+            "target_rate": self.rate,
+            "duration": elapsed,
+            "mix": self.mix,
+            "endpoints": self.recorder.summary(elapsed),
+        }
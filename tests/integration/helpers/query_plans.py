@@ -0,0 +1,290 @@
+import json
+import re
+import subprocess
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Set, Tuple
+from .seeder import MySQLSeeder, PostgreSQLSeeder, SQLiteSeeder
+from .selfoss_api import SelfossApi
+from .server_metrics import read_metrics
+
+
+ITEM_TYPES = ["newest", "unread", "starred"]
+
+# Parameter placeholder in PDO statement, not matching PostgreSQL casts like `::int`.
+PLACEHOLDER = re.compile(r"(?<![:\w]):(?P<name>\w+)")
+
+
+class Plan(NamedTuple):
+    """
+    Problematic parts of query plans of all statements executed by a single request.
+    """
+
+    # Tables read in full.
+    full_scans: Set[str]
+    # Number of sorts that cannot use an index (SQLite, MariaDB) or spill to disk (PostgreSQL).
+    temp_sorts: int
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "full_scans": sorted(self.full_scans),
+            "temp_sorts": self.temp_sorts,
+        }
+
+    @staticmethod
+    def from_json(data: Dict[str, Any]) -> "Plan":
+        return Plan(set(data["full_scans"]), data["temp_sorts"])
+
+    def __or__(self, other: "Plan") -> "Plan":
+        return Plan(
+            self.full_scans | other.full_scans, self.temp_sorts + other.temp_sorts
+        )
+
+
+NO_PROBLEMS = Plan(set(), 0)
+
+
+def item_requests(
+    tag: str, source: int, search: str, cursor: Dict[str, Any]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generates names and parameters of `/items` requests
+    covering every combination of filters the client can produce.
+    """
+    scopes = [("all", {}), ("tag", {"tag": tag}), ("source", {"source": source})]
+    searches = [("", {}), ("search", {"search": search})]
+    pages = [
+        ("first", {}),
+        ("offset", {"offset": 1000}),
+        ("seek", {"fromDatetime": cursor["datetime"], "fromId": cursor["id"]}),
+    ]
+
+    for item_type in ITEM_TYPES:
+        for scope_name, scope in scopes:
+            for search_name, search_params in searches:
+                for page_name, page in pages:
+                    name = "/".join(
+                        part
+                        for part in [item_type, scope_name, search_name, page_name]
+                        if part
+                    )
+                    yield name, {
+                        "type": item_type,
+                        **scope,
+                        **search_params,
+                        **page,
+                    }
+
+
+def capture_statements(
+    metrics_path: Path, requests: Dict[str, Callable[[], Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Performs each request and returns the SQL statements selfoss executed for it.
+    Requires selfoss to run with `metrics_queries` option.
+    """
+    statements = {}
+    for name, request in requests.items():
+        seen = len(read_metrics(metrics_path))
+        request()
+        statements[name] = [
+            statement
+            for record in read_metrics(metrics_path)[seen:]
+            for statement in record.get("statements", [])
+        ]
+
+    return statements
+
+
+def api_requests(
+    api: SelfossApi, tag: str, source: int, search: str
+) -> Dict[str, Callable[[], Any]]:
+    """
+    Returns requests exercising item DAO methods: `get` with all filter combinations,
+    `sync`, `statuses` and `stats`.
+    """
+    # Cursor in the middle of the item list.
+    stats = api.get_stats()
+    middle = api.get_items(items=1, offset=stats["total"] // 2)
+    assert len(middle) > 0, "There need to be items to query."
+    cursor = {"datetime": middle[0]["datetime"], "id": middle[0]["id"]}
+
+    requests: Dict[str, Callable[[], Any]] = {
+        name: lambda params=params: api.get_items(**params)
+        for name, params in item_requests(tag, source, search, cursor)
+    }
+    requests["stats"] = api.get_stats
+    requests["sync/items"] = lambda: api.sync(
+        "2000-01-01T00:00:00Z",
+        itemsSinceId=cursor["id"],
+        itemsNotBefore=cursor["datetime"],
+        itemsHowMany=200,
+    )
+    requests["sync/statuses"] = lambda: api.sync(cursor["datetime"])
+
+    return requests
+
+
+def literal(value: Any, booleans: Tuple[str, str], escape_backslash: bool) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return booleans[value]
+    if isinstance(value, (int, float)):
+        return str(value)
+
+    value = str(value).replace("'", "''")
+    if escape_backslash:
+        value = value.replace("\\", "\\\\")
+
+    return f"'{value}'"
+
+
+def interpolate(
+    sql: str,
+    params: Dict[str, Any],
+    booleans: Tuple[str, str],
+    escape_backslash: bool = False,
+) -> str:
+    """
+    Replaces PDO placeholders with literal values so that the statement can be explained
+    by a command line client.
+    """
+
+    def replace(match: re.Match) -> str:
+        name = ":" + match["name"]
+        if name not in params:
+            return match[0]
+
+        return literal(params[name], booleans, escape_backslash)
+
+    return PLACEHOLDER.sub(replace, sql)
+
+
+class Explainer(ABC):
+    @abstractmethod
+    def explain(self, sql: str, params: Dict[str, Any]) -> Plan:
+        pass
+
+    def explain_request(self, statements: List[Dict[str, Any]]) -> Plan:
+        plan = NO_PROBLEMS
+        for statement in statements:
+            # Only queries are interesting and other statements would be actually executed.
+            if statement["sql"].lstrip().upper().startswith("SELECT"):
+                plan |= self.explain(statement["sql"], statement["params"])
+
+        return plan
+
+
+class SQLiteExplainer(Explainer):
+    # Table scans are reported as `SCAN items` (or `SCAN TABLE items` in older versions),
+    # scans of an index add `USING INDEX`.
+    FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?$")
+
+    def __init__(self, client: SQLiteSeeder):
+        self.connection = client.connection
+
+    def explain(self, sql: str, params: Dict[str, Any]) -> Plan:
+        rows = self.connection.execute(
+            f"EXPLAIN QUERY PLAN {sql}",
+            {name.lstrip(":"): value for name, value in params.items()},
+        ).fetchall()
+
+        full_scans = set()
+        temp_sorts = 0
+        for *_, detail in rows:
+            if (match := self.FULL_SCAN.match(detail)) is not None:
+                full_scans.add(match["table"])
+            if detail.startswith("USE TEMP B-TREE"):
+                temp_sorts += 1
+
+        return Plan(full_scans, temp_sorts)
+
+
+class MySQLExplainer(Explainer):
+    def __init__(self, client: MySQLSeeder):
+        self.client = client
+
+    def explain(self, sql: str, params: Dict[str, Any]) -> Plan:
+        output = subprocess.check_output(
+            # Keep column names.
+            [
+                argument
+                for argument in self.client.client_command()
+                if argument != "--skip-column-names"
+            ]
+            + [
+                "--execute=EXPLAIN "
+                + interpolate(sql, params, ("0", "1"), escape_backslash=True),
+            ],
+            encoding="utf-8",
+        )
+        header, *rows = [line.split("\t") for line in output.splitlines()]
+
+        full_scans = set()
+        temp_sorts = 0
+        for row in rows:
+            row = dict(zip(header, row))
+            if row["type"] == "ALL":
+                full_scans.add(row["table"])
+            if "filesort" in row["Extra"] or "temporary" in row["Extra"]:
+                temp_sorts += 1
+
+        return Plan(full_scans, temp_sorts)
+
+
+class PostgreSQLExplainer(Explainer):
+    def __init__(self, client: PostgreSQLSeeder):
+        self.client = client
+
+    def explain(self, sql: str, params: Dict[str, Any]) -> Plan:
+        # ANALYZE is needed to find out whether sorts fit into memory.
+        output = subprocess.check_output(
+            self.client.client_command()
+            + [
+                "--command=EXPLAIN (ANALYZE, FORMAT JSON) "
+                + interpolate(sql, params, ("FALSE", "TRUE")),
+            ],
+            encoding="utf-8",
+        )
+
+        full_scans = set()
+        temp_sorts = 0
+        nodes = [plan["Plan"] for plan in json.loads(output)]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get("Plans", []))
+            if node["Node Type"] == "Seq Scan":
+                full_scans.add(node["Relation Name"])
+            if node.get("Sort Space Type") == "Disk":
+                temp_sorts += 1
+
+        return Plan(full_scans, temp_sorts)
+
+
+def create_explainer(config: Dict[str, Any]) -> Explainer:
+    if config["db_type"] == "sqlite":
+        return SQLiteExplainer(SQLiteSeeder(config))
+    elif config["db_type"] == "mysql":
+        return MySQLExplainer(MySQLSeeder(config))
+    elif config["db_type"] == "pgsql":
+        return PostgreSQLExplainer(PostgreSQLSeeder(config))
+    else:
+        raise Exception(f"Unknown database type: {config['db_type']}")
+
+
+def regressions(baseline: Dict[str, Plan], plans: Dict[str, Plan]) -> List[str]:
+    """
+    Describes requests whose plans got worse than in the baseline.
+    """
+    problems = []
+    for name, plan in plans.items():
+        previous = baseline.get(name, NO_PROBLEMS)
+        if new_scans := plan.full_scans - previous.full_scans:
+            problems.append(f"{name}: full scan of {', '.join(sorted(new_scans))}")
+        if plan.temp_sorts > previous.temp_sorts:
+            problems.append(
+                f"{name}: {plan.temp_sorts} temporary sorts (was {previous.temp_sorts})"
+            )
+
+    return problems
@@ -0,0 +1,446 @@
+import argparse
+import datetime
+import html
+import json
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .data_server import farm_feed_path
+from .feeds.farm import item_text
+
+
+SOURCE_COLUMNS = ["id", "title", "tags", "spout", "params", "lastupdate", "lastentry"]
+
+ITEM_COLUMNS = [
+    "datetime",
+    "title",
+    "content",
+    "thumbnail",
+    "icon",
+    "unread",
+    "starred",
+    "source",
+    "uid",
+    "link",
+    "updatetime",
+    "author",
+    "lastseen",
+]
+
+TAG_COLUMNS = ["tag", "color"]
+
+AUTHORS = [None, None, "Alice", "Bob", "Carol", "Dave", "Eve"]
+
+# Number of distinct item bodies, generating one for every item would be too slow.
+CONTENT_POOL_SIZE = 500
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass
+class SeedSpec:
+    """
+    Shape of the data to seed the database with.
+    """
+
+    sources: int = 1000
+    items: int = 1_000_000
+    tags: int = 50
+    # Items are deleted by cleanup when they were not seen in a feed for this long.
+    max_age_days: int = 30
+    starred_ratio: float = 0.01
+    thumbnail_ratio: float = 0.3
+    # Base URL of data server to point the sources to.
+    feed_base_uri: str = "http://localhost:8080"
+    seed: int = 0
+
+
+def source_rows(spec: SeedSpec, first_id: int) -> Iterator[Tuple[Any, ...]]:
+    """
+    Generates sources pointing to data server farm feeds, tagged with
+    a handful of tags, popular tags being more common.
+    """
+    rng = random.Random(f"sources:{spec.seed}")
+    tag_weights = list(accumulate(1 / (rank + 1) for rank in range(spec.tags)))
+    now = int(time.time())
+
+    for feed_id in range(spec.sources):
+        tags = set()
+        if spec.tags > 0:
+            tags = set(
+                rng.choices(
+                    range(spec.tags), cum_weights=tag_weights, k=rng.randint(0, 2)
+                )
+            )
+        params = json.dumps({"url": spec.feed_base_uri + farm_feed_path(feed_id)})
+
+        yield (
+            first_id + feed_id,
+            f"Feed {feed_id}",
+            ",".join(f"tag-{tag}" for tag in sorted(tags)),
+            "spouts\\rss\\feed",
+            # selfoss stores the parameters HTML-encoded.
+            html.escape(params),
+            now,
+            now,
+        )
+
+
+def tag_rows(spec: SeedSpec) -> Iterator[Tuple[Any, ...]]:
+    rng = random.Random(f"tags:{spec.seed}")
+    for tag in range(spec.tags):
+        yield f"tag-{tag}", f"#{rng.randrange(0x1000000):06x}"
+
+
+def item_rows(spec: SeedSpec, first_source_id: int) -> Iterator[Tuple[Any, ...]]:
+    """
+    Generates items in the order selfoss would insert them, oldest first.
+
+    Most items are recent; the older an item, the more likely it was already read.
+    A few sources produce most of the items.
+    """
+    rng = random.Random(f"items:{spec.seed}")
+    contents = [item_text(spec.seed, k) for k in range(CONTENT_POOL_SIZE)]
+    # Zipf-like distribution of items between sources.
+    source_weights = list(
+        accumulate(1 / (rank + 1) ** 0.8 for rank in range(spec.sources))
+    )
+    sources = range(first_source_id, first_source_id + spec.sources)
+    now = datetime.datetime.now().replace(microsecond=0)
+    now_sql = now.strftime(DATETIME_FORMAT)
+    max_age = spec.max_age_days * 24 * 60 * 60
+    # Items younger than this are mostly unread.
+    unread_age = max_age / 10
+
+    for i in range(spec.items):
+        # Quadratic spacing makes recent items denser.
+        age = max_age * (1 - (i + 0.5) / spec.items) ** 2
+        source = rng.choices(sources, cum_weights=source_weights)[0]
+        date = (now - datetime.timedelta(seconds=age)).strftime(DATETIME_FORMAT)
+        unread = rng.random() < 0.9 * (1 - min(age / unread_age, 1)) + 0.02
+        starred = rng.random() < spec.starred_ratio
+        thumbnail = None
+        if rng.random() < spec.thumbnail_ratio:
+            thumbnail = f"{i:040x}.jpg"
+
+        yield (
+            date,
+            f"Seeded entry {i}",
+            contents[i % CONTENT_POOL_SIZE],
+            thumbnail,
+            f"{source:040x}.png",
+            unread,
+            starred,
+            source,
+            f"seeded-{i}",
+            f"{spec.feed_base_uri}/entries/{i}",
+            now_sql,
+            rng.choice(AUTHORS),
+            now_sql,
+        )
+
+
+def counters_statement(prefix: str) -> str:
+    """
+    Recalculates item counters selfoss keeps with sources (same as `php cliupdate.php counters`),
+    since loading items directly bypasses their maintenance.
+    """
+    counts = {
+        "itemcount": "",
+        "unreadcount": " AND items.unread",
+        "starredcount": " AND items.starred",
+    }
+    assignments = ", ".join(
+        f"{column} = (SELECT COUNT(*) FROM {prefix}items AS items WHERE items.source = {prefix}sources.id{condition})"
+        for column, condition in counts.items()
+    )
+
+    return f"UPDATE {prefix}sources SET {assignments}"
+
+
+def text_field(value: Any, booleans: Tuple[str, str]) -> str:
+    """
+    Formats a value for MariaDB `LOAD DATA` and PostgreSQL `COPY` text format.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return booleans[value]
+
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def text_lines(
+    rows: Iterable[Tuple[Any, ...]], booleans: Tuple[str, str]
+) -> Iterator[str]:
+    for row in rows:
+        yield "\t".join(text_field(value, booleans) for value in row) + "\n"
+
+
+class Seeder(ABC):
+    """
+    Loads rows into selfoss database using the fastest path the backend offers.
+    The tables need to be already created by selfoss.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.prefix = config.get("db_prefix", "")
+
+    @abstractmethod
+    def scalar(self, query: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def execute(self, statement: str) -> None:
+        pass
+
+    @abstractmethod
+    def load(
+        self, table: str, columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]
+    ) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """
+        Releases the connection, for seeders used only to run statements.
+        """
+        pass
+
+    def seed(self, spec: SeedSpec) -> Dict[str, float]:
+        """
+        Fills the database and returns how long each table took to load.
+        """
+        first_source_id = (
+            int(self.scalar(f"SELECT MAX(id) FROM {self.prefix}sources") or 0) + 1
+        )
+        timings = {}
+
+        start = time.perf_counter()
+        self.load("tags", TAG_COLUMNS, tag_rows(spec))
+        timings["tags"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.load("sources", SOURCE_COLUMNS, source_rows(spec, first_source_id))
+        timings["sources"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.load("items", ITEM_COLUMNS, item_rows(spec, first_source_id))
+        timings["items"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.execute(counters_statement(self.prefix))
+        timings["counters"] = time.perf_counter() - start
+
+        self.finish()
+
+        return timings
+
+
+class SQLiteSeeder(Seeder):
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        # selfoss does not use prefix for SQLite.
+        self.prefix = ""
+        self.connection = sqlite3.connect(config["db_file"])
+
+    def scalar(self, query: str) -> Optional[str]:
+        return self.connection.execute(query).fetchone()[0]
+
+    def execute(self, statement: str) -> None:
+        with self.connection:
+            self.connection.execute(statement)
+
+    def load(
+        self, table: str, columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]
+    ) -> None:
+        placeholders = ", ".join("?" for _ in columns)
+        # Single transaction so that there is only one sync to disk.
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                rows,
+            )
+
+    def finish(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class MySQLSeeder(Seeder):
+    def client_command(self) -> List[str]:
+        command = ["mariadb", "--batch", "--skip-column-names"]
+        if "db_socket" in self.config:
+            command.append(f"--socket={self.config['db_socket']}")
+        else:
+            command.append(f"--host={self.config.get('db_host', 'localhost')}")
+            if "db_port" in self.config:
+                command.append(f"--port={self.config['db_port']}")
+        command += [
+            f"--user={self.config.get('db_username', 'root')}",
+            f"--password={self.config.get('db_password', '')}",
+            f"--database={self.config.get('db_database', 'selfoss')}",
+        ]
+
+        return command
+
+    def scalar(self, query: str) -> Optional[str]:
+        result = subprocess.check_output(
+            self.client_command() + [f"--execute={query}"],
+            encoding="utf-8",
+        ).strip()
+
+        return None if result == "NULL" else result
+
+    def execute(self, statement: str) -> None:
+        subprocess.check_call(self.client_command() + [f"--execute={statement}"])
+
+    def load(
+        self, table: str, columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]
+    ) -> None:
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", suffix=".tsv"
+        ) as data_file:
+            data_file.writelines(text_lines(rows, ("0", "1")))
+            data_file.flush()
+
+            subprocess.check_call(
+                self.client_command()
+                + [
+                    "--local-infile=1",
+                    f"--execute=LOAD DATA LOCAL INFILE '{data_file.name}' INTO TABLE {self.prefix}{table} CHARACTER SET utf8mb4 ({', '.join(columns)})",
+                ]
+            )
+
+
+class PostgreSQLSeeder(Seeder):
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        # selfoss does not use prefix for PostgreSQL.
+        self.prefix = ""
+
+    def client_command(self) -> List[str]:
+        command = [
+            "psql",
+            f"--host={self.config.get('db_socket', self.config.get('db_host', 'localhost'))}",
+            f"--dbname={self.config.get('db_database', 'selfoss')}",
+            "--tuples-only",
+            "--no-align",
+            "--quiet",
+            "--set=ON_ERROR_STOP=1",
+        ]
+        if "db_port" in self.config:
+            command.append(f"--port={self.config['db_port']}")
+        if "db_username" in self.config:
+            command.append(f"--username={self.config['db_username']}")
+
+        return command
+
+    def scalar(self, query: str) -> Optional[str]:
+        result = subprocess.check_output(
+            self.client_command() + [f"--command={query}"],
+            encoding="utf-8",
+        ).strip()
+
+        return result or None
+
+    def execute(self, statement: str) -> None:
+        subprocess.check_call(self.client_command() + [f"--command={statement}"])
+
+    def load(
+        self, table: str, columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]
+    ) -> None:
+        # Stream the rows so that they never need to be held in memory.
+        with subprocess.Popen(
+            self.client_command()
+            + [f"--command=COPY {table} ({', '.join(columns)}) FROM STDIN"],
+            stdin=subprocess.PIPE,
+            encoding="utf-8",
+        ) as psql:
+            psql.stdin.writelines(text_lines(rows, ("f", "t")))
+            psql.stdin.close()
+
+        if psql.returncode != 0:
+            raise subprocess.CalledProcessError(psql.returncode, psql.args)
+
+    def finish(self) -> None:
+        # Explicit ids do not advance the sequence.
+        self.scalar(
+            "SELECT setval(pg_get_serial_sequence('sources', 'id'), MAX(id)) FROM sources"
+        )
+
+
+SEEDERS = {
+    "sqlite": SQLiteSeeder,
+    "mysql": MySQLSeeder,
+    "pgsql": PostgreSQLSeeder,
+}
+
+
+def create_seeder(config: Dict[str, Any]) -> Seeder:
+    """
+    Returns a seeder for the database described by selfoss configuration options,
+    as returned by `Storage.get_config`.
+    """
+    try:
+        seeder = SEEDERS[config.get("db_type")]
+    except KeyError:
+        raise Exception(f"Unknown database type: {config.get('db_type')}")
+
+    return seeder(config)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fills selfoss database with generated sources, tags and items",
+    )
+    parser.add_argument("--db-type", choices=SEEDERS.keys(), default="sqlite")
+    parser.add_argument("--db-file")
+    parser.add_argument("--db-socket")
+    parser.add_argument("--db-host")
+    parser.add_argument("--db-port")
+    parser.add_argument("--db-username")
+    parser.add_argument("--db-password")
+    parser.add_argument("--db-database")
+    parser.add_argument("--db-prefix")
+    parser.add_argument("--sources", type=int, default=SeedSpec.sources)
+    parser.add_argument("--items", type=int, default=SeedSpec.items)
+    parser.add_argument("--tags", type=int, default=SeedSpec.tags)
+    parser.add_argument("--feed-base-uri", default=SeedSpec.feed_base_uri)
+    parser.add_argument("--seed", type=int, default=SeedSpec.seed)
+
+    args = vars(parser.parse_args())
+    config = {
+        key: value
+        for key, value in args.items()
+        if key.startswith("db_") and value is not None
+    }
+    spec = SeedSpec(
+        sources=args["sources"],
+        items=args["items"],
+        tags=args["tags"],
+        feed_base_uri=args["feed_base_uri"],
+        seed=args["seed"],
+    )
+
+    timings = create_seeder(config).seed(spec)
+    print(timings, file=sys.stderr)
@@ -1,4 +1,16 @@
+import datetime
 import requests
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# PHP only parses first 1000 form fields by default (`max_input_vars`)
+# and each status update consists of three fields.
+STATUS_UPDATES_PER_REQUEST = 300
+
+# selfoss will not return more items per request than this
+# (unless `items_perpage` option is larger).
+MAX_PAGE_SIZE = 200
 
 
 class SelfossApi:
@@ -43,6 +55,58 @@ class SelfossApi:
 
         return r.json()
 
+    def iter_item_pages(
+        self, page_size: int = MAX_PAGE_SIZE, **filters
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Generates pages of items matching the filters using seek pagination.
+
+        Each page continues after the last item of the previous one
+        so, unlike `offset`, the server does not need to skip the preceding items.
+        """
+        params = dict(filters)
+        while True:
+            page = self.get_items(items=page_size, **params)
+            # Pages can be shorter even when there are more items
+            # since the server filters out items with hidden tags after the fact.
+            if len(page) == 0:
+                return
+
+            yield page
+
+            params["fromDatetime"] = page[-1]["datetime"]
+            params["fromId"] = page[-1]["id"]
+
+    def iter_items(
+        self, page_size: int = MAX_PAGE_SIZE, **filters
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generates all items matching the filters, fetching them page by page.
+        """
+        for page in self.iter_item_pages(page_size, **filters):
+            yield from page
+
+    def sync(self, since: str, **params):
+        r = self.session.get(
+            f"{self.base_uri}/items/sync",
+            params={
+                "since": since,
+                **params,
+            },
+        )
+        r.raise_for_status()
+
+        return r.json()
+
+    def get_stats(self, **params):
+        r = self.session.get(
+            f"{self.base_uri}/stats",
+            params=params,
+        )
+        r.raise_for_status()
+
+        return r.json()
+
     def mark_read(self, id: int, target: bool = True) -> bool:
         endpoint = "mark" if target else "unmark"
         r = self.session.post(
@@ -69,6 +133,73 @@ class SelfossApi:
         response = r.json()
         return "success" in response and response["success"] == True
 
+    def mark_read_many(self, ids: List[int], target: bool = True) -> bool:
+        """
+        Marks items with given ids as (un)read using as few requests as possible.
+        """
+        if not target:
+            # There is no batch variant of the unmark endpoint.
+            return self.update_statuses_many([{"id": id, "unread": True} for id in ids])
+
+        r = self.session.post(
+            f"{self.base_uri}/mark",
+            json=ids,
+        )
+        r.raise_for_status()
+        response = r.json()
+        return "success" in response and response["success"] == True
+
+    def mark_starred_many(self, ids: List[int], target: bool = True) -> bool:
+        """
+        Marks items with given ids as (un)starred using as few requests as possible.
+        """
+        return self.update_statuses_many([{"id": id, "starred": target} for id in ids])
+
+    def update_statuses_many(self, statuses: List[Dict[str, Any]]) -> bool:
+        """
+        Sends item status changes split into batches small enough for PHP to accept.
+        """
+        for i in range(0, len(statuses), STATUS_UPDATES_PER_REQUEST):
+            response = self.update_statuses(
+                statuses[i : i + STATUS_UPDATES_PER_REQUEST]
+            )
+            if "lastUpdate" not in response:
+                return False
+
+        return True
+
+    def update_statuses(
+        self,
+        statuses: List[Dict[str, Any]],
+        since: Optional[datetime.datetime] = None,
+        **params,
+    ):
+        """
+        Sends a batch of item status changes the way the web client does
+        when synchronizing and returns the sync response.
+
+        Each status is a dictionary containing an `id` and either `unread` or `starred` boolean.
+        The change is only applied if it is newer than the last update of the item.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        data = {
+            "since": (since or now).isoformat(),
+            **params,
+        }
+        for index, status in enumerate(statuses):
+            for key, value in {"datetime": now.isoformat(), **status}.items():
+                if isinstance(value, bool):
+                    value = "true" if value else "false"
+                data[f"updatedStatuses[{index}][{key}]"] = str(value)
+
+        r = self.session.post(
+            f"{self.base_uri}/items/sync",
+            data=data,
+        )
+        r.raise_for_status()
+
+        return r.json()
+
     def add_source(self, spout: str, **params):
         r = self.session.post(
             f"{self.base_uri}/source",
@@ -81,6 +212,21 @@ class SelfossApi:
 
         return r.json()
 
+    def import_opml(self, path: Path):
+        """
+        Uploads OPML file the same way as the import page in the web client.
+        """
+        with open(path, "rb") as opml:
+            r = self.session.post(
+                f"{self.base_uri}/opml",
+                files={
+                    "opml": (path.name, opml, "text/x-opml+xml"),
+                },
+            )
+        r.raise_for_status()
+
+        return r.json()
+
     def refresh_all(self):
         r = self.session.get(
             f"{self.base_uri}/update",
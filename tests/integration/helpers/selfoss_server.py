@@ -1,10 +1,21 @@
 import bcrypt
 import os
+import signal
 import subprocess
 import tempfile
 import threading
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
+from .waiting import port_open, wait_until
+
+
+class SelfossServerExited(Exception):
+    """
+    Raised when the server exits before it starts accepting connections,
+    most often because the port was taken in the meanwhile.
+    """
+
+    pass
 
 
 class SelfossServerThread(threading.Thread):
@@ -20,6 +31,8 @@ class SelfossServerThread(threading.Thread):
         host_name: str,
         port: int,
         storage_config: Dict[str, str],
+        workers: int = 1,
+        config: Optional[Dict[str, str]] = None,
     ):
         super().__init__()
         self.selfoss_root = selfoss_root
@@ -28,12 +41,25 @@ class SelfossServerThread(threading.Thread):
         self.host_name = host_name
         self.port = port
         self.storage_config = storage_config
+        self.workers = workers
+        self.config = config or {}
+        self.proc: Optional[subprocess.Popen] = None
+        # Environment the server runs with, available while the server runs.
+        self.env: Optional[Dict[str, str]] = None
+        self.php_ini = Path(__file__).parent.parent.absolute() / "php.ini"
+        # JSON lines with metrics of each request, available while the server runs.
+        self.metrics_path: Optional[Path] = None
+        # Directory with thumbnails and favicons, available while the server runs.
+        self.data_dir: Optional[Path] = None
+        self.started = threading.Event()
 
     def run(self):
         with tempfile.TemporaryDirectory() as temp_dir:
             # Set up data directories.
             temp_dir = Path(temp_dir)
             data_dir = temp_dir / "data"
+            self.data_dir = data_dir
+            self.metrics_path = temp_dir / "metrics.jsonl"
             (data_dir / "thumbnails").mkdir(parents=True)
             (data_dir / "favicons").mkdir(parents=True)
 
@@ -54,12 +80,17 @@ class SelfossServerThread(threading.Thread):
                 "SELFOSS_DB_TYPE": "sqlite",
                 "SELFOSS_PUBLIC": "1",
                 "SELFOSS_LOGGER_LEVEL": "DEBUG",
+                "SELFOSS_METRICS_DESTINATION": f"file:{self.metrics_path}",
             }
 
-            for key, value in self.storage_config.items():
+            if self.workers > 1:
+                # Let the built-in server handle requests in parallel like PHP-FPM would.
+                test_env["PHP_CLI_SERVER_WORKERS"] = str(self.workers)
+
+            for key, value in {**self.config, **self.storage_config}.items():
                 test_env[f"SELFOSS_{key.upper()}"] = value
 
-            current_dir = Path(__file__).parent.absolute()
+            self.env = test_env
 
             php_command = [
                 "php",
@@ -69,19 +100,71 @@ class SelfossServerThread(threading.Thread):
                 "-S",
                 f"{self.host_name}:{self.port}",
                 "-c",
-                current_dir.parent / "php.ini",
+                self.php_ini,
                 self.selfoss_root / "run.php",
             ]
 
             # Create the subprocess.
-            self.proc = subprocess.Popen(
-                php_command,
-                env=test_env,
-                cwd=self.selfoss_root,
-            )
+            try:
+                self.proc = subprocess.Popen(
+                    php_command,
+                    env=test_env,
+                    cwd=self.selfoss_root,
+                    # Allow stopping the worker processes together with the main one.
+                    start_new_session=True,
+                )
+            finally:
+                self.started.set()
 
             # Wait for it to finish.
             self.proc.communicate()
 
+    def wait_until_ready(self) -> None:
+        """
+        Blocks until the server accepts connections.
+        """
+        self.started.wait()
+        if self.proc is None:
+            raise Exception("selfoss server failed to start")
+
+        def ready() -> bool:
+            if self.proc.poll() is not None:
+                raise SelfossServerExited(
+                    f"selfoss server exited with status {self.proc.returncode}"
+                )
+
+            return port_open(self.host_name, self.port)
+
+        wait_until(ready, "selfoss server")
+
+    def run_cli(self, *args: str) -> None:
+        """
+        Runs `cliupdate.php` with given arguments against the same data as the server.
+        """
+        self.started.wait()
+        if self.env is None:
+            raise Exception("selfoss server is not running")
+
+        subprocess.run(
+            [
+                "php",
+                "-d",
+                "variables_order=EGPCS",
+                "-c",
+                self.php_ini,
+                self.selfoss_root / "cliupdate.php",
+                *args,
+            ],
+            env=self.env,
+            cwd=self.selfoss_root,
+            check=True,
+        )
+
     def stop(self):
-        self.proc.kill()
+        if self.proc is not None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                # Already exited.
+                pass
+            self.proc.wait()
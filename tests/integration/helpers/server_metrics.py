@@ -0,0 +1,101 @@
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+from urllib.parse import urlsplit
+
+
+SERVER_TIMING_METRIC = re.compile(r"(?P<name>[^;,\s]+)(?P<params>[^,]*)")
+
+SERVER_TIMING_DURATION = re.compile(r";\s*dur=(?P<duration>[0-9.]+)")
+
+
+def route(method: str, url: str) -> str:
+    """
+    Returns route identifier in the format used by selfoss metrics.
+    """
+    path = re.sub(r"/[0-9]+(?=/|$)", "/:id", urlsplit(url).path or "/")
+    return f"{method} {path}"
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    Returns durations from `Server-Timing` header, converted to seconds.
+    """
+    durations = {}
+    for metric in SERVER_TIMING_METRIC.finditer(header):
+        if (duration := SERVER_TIMING_DURATION.search(metric["params"])) is not None:
+            durations[metric["name"]] = float(duration["duration"]) / 1000
+
+    return durations
+
+
+def read_metrics(path: Path) -> List[Dict[str, Any]]:
+    """
+    Reads per-request metrics written by selfoss into `metrics_destination`.
+    """
+    if not path.exists():
+        return []
+
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class ServerTimingRecorder:
+    """
+    Records how long the client waited for each response of a `SelfossApi` session
+    and how much of it selfoss reported spending on it.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.server_times: Dict[str, List[float]] = defaultdict(list)
+
+    def hook(self, response, *args, **kwargs) -> None:
+        timing = parse_server_timing(response.headers.get("Server-Timing", ""))
+        if "total" not in timing:
+            return
+
+        key = route(response.request.method, response.request.url)
+        self.latencies[key].append(response.elapsed.total_seconds())
+        self.server_times[key].append(timing["total"])
+
+
+def mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def summarize(
+    records: Iterable[Dict[str, Any]], recorder: ServerTimingRecorder
+) -> Dict[str, Dict[str, float]]:
+    """
+    Breaks down the request time for each route into time spent
+    in database, fetching sources, PHP (the rest of the server time)
+    and on the way between client and server.
+    """
+    routes: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        routes[record["route"]].append(record)
+
+    summary = {}
+    for key, requests in sorted(routes.items()):
+        total = mean([request["total"] for request in requests])
+        db = mean([request["db"] for request in requests])
+        fetch = mean([request["fetch"] for request in requests])
+        summary[key] = {
+            "requests": len(requests),
+            "total_mean": total,
+            "db_mean": db,
+            "fetch_mean": fetch,
+            "php_mean": total - db - fetch,
+            "queries_mean": mean([request["queries"] for request in requests]),
+            "memory_peak_max": max(request["memory_peak"] for request in requests),
+        }
+
+        if key in recorder.latencies:
+            latency = mean(recorder.latencies[key])
+            summary[key]["client_latency_mean"] = latency
+            summary[key]["network_mean"] = latency - mean(recorder.server_times[key])
+
+    return summary
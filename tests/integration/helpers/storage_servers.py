@@ -1,17 +1,112 @@
 import argparse
 import abc
+import atexit
+import hashlib
+import os
+import shutil
 import signal
 import subprocess
-import sys
 import tempfile
-import time
+import threading
 from abc import ABC
 from pathlib import Path
 from threading import Event
+from typing import Callable, Dict, Optional
+from .waiting import command_succeeds, wait_until
 
 
 class Storage(ABC):
-    pass
+    @abc.abstractmethod
+    def start(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def stop(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get_config(self) -> Dict[str, str]:
+        pass
+
+    @abc.abstractmethod
+    def get_size(self) -> int:
+        """
+        Returns the number of bytes occupied by the selfoss database.
+        """
+        pass
+
+    @abc.abstractmethod
+    def reset(self) -> None:
+        """
+        Removes all selfoss data so that the server can be reused by another test.
+        Server databases keep their schema, only the rows are removed.
+        """
+        pass
+
+
+# Directory with initialized data directories, set lazily by `data_dir_template`.
+templates_temp_dir: Optional[tempfile.TemporaryDirectory] = None
+
+templates_lock = threading.Lock()
+
+
+def data_dir_template(
+    name: str, server_version: str, initialize: Callable[[Path], None]
+) -> Path:
+    """
+    Returns a database data directory created by *initialize* function,
+    creating it only the first time it is requested.
+
+    The templates are kept in `SELFOSS_TEST_TEMPLATE_DIR` directory, when set,
+    so that they can be shared between processes and runs.
+    Otherwise, they only live as long as the current process.
+    """
+    global templates_temp_dir
+
+    with templates_lock:
+        if "SELFOSS_TEST_TEMPLATE_DIR" in os.environ:
+            templates_dir = Path(os.environ["SELFOSS_TEST_TEMPLATE_DIR"])
+            templates_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            if templates_temp_dir is None:
+                templates_temp_dir = tempfile.TemporaryDirectory(
+                    prefix="selfoss-templates-"
+                )
+            templates_dir = Path(templates_temp_dir.name)
+
+        # Data directory layout can change between database server versions.
+        version_hash = hashlib.sha1(server_version.encode("utf-8")).hexdigest()[:12]
+        template = templates_dir / f"{name}-{version_hash}"
+
+        if not template.exists():
+            with tempfile.TemporaryDirectory(dir=templates_dir) as build_dir:
+                data_dir = Path(build_dir) / "data"
+                data_dir.mkdir()
+                data_dir.chmod(0o750)
+                initialize(data_dir)
+                # Atomic so that other processes never see a partial template.
+                try:
+                    data_dir.rename(template)
+                except OSError:
+                    # Another process was faster.
+                    if not template.exists():
+                        raise
+
+        return template
+
+
+def clone_directory(source: Path, destination: Path) -> None:
+    """
+    Copies contents of *source* directory into *destination*,
+    sharing the data blocks when the file system supports it.
+    """
+    try:
+        subprocess.check_call(
+            ["cp", "--archive", "--reflink=auto", f"{source}/.", destination]
+        )
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        # cp without GNU extensions.
+        shutil.copytree(source, destination, symlinks=True, dirs_exist_ok=True)
 
 
 class MySQL(Storage):
@@ -29,61 +124,111 @@ class MySQL(Storage):
         self.database = "selfoss"
 
     def start(self):
+        template = data_dir_template(
+            "mysql",
+            subprocess.check_output(["mariadbd", "--version"], encoding="utf-8"),
+            self.initialize,
+        )
+        clone_directory(template, self.db_dir)
+
+        self.start_server(self.db_dir, self.socket_path)
+
+    def initialize(self, db_dir: Path) -> None:
+        """
+        Creates a data directory with selfoss user and database.
+        """
         subprocess.check_call(
             [
                 "mariadb-install-db",
                 # Prevent defaulting to --user=mysql.
                 "--no-defaults",
-                f"--datadir={self.db_dir}",
+                f"--datadir={db_dir}",
             ]
         )
 
-        # Start the server
+        socket_path = db_dir.parent / "mysqld.sock"
+        self.start_server(db_dir, socket_path)
+
+        # Create user and database.
+        for query in [
+            f"CREATE USER '{self.user}'@'localhost' IDENTIFIED BY '{self.password}';",
+            f"CREATE DATABASE {self.database};",
+            f"GRANT ALL PRIVILEGES ON *.* TO '{self.user}'@'localhost';",
+        ]:
+            subprocess.check_call(
+                [
+                    "mariadb",
+                    f"--socket={socket_path}",
+                    f"--execute={query}",
+                ]
+            )
+
+        subprocess.check_call(["mariadb-admin", f"--socket={socket_path}", "shutdown"])
+
+    def start_server(self, db_dir: Path, socket_path: Path) -> None:
         subprocess.check_call(
             [
                 "mariadbd-safe",
                 # Prevent trying to use /var/log for logs.
                 "--no-defaults",
-                f"--datadir={self.db_dir}",
-                f"--socket={self.socket_path}",
+                f"--datadir={db_dir}",
+                f"--socket={socket_path}",
                 "--skip-networking",
                 "--no-auto-restart",
             ]
         )
 
-        # Create user and database.
-        # Waiting does not seem to work.
-        time.sleep(2)
-        subprocess.check_call(
-            [
-                "mariadb",
-                "--wait",
-                f"--socket={self.socket_path}",
-                f"--execute=CREATE USER '{self.user}'@'localhost' IDENTIFIED BY '{self.password}';",
-            ]
+        # mariadbd-safe returns before the server is ready
+        # and the client’s --wait does not retry when the socket does not exist yet.
+        wait_until(
+            lambda: command_succeeds(
+                ["mariadb-admin", f"--socket={socket_path}", "ping"]
+            ),
+            "MariaDB server",
         )
+
+    def stop(self):
         subprocess.check_call(
+            ["mariadb-admin", f"--socket={self.socket_path}", "shutdown"]
+        )
+        self.temp_dir.cleanup()
+
+    def get_size(self) -> int:
+        size = subprocess.check_output(
             [
                 "mariadb",
-                "--wait",
                 f"--socket={self.socket_path}",
-                f"--execute=CREATE DATABASE {self.database};",
-            ]
+                "--batch",
+                "--skip-column-names",
+                f"--execute=SELECT COALESCE(SUM(data_length + index_length), 0) FROM information_schema.tables WHERE table_schema = '{self.database}';",
+            ],
+            encoding="utf-8",
         )
-        subprocess.check_call(
+
+        return int(size.strip())
+
+    def reset(self) -> None:
+        tables = subprocess.check_output(
             [
                 "mariadb",
-                "--wait",
                 f"--socket={self.socket_path}",
-                f"--execute=GRANT ALL PRIVILEGES ON *.* TO '{self.user}'@'localhost';",
-            ]
-        )
-
-    def stop(self):
-        subprocess.check_call(
-            ["mariadb-admin", f"--socket={self.socket_path}", "shutdown"]
-        )
-        self.temp_dir.cleanup()
+                "--batch",
+                "--skip-column-names",
+                f"--execute=SELECT table_name FROM information_schema.tables WHERE table_schema = '{self.database}' AND table_name NOT LIKE '%version';",
+            ],
+            encoding="utf-8",
+        ).split()
+
+        if len(tables) > 0:
+            subprocess.check_call(
+                [
+                    "mariadb",
+                    f"--socket={self.socket_path}",
+                    f"--database={self.database}",
+                    "--execute="
+                    + " ".join(f"TRUNCATE TABLE `{table}`;" for table in tables),
+                ]
+            )
 
     def get_config(self):
         return {
@@ -109,46 +254,89 @@ class PostgreSQL(Storage):
         self.database = "selfoss"
 
     def start(self):
-        subprocess.check_call(["initdb", self.db_dir])
+        template = data_dir_template(
+            "postgresql",
+            subprocess.check_output(["postgres", "--version"], encoding="utf-8"),
+            self.initialize,
+        )
+        clone_directory(template, self.db_dir)
+
+        self.start_server(self.db_dir, self.socket_dir_path)
 
-        # Start the server
+    def initialize(self, db_dir: Path) -> None:
+        """
+        Creates a data directory with selfoss user and database.
+        """
+        subprocess.check_call(["initdb", db_dir])
+
+        socket_dir_path = db_dir.parent
+        self.start_server(db_dir, socket_dir_path)
+
+        # Create users
+        # Using a “template1” database since it is guaranteed to be present.
+        for query in [
+            f'CREATE USER "{self.user}"',
+            f'CREATE DATABASE "{self.database}" WITH OWNER = "{self.user}"',
+        ]:
+            subprocess.check_call(
+                [
+                    "psql",
+                    f"--host={socket_dir_path}",
+                    "--dbname=template1",
+                    "--tuples-only",
+                    "--no-align",
+                    f"--command={query}",
+                ]
+            )
+
+        subprocess.check_call(["pg_ctl", "stop", "--wait", f"--pgdata={db_dir}"])
+
+    def start_server(self, db_dir: Path, socket_dir_path: Path) -> None:
         subprocess.check_call(
             [
                 "pg_ctl",
                 "start",
-                f"--pgdata={self.db_dir}",
+                # Return only once the server accepts connections.
+                "--wait",
+                f"--pgdata={db_dir}",
                 # Intentionally passing options as a string
-                f"--options=-k {self.socket_dir_path} -c listen_addresses=",
+                f"--options=-k {socket_dir_path} -c listen_addresses=",
             ]
         )
 
-        # Create users
-        # Using a “template1” database since it is guaranteed to be present.
-        subprocess.check_call(
+    def stop(self):
+        subprocess.check_call(["pg_ctl", "stop", f"--pgdata={self.db_dir}"])
+        self.temp_dir.cleanup()
+
+    def get_size(self) -> int:
+        size = subprocess.check_output(
             [
                 "psql",
                 f"--host={self.socket_dir_path}",
                 "--dbname=template1",
                 "--tuples-only",
                 "--no-align",
-                f'--command=CREATE USER "{self.user}"',
-            ]
+                f"--command=SELECT pg_database_size('{self.database}')",
+            ],
+            encoding="utf-8",
         )
+
+        return int(size.strip())
+
+    def reset(self) -> None:
+        # A single statement so that foreign keys do not get in the way.
         subprocess.check_call(
             [
                 "psql",
                 f"--host={self.socket_dir_path}",
-                "--dbname=template1",
+                f"--dbname={self.database}",
                 "--tuples-only",
                 "--no-align",
-                f'--command=CREATE DATABASE "{self.database}" WITH OWNER = "{self.user}"',
+                "--quiet",
+                "--command=DO $$ DECLARE tables TEXT; BEGIN SELECT string_agg(quote_ident(tablename), ', ') INTO tables FROM pg_tables WHERE schemaname = 'public' AND tablename <> 'version'; IF tables IS NOT NULL THEN EXECUTE 'TRUNCATE ' || tables || ' RESTART IDENTITY'; END IF; END $$",
             ]
         )
 
-    def stop(self):
-        subprocess.check_call(["pg_ctl", "stop", f"--pgdata={self.db_dir}"])
-        self.temp_dir.cleanup()
-
     def get_config(self):
         return {
             "db_type": "pgsql",
@@ -171,6 +359,16 @@ class SQLite(Storage):
     def stop(self):
         self.temp_dir.cleanup()
 
+    def get_size(self) -> int:
+        return self.file.stat().st_size if self.file.exists() else 0
+
+    def reset(self) -> None:
+        # Deleting rows table by table would corrupt internal tables of the full-text index.
+        # selfoss creates the schema when the database does not exist so it is cheaper
+        # to just start over, like a fresh server would.
+        for suffix in ["", "-journal", "-wal", "-shm"]:
+            self.file.with_name(self.file.name + suffix).unlink(missing_ok=True)
+
     def get_config(self):
         return {
             "db_type": "sqlite",
@@ -178,6 +376,42 @@ class SQLite(Storage):
         }
 
 
+STORAGE_BACKENDS = {
+    "mysql": MySQL,
+    "postgresql": PostgreSQL,
+    "sqlite": SQLite,
+}
+
+
+def create_storage_server(storage_backend: str) -> Storage:
+    try:
+        return STORAGE_BACKENDS[storage_backend]()
+    except KeyError:
+        raise Exception(f"Unknown storage backend type: {storage_backend}")
+
+
+# Storage servers shared by all tests in the process, see `shared_storage_server`.
+shared_storage_servers: Dict[str, Storage] = {}
+
+# Separate from `templates_lock` since starting a server acquires that one.
+shared_storage_servers_lock = threading.Lock()
+
+
+def shared_storage_server(storage_backend: str) -> Storage:
+    """
+    Returns a running storage server that lives until the process exits.
+    Its data need to be cleared with `Storage.reset` before each use.
+    """
+    with shared_storage_servers_lock:
+        if storage_backend not in shared_storage_servers:
+            storage_server = create_storage_server(storage_backend)
+            storage_server.start()
+            atexit.register(storage_server.stop)
+            shared_storage_servers[storage_backend] = storage_server
+
+        return shared_storage_servers[storage_backend]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Runs a storage server for purposes of testing",
@@ -190,16 +424,8 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
-    storage_backend = args.backend
-
-    if storage_backend == "mysql":
-        storage_server = MySQL()
-    elif storage_backend == "postgresql":
-        storage_server = PostgreSQL()
-    elif storage_backend == "sqlite":
-        storage_server = SQLite()
-    else:
-        raise Exception(f"Unknown storage backend type: {storage_backend}")
+
+    storage_server = create_storage_server(args.backend)
 
     termination_event = Event()
 
@@ -0,0 +1,106 @@
+import datetime
+import time
+from typing import Any, Dict, List, Optional
+from .selfoss_api import SelfossApi
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class SyncClient:
+    """
+    Client keeping a local replica of items up to date using incremental `/items/sync`,
+    the way the web client does in offline mode.
+
+    It remembers the time of the last server update and the highest item id seen,
+    so that every sync only transfers new items and changed statuses.
+    """
+
+    def __init__(
+        self,
+        api: SelfossApi,
+        items_not_before: Optional[datetime.datetime] = None,
+        items_how_many: Optional[int] = None,
+    ):
+        self.api = api
+        # Items older than this are only sent when their status changes.
+        self.items_not_before = items_not_before or EPOCH
+        self.items_how_many = items_how_many
+        self.last_update: Optional[str] = None
+        self.last_item_id = 0
+        self.items: Dict[int, Dict[str, Any]] = {}
+        self.stats: Optional[Dict[str, int]] = None
+        self.rounds: List[Dict[str, Any]] = []
+
+        self.last_response = None
+        api.session.hooks["response"].append(self.record_response)
+
+    def record_response(self, response, *args, **kwargs) -> None:
+        self.last_response = response
+
+    def sync(self) -> Dict[str, Any]:
+        """
+        Performs a single sync round and applies the changes to the replica.
+
+        Returns information about the round: whether there are more new items
+        to fetch, number of received items and status updates, size of the
+        response body and the time it took.
+        """
+        params: Dict[str, Any] = {
+            "itemsSinceId": self.last_item_id,
+            "itemsNotBefore": self.items_not_before.isoformat(),
+        }
+        if self.last_update is not None:
+            # Statuses are only useful for items we already know about.
+            params["itemsStatuses"] = "true"
+        if self.items_how_many is not None:
+            params["itemsHowMany"] = self.items_how_many
+
+        start = time.perf_counter()
+        data = self.api.sync(
+            since=self.last_update or EPOCH.isoformat(),
+            **params,
+        )
+        wall_time = time.perf_counter() - start
+
+        new_items = data.get("newItems", [])
+        for item in new_items:
+            self.items[item["id"]] = item
+        max_id = max((item["id"] for item in new_items), default=self.last_item_id)
+        self.last_item_id = max(self.last_item_id, max_id)
+
+        item_updates = data.get("itemUpdates", [])
+        for update in item_updates:
+            item = self.items.get(update["id"])
+            if item is not None:
+                item["unread"] = update["unread"]
+                item["starred"] = update["starred"]
+
+        if "stats" in data:
+            self.stats = data["stats"]
+
+        if data["lastUpdate"] is not None:
+            self.last_update = data["lastUpdate"]
+
+        sync_round = {
+            "new_items": len(new_items),
+            "item_updates": len(item_updates),
+            "more": data.get("lastId") is not None and data["lastId"] > max_id,
+            "bytes": len(self.last_response.content),
+            # Time until the response headers arrived.
+            "server_time": self.last_response.elapsed.total_seconds(),
+            "wall_time": wall_time,
+        }
+        self.rounds.append(sync_round)
+
+        return sync_round
+
+    def sync_all(self) -> List[Dict[str, Any]]:
+        """
+        Syncs repeatedly until there are no more new items.
+        """
+        rounds = [self.sync()]
+        while rounds[-1]["more"] and rounds[-1]["new_items"] > 0:
+            rounds.append(self.sync())
+
+        return rounds
@@ -0,0 +1,63 @@
+import socket
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, List
+
+
+# How long to wait for a server to start before giving up.
+DEFAULT_TIMEOUT = 60
+
+# How long to sleep between readiness checks.
+POLL_INTERVAL = 0.05
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    description: str,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> None:
+    """
+    Repeatedly checks the *condition* until it holds,
+    raising `TimeoutError` when it does not in *timeout* seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Timed out waiting for {description}.")
+        time.sleep(POLL_INTERVAL)
+
+
+def port_open(host_name: str, port: int) -> bool:
+    """
+    Checks whether something accepts TCP connections on given port.
+    """
+    try:
+        with socket.create_connection((host_name, port), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def unix_socket_open(path: Path) -> bool:
+    """
+    Checks whether something accepts connections on given Unix domain socket.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1)
+            sock.connect(str(path))
+            return True
+    except OSError:
+        return False
+
+
+def command_succeeds(command: List[str]) -> bool:
+    return (
+        subprocess.run(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ).returncode
+        == 0
+    )
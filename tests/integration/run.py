@@ -1,6 +1,9 @@
+import contextlib
 import requests
+import tempfile
 import unittest
-from helpers.data_server import FIBONACCI_FEED_LENGTH
+from pathlib import Path
+from helpers.data_server import FIBONACCI_FEED_LENGTH, farm_feed_path
 from helpers.integration import SelfossIntegration
 from helpers.selfoss_api import SelfossApi
 
@@ -63,5 +66,245 @@ class BasicWorkflowTest(SelfossIntegration):
         ), "Search should find five fibonacci sequence numbers containing the digit 3"
 
 
+class ConditionalFetchTest(SelfossIntegration):
+    def test_unchanged_feed_not_downloaded_again(self):
+        selfoss_base_uri = f"http://{self.selfoss_host_name}:{self.selfoss_port}"
+        selfoss_api = SelfossApi(selfoss_base_uri)
+        selfoss_api.login(self.selfoss_username, self.selfoss_password)
+
+        for feed_id in range(3):
+            feed_uri = f"http://{self.data_host_name}:{self.data_port}{farm_feed_path(feed_id, items=50)}"
+            add_feed = selfoss_api.add_source(
+                "spouts\\rss\\feed", title=f"Feed {feed_id}", url=feed_uri
+            )
+            assert add_feed["success"], "Adding source should succeed."
+
+        assert selfoss_api.refresh_all() == "finished", "Refreshing should succeed."
+        items = selfoss_api.get_items(items=200)
+        assert len(items) == 150, "All items should be fetched."
+
+        stats = self.data_server_thread.stats
+        assert stats["full_responses"] == 3, "Each feed should be downloaded."
+        self.data_server_thread.reset_stats()
+
+        # selfoss does not update sources more often than every 20 seconds,
+        # pretend the update happened earlier instead of waiting.
+        with contextlib.closing(self.database()) as database:
+            database.execute(
+                f"UPDATE {database.prefix}sources SET lastupdate = lastupdate - 60"
+            )
+
+        assert selfoss_api.refresh_all() == "finished", "Refreshing should succeed."
+        stats = self.data_server_thread.stats
+        assert (
+            stats["not_modified_responses"] == 3 and stats["full_responses"] == 0
+        ), "Unchanged feeds should not be downloaded again."
+        assert stats["bytes_sent"] == 0, "Not modified responses should have no body."
+
+        items_after = selfoss_api.get_items(items=200)
+        assert [item["id"] for item in items_after] == [
+            item["id"] for item in items
+        ], "Items should be kept when feed did not change."
+
+
+class FailedBatchTest(SelfossIntegration):
+    def test_failed_batch_leaves_no_items(self):
+        selfoss_base_uri = f"http://{self.selfoss_host_name}:{self.selfoss_port}"
+        selfoss_api = SelfossApi(selfoss_base_uri)
+        selfoss_api.login(self.selfoss_username, self.selfoss_password)
+
+        original_uri = f"http://{self.data_host_name}:{self.data_port}{farm_feed_path(0, items=30)}"
+        add_feed = selfoss_api.add_source(
+            "spouts\\rss\\feed", title="Original", url=original_uri
+        )
+        assert add_feed["success"], "Adding source should succeed."
+        assert selfoss_api.refresh_all() == "finished", "Refreshing should succeed."
+
+        with contextlib.closing(self.database()) as database:
+            # Items with the same uid are allowed in different sources,
+            # forbid them so that storing a copy of the feed fails.
+            index = f"{database.prefix}items_uid_unique"
+            database.execute(
+                f"CREATE UNIQUE INDEX {index} ON {database.prefix}items (uid)"
+            )
+            try:
+                # The copy has 50 new items inserted in the first batch,
+                # its second batch repeats the items of the original.
+                copy_uri = f"http://{self.data_host_name}:{self.data_port}{farm_feed_path(0, items=80)}"
+                add_feed = selfoss_api.add_source(
+                    "spouts\\rss\\feed", title="Copy", url=copy_uri
+                )
+                assert add_feed["success"], "Adding source should succeed."
+                assert (
+                    selfoss_api.refresh_all() == "finished"
+                ), "Refreshing should succeed."
+            finally:
+                if database.config["db_type"] == "mysql":
+                    database.execute(f"DROP INDEX {index} ON {database.prefix}items")
+                else:
+                    database.execute(f"DROP INDEX {index}")
+
+            copy_items = database.scalar(
+                f"SELECT COUNT(*) FROM {database.prefix}items WHERE source = {add_feed['id']}"
+            )
+            assert (
+                int(copy_items) == 0
+            ), "No items of the source should be stored when storing one batch fails."
+            error = database.scalar(
+                f"SELECT error FROM {database.prefix}sources WHERE id = {add_feed['id']}"
+            )
+            assert error, "Failure to store items should be reported as source error."
+
+        # Fails when the counters do not match the items.
+        self.selfoss_thread.run_cli("counters", "verify")
+        assert (
+            selfoss_api.get_stats()["unread"] == 30
+        ), "Only the items of the original source should be counted."
+
+
+class CountersTest(SelfossIntegration):
+    def assert_counters(
+        self,
+        selfoss_api: SelfossApi,
+        total: int,
+        unread: int,
+        starred: int,
+        message: str,
+    ) -> None:
+        stats = selfoss_api.get_stats()
+        assert (stats["total"], stats["unread"], stats["starred"]) == (
+            total,
+            unread,
+            starred,
+        ), f"{message}: counters should be {total}, {unread}, {starred} but they are {stats}."
+        # Fails when the counters do not match the items.
+        self.selfoss_thread.run_cli("counters", "verify")
+
+    def test_counters_follow_item_changes(self):
+        selfoss_base_uri = f"http://{self.selfoss_host_name}:{self.selfoss_port}"
+        selfoss_api = SelfossApi(selfoss_base_uri)
+        selfoss_api.login(self.selfoss_username, self.selfoss_password)
+
+        for feed_id in range(2):
+            feed_uri = f"http://{self.data_host_name}:{self.data_port}{farm_feed_path(feed_id, items=20)}"
+            add_feed = selfoss_api.add_source(
+                "spouts\\rss\\feed", title=f"Feed {feed_id}", url=feed_uri
+            )
+            assert add_feed["success"], "Adding source should succeed."
+
+        assert selfoss_api.refresh_all() == "finished", "Refreshing should succeed."
+        ids = [item["id"] for item in selfoss_api.get_items(items=40)]
+        assert len(ids) == 40, "All items should be fetched."
+        self.assert_counters(selfoss_api, 40, 40, 0, "After update")
+
+        # Repeated changes must not be counted twice.
+        for _ in range(2):
+            assert selfoss_api.mark_read(ids[0]), "Unable to mark item as read"
+            self.assert_counters(selfoss_api, 40, 39, 0, "After mark")
+        assert selfoss_api.mark_read(ids[0], False), "Unable to mark item as unread"
+        self.assert_counters(selfoss_api, 40, 40, 0, "After unmark")
+
+        for _ in range(2):
+            assert selfoss_api.mark_starred(ids[1]), "Unable to starr item"
+            self.assert_counters(selfoss_api, 40, 40, 1, "After starr")
+        assert selfoss_api.mark_starred(ids[1], False), "Unable to unstarr item"
+        self.assert_counters(selfoss_api, 40, 40, 0, "After unstarr")
+
+        # Items from both sources.
+        assert selfoss_api.mark_read_many(ids[:30]), "Unable to mark items as read"
+        self.assert_counters(selfoss_api, 40, 10, 0, "After marking many")
+
+        # Goes through the bulk status update of the sync endpoint.
+        assert selfoss_api.mark_read_many(
+            ids[:5], False
+        ), "Unable to mark items as unread"
+        assert selfoss_api.mark_starred_many(ids[:3]), "Unable to starr items"
+        self.assert_counters(selfoss_api, 40, 15, 3, "After bulk status update")
+
+        with contextlib.closing(self.database()) as database:
+            database.execute(
+                f"UPDATE {database.prefix}items SET lastseen = '2000-01-01 00:00:00'"
+            )
+        self.selfoss_thread.run_cli("cleanup")
+        # Only the starred items are kept, all of them unread.
+        self.assert_counters(selfoss_api, 3, 3, 3, "After cleanup")
+
+
+class OpmlImportTest(SelfossIntegration):
+    def test_failed_import_stores_nothing(self):
+        selfoss_base_uri = f"http://{self.selfoss_host_name}:{self.selfoss_port}"
+        selfoss_api = SelfossApi(selfoss_base_uri)
+        selfoss_api.login(self.selfoss_username, self.selfoss_password)
+
+        outlines = "\n".join(
+            f'<outline type="rss" text="{title}" xmlUrl="http://{self.data_host_name}:{self.data_port}{farm_feed_path(feed_id)}"/>'
+            for feed_id, title in enumerate(["Feed", "Duplicate", "Duplicate"])
+        )
+        opml = f"""<?xml version="1.0" encoding="utf-8"?>
+<opml version="2.0" xmlns:selfoss="https://selfoss.aditu.de/">
+    <body>
+        <outline text="News" selfoss:color="#ff0000">
+            {outlines}
+        </outline>
+    </body>
+</opml>
+"""
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            opml_path = Path(temp_dir) / "subscriptions.opml"
+            opml_path.write_text(opml, encoding="utf-8")
+
+            with contextlib.closing(self.database()) as database:
+                # Sources with the same title are allowed when their URLs differ,
+                # forbid them so that storing the last of the sources fails.
+                index = f"{database.prefix}sources_title_unique"
+                title = (
+                    "title(191)" if database.config["db_type"] == "mysql" else "title"
+                )
+                database.execute(
+                    f"CREATE UNIQUE INDEX {index} ON {database.prefix}sources ({title})"
+                )
+                try:
+                    try:
+                        selfoss_api.import_opml(opml_path)
+                        assert False, "Import should fail."
+                    except requests.exceptions.HTTPError as e:
+                        assert (
+                            e.response.status_code == 400
+                        ), "Failed import should be reported."
+                finally:
+                    if database.config["db_type"] == "mysql":
+                        database.execute(
+                            f"DROP INDEX {index} ON {database.prefix}sources"
+                        )
+                    else:
+                        database.execute(f"DROP INDEX {index}")
+
+                for table in ["sources", "tags"]:
+                    count = database.scalar(
+                        f"SELECT COUNT(*) FROM {database.prefix}{table}"
+                    )
+                    assert (
+                        int(count) == 0
+                    ), f"Nothing should be stored in {table} when the import fails."
+
+                response = selfoss_api.import_opml(opml_path)
+                assert response["messages"] == [
+                    "Success! 3 feeds have been imported."
+                ], "Import should succeed without the index."
+                assert (
+                    int(
+                        database.scalar(
+                            f"SELECT COUNT(*) FROM {database.prefix}sources"
+                        )
+                    )
+                    == 3
+                ), "All sources should be imported."
+                assert (
+                    database.scalar(f"SELECT color FROM {database.prefix}tags")
+                    == "#ff0000"
+                ), "Tag should be imported with its color."
+
+
 if __name__ == "__main__":
     unittest.main()
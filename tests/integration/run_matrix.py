@@ -0,0 +1,120 @@
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, NamedTuple
+from helpers.storage_servers import STORAGE_BACKENDS
+
+
+class TestResult(NamedTuple):
+    storage_backend: str
+    test_id: str
+    success: bool
+    duration: float
+    output: str
+
+
+def test_ids(suite: unittest.TestSuite) -> Iterator[str]:
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from test_ids(test)
+        else:
+            yield test.id()
+
+
+def run_test(storage_backend: str, test_id: str) -> TestResult:
+    """
+    Runs a single test case against given storage backend in the worker process.
+    """
+    # Each job runs alone in its worker so the variable is not shared.
+    os.environ["SELFOSS_TEST_STORAGE_BACKEND"] = storage_backend
+
+    stream = io.StringIO()
+    start = time.perf_counter()
+    result = unittest.TextTestRunner(stream=stream, verbosity=2).run(
+        unittest.defaultTestLoader.loadTestsFromName(test_id)
+    )
+
+    return TestResult(
+        storage_backend=storage_backend,
+        test_id=test_id,
+        success=result.wasSuccessful(),
+        duration=time.perf_counter() - start,
+        output=stream.getvalue(),
+    )
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Runs integration tests against multiple storage backends in parallel",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=STORAGE_BACKENDS.keys(),
+        default=list(STORAGE_BACKENDS.keys()),
+        help="Storage backends to run the tests against",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of tests to run at the same time",
+    )
+    parser.add_argument(
+        "tests",
+        nargs="*",
+        default=["run"],
+        help="Modules, classes or methods containing the tests to run",
+    )
+    args = parser.parse_args(argv)
+
+    tests = [
+        test_id
+        for name in args.tests
+        for test_id in test_ids(unittest.defaultTestLoader.loadTestsFromName(name))
+    ]
+
+    start = time.perf_counter()
+    results: List[TestResult] = []
+    # Spawned workers run atexit handlers, which stop shared storage servers.
+    with ProcessPoolExecutor(
+        max_workers=args.jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        futures = [
+            executor.submit(run_test, storage_backend, test_id)
+            for storage_backend in args.backends
+            for test_id in tests
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "ok" if result.success else "FAIL"
+            print(
+                f"{result.storage_backend}: {result.test_id} ... {status} ({result.duration:.1f} s)",
+                file=sys.stderr,
+            )
+    wall_time = time.perf_counter() - start
+
+    failures = [result for result in results if not result.success]
+    for result in failures:
+        print(f"\n{result.storage_backend}: {result.test_id}", file=sys.stderr)
+        print(result.output, file=sys.stderr)
+
+    print(
+        f"\nRan {len(results)} tests in {wall_time:.1f} s"
+        f" ({sum(result.duration for result in results):.1f} s sequentially),"
+        f" {len(failures)} failed.",
+        file=sys.stderr,
+    )
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,78 @@
+<?php
+
+// Measures evaluation of source filters over a synthetic corpus of items.
+// Usage: php utils/benchmark-filters.php [number of items]
+
+use Selfoss\helpers\Filters\FilterFactory;
+use Selfoss\helpers\HtmlString;
+use spouts\Item;
+
+require __DIR__ . '/../vendor/autoload.php';
+
+// Fail loudly on warnings.
+set_error_handler(function(int $severity, string $message, string $file, int $line): bool {
+    if (error_reporting() & $severity) {
+        throw new ErrorException($message, 0, $severity, $file, $line);
+    }
+
+    // Let PHP handle suppressed errors as usual.
+    return false;
+});
+
+$itemCount = (int) ($argv[1] ?? 100000);
+
+// Expressions resembling the ones people use to hide ads, sections and noisy authors.
+$expressions = [
+    '',
+    '/(?i)sponsored/',
+    '!/(?i)(sponsored|advertisement|promoted|partner content|\\[ad\\])/',
+    'title:/^\\[(Video|Podcast)\\]/',
+    '!title:/(?i)\\b(deal|sale|discount|coupon)s?\\b/',
+    'content:/(?i)climate (change|crisis)/',
+    'url:/^https:\\/\\/example\\.com\\/(sport|weather)\\//',
+    '!author:/^(Bot|Newsroom Staff)$/',
+];
+
+$words = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'climate', 'change', 'sponsored', 'deal', 'weather', 'sport', 'market', 'report'];
+$authors = [null, 'Alice', 'Bob', 'Newsroom Staff', 'Bot'];
+$sections = ['news', 'sport', 'weather', 'business'];
+
+mt_srand(0);
+$items = [];
+for ($i = 0; $i < $itemCount; ++$i) {
+    $title = ($i % 20 === 0 ? '[Video] ' : '') . implode(' ', array_map(fn(int $k): string => $words[mt_rand(0, count($words) - 1)], range(1, 8)));
+    $paragraphs = [];
+    for ($p = 0; $p < 5; ++$p) {
+        $paragraphs[] = '<p>' . implode(' ', array_map(fn(int $k): string => $words[mt_rand(0, count($words) - 1)], range(1, 60))) . '</p>';
+    }
+
+    $items[] = new Item(
+        id: 'item-' . $i,
+        title: HtmlString::fromRaw($title),
+        content: HtmlString::fromRaw(implode("\n", $paragraphs)),
+        thumbnail: null,
+        icon: null,
+        link: 'https://example.com/' . $sections[$i % count($sections)] . '/' . $i,
+        date: null,
+        author: $authors[$i % count($authors)],
+        extraData: null
+    );
+}
+
+printf("%-70s %10s %12s %10s\n", 'expression', 'parse µs', 'evaluate ms', 'admitted');
+foreach ($expressions as $expression) {
+    $start = hrtime(true);
+    $filter = FilterFactory::fromString($expression);
+    $parseTime = (hrtime(true) - $start) / 1e3;
+
+    $admitted = 0;
+    $start = hrtime(true);
+    foreach ($items as $item) {
+        if ($filter->admits($item)) {
+            ++$admitted;
+        }
+    }
+    $evaluateTime = (hrtime(true) - $start) / 1e6;
+
+    printf("%-70s %10.1f %12.1f %10d\n", $expression === '' ? '(none)' : $expression, $parseTime, $evaluateTime, $admitted);
+}
@@ -1,102 +1,556 @@
 #!/usr/bin/env python3
+import gzip
+import hashlib
 import json
 import logging
 import os
 import re
+import shutil
 import subprocess
 import tempfile
+import time
 import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
 from pathlib import Path
-from typing import Callable
-
-
-DISALLOWED_FILENAME_PATTERNS = [
-    re.compile(pattern)
-    for pattern in [
-        r"^\.git(hub|ignore|attributes|keep)$",
-        r"^\.travis\.yml$",
-        r"^\.editorconfig$",
-        r"(?i)^changelog",
-        r"(?i)^contributing",
-        r"(?i)^upgrading",
-        r"(?i)^copying",
-        r"(?i)^readme",
-        r"(?i)^licen[cs]e",
-        r"(?i)^version",
-        r"^phpunit",
-        r"^l?gpl\.txt$",
-        r"^composer\.(json|lock)$",
-        r"^Makefile$",
-        r"^build\.xml$",
-        r"^phpcs-ruleset\.xml$",
-        r"^\.php_cs$",
-        r"^phpmd\.xml$",
-    ]
-]
-
-DISALLOWED_DEST_PATTERNS = [
-    re.compile(pattern)
-    for pattern in [
-        r"^vendor/htmlawed/htmlawed/htmLawed(Test\.php|(.*\.(htm|txt)))$",
-        r"^vendor/smalot/pdfparser/\.atoum\.php$",
-        r"^vendor/smottt/wideimage/demo",
-        r"^vendor/simplepie/simplepie/(db\.sql|autoload\.php)$",
-        r"^vendor/simplepie/simplepie/library$",
-        r"^vendor/composer/installed\.json$",
-        r"(?i)^vendor/[^/]+/[^/]+/(test|doc)s?",
-        r"^vendor/smalot/pdfparser/samples",
-        r"^vendor/smalot/pdfparser/src/Smalot/PdfParser/Tests",
-    ]
-]
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Each list is combined into a single regular expression so that a path is only scanned once.
+# Flags therefore need to be scoped to the pattern that uses them.
+DISALLOWED_FILENAME_PATTERN = re.compile(
+    "|".join(
+        f"(?:{pattern})"
+        for pattern in [
+            r"^\.git(hub|ignore|attributes|keep)$",
+            r"^\.travis\.yml$",
+            r"^\.editorconfig$",
+            r"^(?i:changelog)",
+            r"^(?i:contributing)",
+            r"^(?i:upgrading)",
+            r"^(?i:copying)",
+            r"^(?i:readme)",
+            r"^(?i:licen[cs]e)",
+            r"^(?i:version)",
+            r"^phpunit",
+            r"^l?gpl\.txt$",
+            r"^composer\.(json|lock)$",
+            r"^Makefile$",
+            r"^build\.xml$",
+            r"^phpcs-ruleset\.xml$",
+            r"^\.php_cs$",
+            r"^phpmd\.xml$",
+        ]
+    )
+)
+
+DISALLOWED_DEST_PATTERN = re.compile(
+    "|".join(
+        f"(?:{pattern})"
+        for pattern in [
+            r"^vendor/htmlawed/htmlawed/htmLawed(Test\.php|(.*\.(htm|txt)))$",
+            r"^vendor/smalot/pdfparser/\.atoum\.php$",
+            r"^vendor/smottt/wideimage/demo",
+            r"^vendor/simplepie/simplepie/(db\.sql|autoload\.php)$",
+            r"^vendor/simplepie/simplepie/library$",
+            r"^vendor/composer/installed\.json$",
+            r"^vendor/[^/]+/[^/]+/(?i:(test|doc)s?)",
+            r"^vendor/smalot/pdfparser/samples",
+            r"^vendor/smalot/pdfparser/src/Smalot/PdfParser/Tests",
+        ]
+    )
+)
+
+# Same as zipfile uses by default.
+COMPRESS_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+
+# ZIP cannot represent dates before 1980.
+MIN_TIMESTAMP = 315532800
+
+# Number of cached results of each build step to keep around.
+KEEP_CACHED_STEPS = 3
+
+# Formats that are compressed already, deflating them again would only waste time.
+INCOMPRESSIBLE_SUFFIXES = {
+    ".avif",
+    ".br",
+    ".gif",
+    ".gz",
+    ".jpeg",
+    ".jpg",
+    ".mp3",
+    ".mp4",
+    ".ogg",
+    ".png",
+    ".webm",
+    ".webp",
+    ".woff",
+    ".woff2",
+    ".zip",
+}
+
+# Text assets that web servers can send precompressed (nginx `gzip_static` and `brotli_static`).
+PRECOMPRESSIBLE_SUFFIXES = {
+    ".css",
+    ".html",
+    ".ico",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".webmanifest",
+    ".xml",
+}
+
+# Smaller files would barely save anything over a single network packet.
+PRECOMPRESS_MIN_SIZE = 1024
+
+# Encodings of precompressed siblings by file name suffix.
+PRECOMPRESSED_ENCODINGS = {".gz": "gzip", ".br": "br"}
+
+# Number of the largest members and directories listed in the report.
+REPORT_TOP = 10
+
+# Files, or None for directories, by member name, with the encoding of the member.
+Member = Tuple[str, Optional[Path], str]
 
 
 def is_not_unimportant(dest: Path) -> bool:
-    filename = dest.name
+    return (
+        DISALLOWED_FILENAME_PATTERN.match(dest.name) is None
+        and DISALLOWED_DEST_PATTERN.match(dest.as_posix()) is None
+    )
 
-    filename_disallowed = any(r.match(filename) for r in DISALLOWED_FILENAME_PATTERNS)
 
-    dest_disallowed = any(r.match(str(dest)) for r in DISALLOWED_DEST_PATTERNS)
+def deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
 
-    allowed = not (filename_disallowed or dest_disallowed)
 
-    return allowed
+def gzip_encode(data: bytes) -> bytes:
+    # Omit the time stamp so that the output is reproducible.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_encode(data: bytes) -> bytes:
+    assert brotli is not None
+    return brotli.compress(data, quality=11)
+
+
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {
+    "deflate": deflate,
+    "gzip": gzip_encode,
+    "br": brotli_encode,
+}
+
+
+def get_encoder_cache_dir(cache_dir: Path, encoding: str) -> Path:
+    # Different library versions might compress differently so their results must not be mixed.
+    version = brotli.__version__ if encoding == "br" else zlib.ZLIB_VERSION
+    return cache_dir / f"{encoding}-{version}"
+
+
+def encode(data: bytes, encoding: str, cache_dir: Optional[Path]) -> bytes:
+    """
+    Compresses the data using given encoding.
+
+    The compressed data are stored in *cache_dir* under the hash of the contents
+    so that files that did not change since the last build need not be compressed again.
+    """
+    if cache_dir is None:
+        return ENCODERS[encoding](data)
+
+    cached = (
+        get_encoder_cache_dir(cache_dir, encoding) / hashlib.sha256(data).hexdigest()
+    )
+    try:
+        return cached.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    compressed = ENCODERS[encoding](data)
+    # Rename is atomic so concurrent builds never see a partially written file.
+    temp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    temp.write_bytes(compressed)
+    os.replace(temp, cached)
+
+    return compressed
+
+
+def compress_member(
+    path: Path, encoding: str, cache_dir: Optional[Path]
+) -> Tuple[int, int, int, bytes]:
+    """
+    Returns compression method, CRC and size of the member contents, and the data to store.
+
+    Members are deflated unless it would not make them smaller.
+    Precompressed siblings contain the file encoded with *encoding*,
+    they are stored as is since they cannot be compressed any further.
+    """
+    data = path.read_bytes()
+
+    if encoding in PRECOMPRESSED_ENCODINGS.values():
+        data = encode(data, encoding, cache_dir)
+    elif encoding == "deflate":
+        compressed = encode(data, encoding, cache_dir)
+        if len(compressed) < len(data):
+            return zipfile.ZIP_DEFLATED, zlib.crc32(data), len(data), compressed
+
+    return zipfile.ZIP_STORED, zlib.crc32(data), len(data), data
+
+
+def format_size(size: int) -> str:
+    if abs(size) < 1024:
+        return f"{size} B"
+
+    scaled = size / 1024
+    for unit in ["KiB", "MiB"]:
+        if abs(scaled) < 1024:
+            break
+        scaled /= 1024
+
+    return f"{scaled:.1f} {unit}"
 
 
 class ZipFile(zipfile.ZipFile):
+    """
+    ZIP archive whose members are collected first and then compressed in parallel
+    by `write_members`, always producing the same bytes for the same inputs.
+    """
+
+    prefix: Path
+    # Time stamp of all members.
+    date_time: Tuple[int, int, int, int, int, int]
+    members: List[Member]
+    # Encodings of precompressed siblings to add next to compressible assets.
+    precompressed_encodings: List[str]
+    # Member names of precompressed siblings by the name of the original member.
+    siblings: Dict[str, str]
+
     def create_directory_entry(self, path: str) -> None:
         # Directories are empty files whose path ends with a slash.
         # https://mail.python.org/pipermail/python-list/2003-June/205859.html
-        self.writestr(str(self.prefix / path) + "/", "")
+        self.members.append(((self.prefix / path).as_posix() + "/", None, ""))
 
     def directory(
         self,
         name: str,
         allowed: Callable[[Path], bool] = lambda item: True,
+        precompress: bool = False,
     ) -> None:
         self.create_directory_entry(name)
 
         for _root, dirs, files in os.walk(name):
             root = Path(_root)
 
-            if not allowed(root):
-                # Do not traverse child directories.
-                dirs.clear()
-                continue
+            # Prune disallowed directories so that they are not traversed at all
+            # and keep the rest sorted for a stable order of members.
+            dirs[:] = sorted(
+                directory for directory in dirs if allowed(root / directory)
+            )
 
             for directory in dirs:
-                path = root / directory
+                self.create_directory_entry(str(root / directory))
 
-                if allowed(path):
-                    self.create_directory_entry(str(path))
-
-            for file in files:
+            for file in sorted(files):
                 path = root / file
 
                 if allowed(path):
-                    self.write(path, self.prefix / path)
+                    self.file(str(path), precompress)
+
+    def file(self, name: str, precompress: bool = False) -> None:
+        path = Path(name)
+        member = (self.prefix / name).as_posix()
+        encoding = "store" if path.suffix in INCOMPRESSIBLE_SUFFIXES else "deflate"
+        self.members.append((member, path, encoding))
+
+        if (
+            precompress
+            and path.suffix in PRECOMPRESSIBLE_SUFFIXES
+            and path.stat().st_size >= PRECOMPRESS_MIN_SIZE
+        ):
+            for suffix, encoding in PRECOMPRESSED_ENCODINGS.items():
+                if encoding in self.precompressed_encodings:
+                    self.members.append((member + suffix, path, encoding))
+                    self.siblings[member + suffix] = member
+
+    def write_compressed(self, zinfo: zipfile.ZipInfo, data: bytes) -> None:
+        """
+        Writes a member whose data were already compressed as described by *zinfo*.
+        zipfile would compress the data itself so this mirrors what `writestr` does.
+        """
+        zinfo.header_offset = self.fp.tell()
+        self.fp.write(zinfo.FileHeader())
+        self.fp.write(data)
+        self.filelist.append(zinfo)
+        self.NameToInfo[zinfo.filename] = zinfo
+        self.start_dir = self.fp.tell()
+        self._didModify = True
+
+    def write_members(self, cache_dir: Optional[Path]) -> None:
+        """
+        Compresses collected files using all CPU cores and writes them in the order they were added.
+        Precompressed siblings that would not be smaller than the original file are left out.
+        """
+        if cache_dir is not None:
+            for encoding in ENCODERS:
+                if encoding == "deflate" or encoding in self.precompressed_encodings:
+                    get_encoder_cache_dir(cache_dir, encoding).mkdir(
+                        parents=True, exist_ok=True
+                    )
+
+        files = [(path, encoding) for _, path, encoding in self.members if path]
+        with ProcessPoolExecutor() as executor:
+            compressed = executor.map(
+                compress_member,
+                [path for path, _ in files],
+                [encoding for _, encoding in files],
+                repeat(cache_dir),
+                chunksize=16,
+            )
+
+            for name, path, encoding in self.members:
+                zinfo = zipfile.ZipInfo(name, self.date_time)
+                if path is None:
+                    # Unix permissions and MS-DOS directory flag.
+                    zinfo.external_attr = (0o40755 << 16) | 0x10
+                    zinfo.CRC = zinfo.file_size = zinfo.compress_size = 0
+                    self.write_compressed(zinfo, b"")
+                    continue
+
+                compress_type, crc, size, data = next(compressed)
+                if name in self.siblings:
+                    # Original member always precedes its siblings.
+                    if size >= self.NameToInfo[self.siblings[name]].file_size:
+                        del self.siblings[name]
+                        continue
+
+                mode = 0o755 if os.access(path, os.X_OK) else 0o644
+                zinfo.external_attr = (0o100000 | mode) << 16
+                zinfo.compress_type = compress_type
+                zinfo.CRC = crc
+                zinfo.file_size = size
+                zinfo.compress_size = len(data)
+                self.write_compressed(zinfo, data)
+
+    def report(self, logger: logging.Logger) -> None:
+        """
+        Logs how much space compression saves and what takes up the most of it.
+        """
+        files = [zinfo for zinfo in self.filelist if not zinfo.is_dir()]
+        size = sum(zinfo.file_size for zinfo in files)
+        compressed = sum(zinfo.compress_size for zinfo in files)
+        logger.info(
+            f"Archive contains {len(files)} files, {format_size(compressed)} compressed from {format_size(size)} (saved {format_size(size - compressed)})."
+        )
 
-    def file(self, name: str) -> None:
-        self.write(name, self.prefix / name)
+        stored = [
+            zinfo
+            for zinfo in files
+            if zinfo.compress_type == zipfile.ZIP_STORED
+            and zinfo.filename not in self.siblings
+        ]
+        logger.info(
+            f"Stored without compression: {len(stored)} files, {format_size(sum(zinfo.file_size for zinfo in stored))}."
+        )
+
+        for suffix, encoding in PRECOMPRESSED_ENCODINGS.items():
+            siblings = [
+                (self.NameToInfo[original], self.NameToInfo[sibling])
+                for sibling, original in self.siblings.items()
+                if sibling.endswith(suffix)
+            ]
+            if not siblings:
+                continue
+
+            original_size = sum(original.file_size for original, _ in siblings)
+            sibling_size = sum(sibling.file_size for _, sibling in siblings)
+            logger.info(
+                f"Precompressed {len(siblings)} assets with {encoding}, serving them transfers {format_size(sibling_size)} instead of {format_size(original_size)} (saved {format_size(original_size - sibling_size)})."
+            )
+
+        largest = sorted(files, key=lambda zinfo: zinfo.compress_size, reverse=True)
+        logger.info("Largest members:")
+        for zinfo in largest[:REPORT_TOP]:
+            logger.info(f"{format_size(zinfo.compress_size):>12}  {zinfo.filename}")
+
+        # Group dependencies by package, everything else by top-level directory.
+        directories: Dict[str, int] = {}
+        for zinfo in files:
+            parts = zinfo.filename.split("/")
+            depth = 4 if parts[1] == "vendor" else 2
+            if len(parts) > depth:
+                directory = "/".join(parts[:depth]) + "/"
+                directories[directory] = (
+                    directories.get(directory, 0) + zinfo.compress_size
+                )
+
+        logger.info("Largest directories:")
+        for directory, directory_size in sorted(
+            directories.items(), key=lambda item: item[1], reverse=True
+        )[:REPORT_TOP]:
+            logger.info(f"{format_size(directory_size):>12}  {directory}")
+
+
+@dataclass
+class Step:
+    description: str
+    commands: List[List[str]]
+    # Name of the cache entries, steps without one are always run.
+    name: Optional[str] = None
+    # Paths in the repository whose committed contents determine the outputs.
+    inputs: List[str] = field(default_factory=list)
+    # Paths produced by the commands.
+    outputs: List[str] = field(default_factory=list)
+    # Commands identifying the tools whose different versions might produce different outputs.
+    tools: List[List[str]] = field(default_factory=list)
+    # Steps whose outputs the commands need, only run when this step cannot be restored.
+    requires: List["Step"] = field(default_factory=list)
+
+
+def remove_path(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    elif path.exists() or path.is_symlink():
+        path.unlink()
+
+
+def copy_path(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if source.is_dir() and not source.is_symlink():
+        shutil.copytree(source, target, symlinks=True)
+    else:
+        shutil.copy2(source, target, follow_symlinks=False)
+
+
+class BuildCache:
+    """
+    Runs build steps, restoring their outputs from a previous build
+    when none of their inputs changed.
+
+    Inputs are identified by git object ids so the cache is content-addressed
+    and computing the keys does not require reading the files.
+    """
+
+    def __init__(self, cache_dir: Path, logger: logging.Logger) -> None:
+        self.cache_dir = cache_dir
+        self.logger = logger
+        self.tool_versions: Dict[Tuple[str, ...], str] = {}
+        self.done: List[Step] = []
+        # Time spent on each step, in order of execution.
+        self.timings: List[Tuple[str, float, bool]] = []
+
+    def tool_version(self, command: List[str]) -> str:
+        key = tuple(command)
+        if key not in self.tool_versions:
+            self.tool_versions[key] = subprocess.check_output(
+                command, encoding="utf-8"
+            ).strip()
+
+        return self.tool_versions[key]
+
+    def key(self, step: Step) -> str:
+        assert step.name is not None
+        description = {
+            "name": step.name,
+            "commands": step.commands,
+            "inputs": {
+                path: subprocess.check_output(
+                    ["git", "rev-parse", f"HEAD:{path}"], encoding="utf-8"
+                ).strip()
+                for path in step.inputs
+            },
+            "tools": [self.tool_version(command) for command in step.tools],
+        }
+
+        return hashlib.sha256(
+            json.dumps(description, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def restore(self, entry: Path, step: Step) -> bool:
+        if not entry.is_dir():
+            return False
+
+        for output in step.outputs:
+            remove_path(Path(output))
+            copy_path(entry / output, Path(output))
+
+        # Mark the entry as recently used so that it survives pruning.
+        os.utime(entry)
+
+        return True
+
+    def store(self, entry: Path, step: Step) -> None:
+        assert step.name is not None
+        steps_dir = entry.parent
+        steps_dir.mkdir(parents=True, exist_ok=True)
+
+        temp = Path(tempfile.mkdtemp(prefix=f"{entry.name}.", dir=steps_dir))
+        try:
+            for output in step.outputs:
+                copy_path(Path(output), temp / output)
+            # Rename is atomic so concurrent builds never see a partial entry.
+            os.replace(temp, entry)
+        except OSError:
+            # Another build stored the same entry in the meanwhile.
+            shutil.rmtree(temp, ignore_errors=True)
+            if not entry.is_dir():
+                raise
+
+        entries = sorted(
+            steps_dir.glob(f"{step.name}-*"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in entries[KEEP_CACHED_STEPS:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def run(self, step: Step) -> None:
+        if step in self.done:
+            return
+
+        start = time.perf_counter()
+
+        entry = None
+        if step.name is not None:
+            entry = self.cache_dir / "steps" / f"{step.name}-{self.key(step)}"
+            if self.restore(entry, step):
+                self.finish(step, start, cached=True)
+                return
+
+        for requirement in step.requires:
+            self.run(requirement)
+
+        # Requirements are timed separately.
+        start = time.perf_counter()
+
+        self.logger.info(f"{step.description}…")
+        for command in step.commands:
+            subprocess.check_call(command)
+
+        if entry is not None:
+            self.store(entry, step)
+
+        self.finish(step, start, cached=False)
+
+    def finish(self, step: Step, start: float, cached: bool) -> None:
+        elapsed = time.perf_counter() - start
+        self.done.append(step)
+        self.timings.append((step.description, elapsed, cached))
+        if cached:
+            self.logger.info(
+                f"{step.description}: restored from cache in {elapsed:.1f} s."
+            )
+        else:
+            self.logger.info(f"{step.description}: finished in {elapsed:.1f} s.")
 
 
 def is_repo_dirty(source_dir: Path) -> bool:
@@ -108,6 +562,24 @@ def clone_repo_to(source_dir: Path, target_dir: Path) -> None:
     subprocess.check_call(["git", "clone", "--shared", source_dir, target_dir])
 
 
+def get_commit_timestamp() -> int:
+    return int(
+        subprocess.check_output(
+            ["git", "log", "-1", "--format=%ct"],
+            encoding="utf-8",
+        ).strip()
+    )
+
+
+def get_cache_dir() -> Path:
+    """
+    Returns directory where build results are cached between builds.
+    It can be safely removed to start from scratch.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "selfoss-dist"
+
+
 def get_short_commit_id() -> str:
     return subprocess.check_output(
         ["git", "rev-parse", "--short", "HEAD"],
@@ -144,30 +616,75 @@ def main() -> None:
             version = version.replace("SNAPSHOT", get_short_commit_id())
             subprocess.check_call(["npm", "run", "bump-version", version])
 
-        logger.info("Installing dependencies…")
-        subprocess.check_call(["npm", "run", "install-dependencies"])
-
-        logger.info("Building asset bundles…")
-        subprocess.check_call(["npm", "run", "build"])
-
-        logger.info("Generating config-example.ini…")
-        subprocess.check_call(["php", "utils/generate-config-example.php"])
-
-        logger.info("Optimizing PHP dependencies…")
-        subprocess.check_call(
-            ["composer", "install", "--no-dev", "--optimize-autoloader"]
+        client_dependencies = Step(
+            name="client-dependencies",
+            description="Installing client dependencies",
+            commands=[["npm", "run", "install-dependencies:client"]],
+            inputs=["client/package.json", "client/package-lock.json"],
+            outputs=["client/node_modules"],
+            tools=[["node", "--version"], ["npm", "--version"]],
+        )
+        assets = Step(
+            name="assets",
+            description="Building asset bundles",
+            commands=[["npm", "run", "build"]],
+            inputs=["client"],
+            outputs=["public"],
+            tools=[["node", "--version"]],
+            requires=[client_dependencies],
+        )
+        server_dependencies = Step(
+            name="server-dependencies",
+            description="Installing PHP dependencies",
+            commands=[["composer", "install", "--no-dev", "--no-autoloader"]],
+            inputs=["composer.json", "composer.lock"],
+            outputs=["vendor"],
+            tools=[["php", "--version"], ["composer", "--version"]],
+        )
+        # Class map covers our own sources too so it cannot be cached with the dependencies.
+        # It is generated without network access in a fraction of a second.
+        autoloader = Step(
+            description="Optimizing PHP autoloader",
+            commands=[["composer", "dump-autoload", "--no-dev", "--optimize"]],
+            requires=[server_dependencies],
         )
+        config_example = Step(
+            name="config-example",
+            description="Generating config-example.ini",
+            commands=[["php", "utils/generate-config-example.php"]],
+            inputs=["utils/generate-config-example.php", "src"],
+            outputs=["config-example.ini"],
+            tools=[["php", "--version"]],
+            requires=[autoloader],
+        )
+
+        cache_dir = get_cache_dir()
+        build = BuildCache(cache_dir, logger)
+        for step in [assets, server_dependencies, autoloader, config_example]:
+            build.run(step)
 
         filename = f"selfoss-{version}.zip"
 
+        # Use the same time stamp for all files so that the archive is reproducible.
+        timestamp = int(os.environ.get("SOURCE_DATE_EPOCH") or get_commit_timestamp())
+
         # Fill archive with data.
         with ZipFile(
             source_dir / filename,
             mode="w",
             compression=zipfile.ZIP_DEFLATED,
-            strict_timestamps=False,
         ) as archive:
             archive.prefix = Path("selfoss")
+            archive.date_time = time.gmtime(max(timestamp, MIN_TIMESTAMP))[:6]
+            archive.members = []
+            archive.siblings = {}
+            archive.precompressed_encodings = ["gzip"]
+            if brotli is not None:
+                archive.precompressed_encodings.append("br")
+            else:
+                logger.warning(
+                    "Python module ‘brotli’ is not available, Brotli-compressed assets will not be included."
+                )
 
             archive.create_directory_entry("")
 
@@ -175,7 +692,7 @@ def main() -> None:
             archive.directory("vendor/", is_not_unimportant)
 
             # Pack all bundles and bundled client assets.
-            archive.directory("public/")
+            archive.directory("public/", precompress=True)
 
             # Copy data directory structure and .htaccess for deny.
             archive.directory("data/")
@@ -188,7 +705,20 @@ def main() -> None:
             archive.file("run.php")
             archive.file("cliupdate.php")
 
+            logger.info("Compressing files…")
+            start = time.perf_counter()
+            archive.write_members(cache_dir)
+            build.timings.append(
+                ("Compressing files", time.perf_counter() - start, False)
+            )
+
             logger.info(f"Zipball ‘{filename}’ was successfully generated.")
+            archive.report(logger)
+
+        for description, elapsed, cached in build.timings:
+            logger.info(
+                f"{elapsed:>8.1f} s  {description}{' (cached)' if cached else ''}"
+            )
 
 
 if __name__ == "__main__":